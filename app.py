@@ -1,11 +1,102 @@
 import sys
-from PySide6.QtWidgets import QApplication
-from gui.main_window import MainWindow
+import time
+import logging
+import importlib
+import threading
+from PySide6.QtWidgets import QApplication, QSplashScreen
+from PySide6.QtGui import QPixmap, QColor
+from PySide6.QtCore import Qt
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Modules imported in the background once the main window is up. Each group is imported in
+# order on its own thread; heavy optional backends (TensorFlow, PyCaret, spaCy, NLTK) are left
+# to load on first use.
+PREWARM_GROUPS = [
+    ['pandas', 'sqlalchemy', 'database.fetch_data', 'gui.sql_query_builder', 'gui.dataframe_model'],
+    ['sklearn.preprocessing', 'sklearn.impute', 'data_cleaning.cleaning_functions',
+     'data_cleaning.preprocessing', 'gui.data_cleaning'],
+    ['plotly.express', 'bokeh.plotting', 'gui.visualization'],
+]
+
+def timed_import(name, timings):
+    """
+    Import a module and record how long it took.
+    A module whose dependencies were already loaded by an earlier import only costs its own time.
+
+    Parameters:
+    - name (str): The module to import.
+    - timings (dict): Module name -> seconds, updated in place.
+    """
+    start = time.perf_counter()
+    try:
+        importlib.import_module(name)
+    except Exception as e:
+        logger.warning(f'Pre-warming {name} failed: {e}')
+    timings[name] = time.perf_counter() - start
+
+def prewarm(groups, timings):
+    """
+    Import groups of modules on background daemon threads.
+
+    Parameters:
+    - groups (list): Lists of module names; each list is imported in order on one thread.
+    - timings (dict): Module name -> seconds, updated as imports finish.
+
+    Returns:
+    - list: The started threads.
+    """
+    threads = [threading.Thread(target=lambda group=group: [timed_import(name, timings) for name in group],
+                                name='prewarm', daemon=True)
+               for group in groups]
+    for thread in threads:
+        thread.start()
+    return threads
+
+def import_report(timings):
+    """
+    Format an import-time breakdown, slowest first.
+
+    Parameters:
+    - timings (dict): Module name -> seconds.
+
+    Returns:
+    - str: One line per module.
+    """
+    width = max((len(name) for name in timings), default=0)
+    return '\n'.join(f'{name:<{width}}  {seconds * 1000:8.1f} ms'
+                     for name, seconds in sorted(timings.items(), key=lambda item: -item[1]))
+
+def _log_when_prewarmed(threads, timings):
+    for thread in threads:
+        thread.join()
+    logger.info('Import times:\n%s', import_report(timings))
+
+def _splash_pixmap():
+    pixmap = QPixmap(420, 160)
+    pixmap.fill(QColor('#2c3e50'))
+    return pixmap
 
 def main():
+    started = time.perf_counter()
+    timings = {}
     app = QApplication(sys.argv)
+    splash = QSplashScreen(_splash_pixmap())
+    splash.showMessage('Data Cleaning Tool\nLoading...', Qt.AlignCenter, QColor('white'))
+    splash.show()
+    app.processEvents()
+
+    timed_import('gui.main_window', timings)
+    from gui.main_window import MainWindow
     window = MainWindow()
     window.show()
+    splash.finish(window)
+    logger.info(f'Main window shown after {time.perf_counter() - started:.3f}s')
+
+    threads = prewarm(PREWARM_GROUPS, timings)
+    threading.Thread(target=_log_when_prewarmed, args=(threads, timings), daemon=True).start()
     sys.exit(app.exec_())
 
 if __name__ == '__main__':
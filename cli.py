@@ -0,0 +1,306 @@
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+from multiprocessing import get_context
+from multiprocessing.connection import wait
+from config import config  # Import the shared config dictionary
+
+try:
+    import resource
+except ImportError:  # Windows has no resource module; memory limits are then not enforced
+    resource = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Output file writers by format, see utils.file_operations
+FILE_FORMATS = {'parquet': 'save_parquet', 'feather': 'save_feather', 'csv': 'save_csv'}
+
+def load_spec(path):
+    """
+    Read a pipeline spec file.
+
+    Example spec:
+        {
+          "connection": {"db_type": "postgresql", "host": "db", "port": "5432", "username": "etl",
+                         "password_env": "DB_PASSWORD", "db_name": "finance"},
+          "pipeline": {"strategy": "median", "columns": "amount,balance", "anomaly_method": "Default (Fast)"},
+          "tables": ["ledger", {"table": "payments", "pipeline": {"text_columns": "memo"}}],
+          "output": {"mode": "file", "directory": "cleaned", "format": "parquet"},
+          "workers": 4,
+          "memory_limit_mb": 4096,
+          "memory_budget_mb": 3072,
+          "enforce_memory_budget": false,
+          "timeout": 3600,
+          "chunk_size": 50000,
+          "config": {"query_history_path": null}
+        }
+
+    'pipeline' takes the Data Cleaning dialog settings used by build_pipeline. 'output' is either
+    {"mode": "file", "directory", "format"} or {"mode": "table", "suffix", "if_exists"}. Tables given
+    as objects override 'pipeline' and 'output' for that table. Each job is planned by the memory governor
+    against 'memory_budget_mb'; with 'enforce_memory_budget' a job whose plan does not fit fails before
+    loading any data.
+
+    Parameters:
+    - path (str): Path of the JSON spec.
+
+    Returns:
+    - dict: The spec.
+    """
+    with open(path) as file:
+        spec = json.load(file)
+    if 'connection' not in spec or not spec.get('tables'):
+        raise ValueError("A pipeline spec needs 'connection' and 'tables'.")
+    return spec
+
+def build_jobs(spec, tables=None):
+    """
+    Expand the spec's table list into one job per table.
+
+    Parameters:
+    - spec (dict): The pipeline spec.
+    - tables (list, optional): Only run these tables.
+
+    Returns:
+    - list: Dicts with 'table', 'pipeline' and 'output'.
+    """
+    jobs = []
+    for entry in spec['tables']:
+        entry = {'table': entry} if isinstance(entry, str) else entry
+        if tables and entry['table'] not in tables:
+            continue
+        jobs.append({
+            'table': entry['table'],
+            'pipeline': {**spec.get('pipeline', {}), **entry.get('pipeline', {})},
+            'output': {**spec.get('output', {}), **entry.get('output', {})},
+        })
+    return jobs
+
+def _engine(connection):
+    from database.connection import get_engine
+    connection = dict(connection)
+    if 'password_env' in connection:
+        connection['password'] = os.environ.get(connection.pop('password_env'), '')
+    return get_engine(connection['db_type'], connection.get('host'), connection.get('port'),
+                      connection.get('username'), connection.get('password'), connection['db_name'])
+
+def _read_chunks(engine, table_name, chunk_size, counter):
+    """
+    Stream a table with a server-side cursor, counting the rows read.
+    """
+    import pandas as pd
+    from sqlalchemy import select
+    from database.query_builder import reflect_table, retry_on_stale_table
+
+    def open_chunks():
+        # The query runs when read_sql is called, so a stale reflection fails here, before any chunk
+        connection = engine.connect().execution_options(stream_results=True)
+        try:
+            return connection, pd.read_sql(select(reflect_table(engine, table_name)), connection, chunksize=chunk_size)
+        except Exception:
+            connection.close()
+            raise
+
+    connection, chunks = retry_on_stale_table(engine, table_name, open_chunks)
+    with connection:
+        for chunk in chunks:
+            counter['rows'] += len(chunk)
+            yield chunk
+
+def _write_output(df, engine, table_name, output, chunk_size):
+    mode = output.get('mode', 'table')
+    if mode == 'table':
+        target = output.get('table') or f"{table_name}{output.get('suffix', '_clean')}"
+        df.to_sql(target, engine, if_exists=output.get('if_exists', 'replace'), index=False, chunksize=chunk_size)
+        return target
+    if mode == 'file':
+        from utils import file_operations
+        file_format = output.get('format', 'parquet')
+        if file_format not in FILE_FORMATS:
+            raise ValueError(f"Unsupported output format: {file_format}")
+        directory = output.get('directory', '.')
+        os.makedirs(directory, exist_ok=True)
+        target = os.path.join(directory, f'{table_name}.{file_format}')
+        getattr(file_operations, FILE_FORMATS[file_format])(df, target)
+        return target
+    raise ValueError(f"Unsupported output mode: {mode}")
+
+def run_job(spec, job):
+    """
+    Fetch one table, run the cleaning pipeline on it and write the result.
+
+    Parameters:
+    - spec (dict): The pipeline spec.
+    - job (dict): One entry from build_jobs.
+
+    Returns:
+    - dict: Job report with 'table', 'status', 'rows_in', 'rows_out', 'steps', 'plan', 'output', 'seconds' and 'peak_memory_mb'.
+    """
+    from data_cleaning.pipeline import build_pipeline, run_pipeline_chunks
+    from data_cleaning.memory_governor import profile_table, plan_pipeline, plan_fits, format_plan
+
+    start = time.perf_counter()
+    chunk_size = spec.get('chunk_size', 50000)
+    engine = _engine(spec['connection'])
+    try:
+        counter = {'rows': 0}
+        steps = build_pipeline(job['pipeline'])
+        plan = plan_pipeline(steps, profile_table(engine, job['table']), job['pipeline'], _budget_bytes(spec))
+        report = format_plan(plan)
+        logger.info(f"Execution plan for {job['table']}:\n{report}")
+        if not plan_fits(plan) and spec.get('enforce_memory_budget'):
+            raise MemoryError(f'The plan exceeds the memory budget:\n{report}')
+        # Leading row-wise steps run while the table streams in, so read in chunks they can afford
+        chunk_size = min([chunk_size] + [step.chunk_rows for step in plan.steps if step.mode == 'chunked'])
+        df, timings = run_pipeline_chunks(_read_chunks(engine, job['table'], chunk_size, counter), steps,
+                                          chunk_size=chunk_size, plan=plan)
+        target = _write_output(df, engine, job['table'], job['output'], chunk_size)
+    finally:
+        engine.dispose()
+    return {
+        'table': job['table'],
+        'status': 'ok',
+        'rows_in': counter['rows'],
+        'rows_out': len(df),
+        'steps': [{'name': name, 'seconds': round(seconds, 4)} for name, seconds in timings],
+        'plan': [step._asdict() for step in [plan.load] + list(plan.steps)],
+        'output': target,
+        'seconds': round(time.perf_counter() - start, 4),
+        'peak_memory_mb': _peak_memory_mb(),
+    }
+
+def _budget_bytes(spec):
+    """
+    Memory budget of one job: 'memory_budget_mb' from the spec, otherwise three quarters of the
+    job's memory limit (the limit also covers the interpreter and libraries), otherwise the governor's default.
+    """
+    if spec.get('memory_budget_mb'):
+        return int(spec['memory_budget_mb'] * 1024 * 1024)
+    if spec.get('memory_limit_mb'):
+        return int(spec['memory_limit_mb'] * 0.75 * 1024 * 1024)
+    return None
+
+def _peak_memory_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def _job_process(spec, job, sender):
+    """
+    Entry point of a job process: apply the memory limit, run the job and send back its report.
+    """
+    memory_limit_mb = spec.get('memory_limit_mb')
+    if memory_limit_mb and resource is not None:
+        limit = int(memory_limit_mb) * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    config.update(spec.get('config', {}))
+    # Keep stdout for the run report
+    sys.stdout = sys.stderr
+    try:
+        report = run_job(spec, job)
+    except BaseException as e:
+        report = {'table': job['table'], 'status': 'failed', 'error': f'{type(e).__name__}: {e}',
+                  'peak_memory_mb': _peak_memory_mb()}
+    sender.send(report)
+    sender.close()
+
+def run_jobs(spec, jobs, workers=None, timeout=None):
+    """
+    Run jobs concurrently, each in its own process so that a job that runs out of memory,
+    crashes or times out does not affect the others.
+
+    Parameters:
+    - spec (dict): The pipeline spec.
+    - jobs (list): Jobs from build_jobs.
+    - workers (int, optional): Number of jobs run at once. Defaults to the CPU count.
+    - timeout (float, optional): Seconds after which a job is terminated.
+
+    Returns:
+    - list: Job reports in the order of jobs.
+    """
+    context = get_context('spawn')
+    workers = max(1, workers or os.cpu_count() or 1)
+    pending = list(enumerate(jobs))
+    running = {}
+    reports = [None] * len(jobs)
+
+    while pending or running:
+        while pending and len(running) < workers:
+            index, job = pending.pop(0)
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=_job_process, args=(spec, job, sender), name=f"clean-{job['table']}")
+            process.start()
+            sender.close()
+            running[process.sentinel] = (index, job, process, receiver, time.monotonic())
+            logger.info(f"Started cleaning {job['table']}.")
+
+        # Wait on the pipes as well as the processes: a report larger than the pipe buffer keeps
+        # the child blocked in send() until it is read, so it must be read before join()
+        receivers = {entry[3]: sentinel for sentinel, entry in running.items()}
+        for ready in wait(list(running) + list(receivers), timeout=1):
+            sentinel = receivers.get(ready, ready)
+            if sentinel not in running:
+                continue
+            index, job, process, receiver, started = running.pop(sentinel)
+            try:
+                report = receiver.recv() if receiver.poll() else None
+            except EOFError:
+                report = None
+            process.join()
+            if report is not None:
+                reports[index] = report
+            else:
+                reports[index] = {'table': job['table'], 'status': 'failed',
+                                  'error': f'Job process exited with code {process.exitcode}.'}
+            reports[index].setdefault('seconds', round(time.monotonic() - started, 4))
+            logger.info(f"Finished {job['table']}: {reports[index]['status']}.")
+
+        if timeout:
+            for sentinel, (index, job, process, receiver, started) in list(running.items()):
+                if time.monotonic() - started > timeout:
+                    process.terminate()
+                    process.join()
+                    del running[sentinel]
+                    reports[index] = {'table': job['table'], 'status': 'failed',
+                                      'error': f'Timed out after {timeout}s.', 'seconds': round(time.monotonic() - started, 4)}
+                    logger.error(f"{job['table']} timed out.")
+    return reports
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run data cleaning pipelines on database tables without the GUI.')
+    parser.add_argument('spec', help='Path of the JSON pipeline spec.')
+    parser.add_argument('--tables', nargs='+', help='Only run these tables from the spec.')
+    parser.add_argument('--workers', type=int, help='Number of tables cleaned at once (overrides the spec).')
+    parser.add_argument('--report', help='Write the JSON run report to this file instead of stdout.')
+    args = parser.parse_args(argv)
+
+    spec = load_spec(args.spec)
+    jobs = build_jobs(spec, args.tables)
+    started_at = time.time()
+    start = time.perf_counter()
+    reports = run_jobs(spec, jobs, workers=args.workers or spec.get('workers'), timeout=spec.get('timeout'))
+    run_report = {
+        'spec': os.path.abspath(args.spec),
+        'started_at': started_at,
+        'seconds': round(time.perf_counter() - start, 4),
+        'succeeded': sum(report['status'] == 'ok' for report in reports),
+        'failed': sum(report['status'] != 'ok' for report in reports),
+        'jobs': reports,
+    }
+    text = json.dumps(run_report, indent=2, default=str)
+    if args.report:
+        with open(args.report, 'w') as file:
+            file.write(text)
+    else:
+        print(text)
+    return 1 if run_report['failed'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,29 +1,117 @@
-from keras import layers, models
-from pycaret.anomaly import setup, create_model, assign_model
-from pyod.models.knn import KNN
-from sklearn.ensemble import IsolationForest
+import os
+import tempfile
 import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+from joblib import Parallel, delayed
+from numpy.lib.stride_tricks import sliding_window_view
 from config import config  # Import the shared config dictionary
+from data_cleaning.model_registry import ModelRegistry
 
+# PyCaret experiments already set up, keyed by data fingerprint and column set
+_pycaret_experiments = OrderedDict()
+PYCARET_CACHE_SIZE = 4
 
-def detect_anomalies_pycaret(df, columns):
+
+def _fit_with_registry(registry, method, df, columns, params, fit, kind='joblib'):
+    """
+    Return a fitted detector, reusing a registry version fitted on the same data if available.
+
+    Parameters:
+    registry (ModelRegistry): The model registry, or None to always fit.
+    method (str): The detection method used as part of the registry key.
+    df (pd.DataFrame): The dataframe.
+    columns (list): List of columns to use for anomaly detection.
+    params (dict): Detector hyperparameters used as part of the registry key.
+    fit (callable): Fits and returns a new detector.
+    kind (str): Registry serialization format.
+
+    Returns:
+    object: The fitted detector.
+    """
+    if registry is None:
+        return fit()
+    fingerprint = registry.fingerprint(df, columns)
+    model, _ = registry.load(method, columns, params, fingerprint=fingerprint)
+    if model is None:
+        model = fit()
+        registry.save(method, columns, params, model, fingerprint, kind=kind)
+    return model
+
+def _pycaret_experiment(df, columns):
+    """
+    Return a PyCaret anomaly experiment set up on df[columns].
+    setup() runs PyCaret's full preprocessing and profiling pipeline, so its result is cached per
+    data fingerprint and column set and reused by later calls on the same data.
+
+    Parameters:
+    df (pd.DataFrame): The dataframe.
+    columns (list): List of columns to use for anomaly detection.
+
+    Returns:
+    AnomalyExperiment: The set-up experiment.
+    """
+    from pycaret.anomaly import AnomalyExperiment
+    key = (ModelRegistry.fingerprint(df, columns), tuple(columns))
+    if key in _pycaret_experiments:
+        _pycaret_experiments.move_to_end(key)
+        return _pycaret_experiments[key]
+    experiment = AnomalyExperiment()
+    experiment.setup(df[columns], verbose=False, html=False)
+    _pycaret_experiments[key] = experiment
+    if len(_pycaret_experiments) > PYCARET_CACHE_SIZE:
+        _pycaret_experiments.popitem(last=False)
+    return experiment
+
+def _score_pycaret_pipeline(pipeline, model, df, columns):
+    """
+    Score data with a PyCaret preprocessing pipeline and fitted model without an experiment.
+
+    Parameters:
+    pipeline: The experiment's fitted preprocessing pipeline.
+    model: The fitted PyOD model.
+    df (pd.DataFrame): The dataframe.
+    columns (list): List of columns to use for anomaly detection.
+
+    Returns:
+    pd.DataFrame: df[columns] with 'Anomaly' and 'Anomaly_Score' columns, as assign_model returns.
+    """
+    X = pipeline.transform(df[columns])
+    results = df[columns].copy()
+    results['Anomaly'] = model.predict(X)
+    results['Anomaly_Score'] = model.decision_function(X)
+    return results
+
+def detect_anomalies_pycaret(df, columns, registry=None):
     """
     Detect anomalies using PyCaret's anomaly detection module.
     This method sets up the environment, creates a KNN model, assigns anomalies, and returns the results.
+    The setup is cached per dataset and column set. With a registry, a pipeline already fitted on the
+    same data is reused and PyCaret is not involved at all.
 
     Parameters:
     df (pd.DataFrame): The dataframe.
     columns (list): List of columns to use for anomaly detection.
+    registry (ModelRegistry): Optional registry of fitted models.
 
     Returns:
     pd.DataFrame: Dataframe with anomaly labels assigned.
     """
-    s = setup(df[columns], silent=True, verbose=False)
-    model = create_model('knn')
-    results = assign_model(model)
-    return results
+    if registry is not None:
+        fingerprint = registry.fingerprint(df, columns)
+        stored, _ = registry.load('pycaret', columns, fingerprint=fingerprint)
+        if stored is not None:
+            return _score_pycaret_pipeline(*stored, df, columns)
 
-def detect_anomalies_pyod(df, columns):
+    experiment = _pycaret_experiment(df, columns)
+    model = experiment.create_model('knn', verbose=False)
+    if registry is not None:
+        registry.save('pycaret', columns, None, (experiment.pipeline, model), fingerprint)
+    return experiment.assign_model(model)
+
+def detect_anomalies_pyod(df, columns, registry=None, **params):
     """
     Detect anomalies using PyOD's KNN model.
     This method fits a KNN model and assigns anomaly labels to the dataframe.
@@ -31,29 +119,336 @@ def detect_anomalies_pyod(df, columns):
     Parameters:
     df (pd.DataFrame): The dataframe.
     columns (list): List of columns to use for anomaly detection.
+    registry (ModelRegistry): Optional registry of fitted models.
+    **params: Keyword arguments for pyod.models.knn.KNN.
 
     Returns:
     pd.DataFrame: Dataframe with anomaly labels assigned.
     """
-    clf = KNN()
-    clf.fit(df[columns])
+    from pyod.models.knn import KNN
+    clf = _fit_with_registry(registry, 'pyod', df, columns, params, lambda: KNN(**params).fit(df[columns]))
     df['anomaly'] = clf.labels_
     return df
 
-def detect_anomalies_isolation_forest(df, columns):
+def detect_anomalies_isolation_forest(df, columns, contamination=0.1, sample_size=None, n_estimators=100,
+                                      chunk_size=50000, n_jobs=None, random_state=None, registry=None):
     """
     Detect anomalies using Isolation Forest.
     This method fits an Isolation Forest model and assigns anomaly labels to the dataframe.
+    Trees are built with `n_jobs` workers, optionally on a bounded sample of rows. The threshold is
+    calibrated once on the fitting rows and stored with the model, and all rows are then scored in
+    parallel chunks.
 
     Parameters:
     df (pd.DataFrame): The dataframe.
     columns (list): List of columns to use for anomaly detection.
+    contamination (float): Expected proportion of anomalies.
+    sample_size (int): Maximum number of rows to fit on. None fits on all rows.
+    n_estimators (int): Number of trees.
+    chunk_size (int): Number of rows scored at a time.
+    n_jobs (int): Number of workers for tree building and scoring; -1 uses all cores.
+    random_state (int): Seed for the sample and the trees.
+    registry (ModelRegistry): Optional registry of fitted models.
 
     Returns:
-    pd.DataFrame: Dataframe with anomaly labels assigned.
+    pd.DataFrame: Dataframe with a float32 'anomaly_score' column (lower is more anomalous) and
+    'anomaly' labels (-1 for anomalies, 1 for normal rows).
+    """
+    from sklearn.ensemble import IsolationForest
+    X = _feature_matrix(df, columns)
+    params = {'contamination': contamination, 'sample_size': sample_size, 'n_estimators': n_estimators,
+              'random_state': random_state}
+
+    def fit():
+        sample = _sample_rows(X, sample_size, random_state)
+        # offset_ is the contamination quantile of the sample's scores, i.e. the calibrated threshold
+        return IsolationForest(n_estimators=n_estimators, contamination=contamination, n_jobs=n_jobs,
+                               random_state=random_state).fit(sample)
+
+    clf = _fit_with_registry(registry, 'isolation_forest', df, columns, params, fit)
+    df['anomaly_score'] = _score_in_chunks(clf.score_samples, X, chunk_size, n_jobs)
+    df['anomaly'] = np.where(df['anomaly_score'] < clf.offset_, -1, 1)
+    return df
+
+def _feature_matrix(df, columns):
+    """
+    Materialize the detection columns once as a contiguous float32 matrix.
+
+    Parameters:
+    df (pd.DataFrame): The dataframe.
+    columns (list): List of columns to use for anomaly detection.
+
+    Returns:
+    np.ndarray: C-contiguous float32 array of shape (rows, len(columns)).
+    """
+    return np.ascontiguousarray(df[columns].to_numpy(dtype=np.float32))
+
+def _sample_indices(n_rows, sample_size, random_state=None):
+    """
+    Draw sorted row positions for a uniform sample without replacement.
+
+    Parameters:
+    n_rows (int): Number of rows to sample from.
+    sample_size (int): Maximum number of rows to return.
+    random_state (int): Seed for the sampling.
+
+    Returns:
+    np.ndarray: The sampled positions, or None when every row fits in the sample.
+    """
+    if sample_size is None or n_rows <= sample_size:
+        return None
+    rng = np.random.default_rng(random_state)
+    return np.sort(rng.choice(n_rows, sample_size, replace=False))
+
+def _sample_rows(X, sample_size, random_state=None):
+    """
+    Draw a uniform sample of rows without replacement, keeping their original order.
+
+    Parameters:
+    X (np.ndarray): Feature matrix.
+    sample_size (int): Maximum number of rows to return.
+    random_state (int): Seed for the sampling.
+
+    Returns:
+    np.ndarray: X itself when it is small enough, otherwise the sampled rows.
+    """
+    indices = _sample_indices(len(X), sample_size, random_state)
+    return X if indices is None else X[indices]
+
+def _score_in_chunks(score, X, chunk_size=50000, n_jobs=None):
+    """
+    Apply a scoring function to row chunks of X in parallel threads.
+    The scikit-learn and PyOD scoring routines release the GIL, so threads avoid copying the model to workers.
+
+    Parameters:
+    score (callable): Maps a chunk of rows to one score per row.
+    X (np.ndarray): Feature matrix.
+    chunk_size (int): Number of rows per chunk.
+    n_jobs (int): Number of threads; -1 uses all cores.
+
+    Returns:
+    np.ndarray: float32 array with one score per row.
+    """
+    chunks = [X[start:start + chunk_size] for start in range(0, len(X), chunk_size)]
+    results = Parallel(n_jobs=n_jobs, prefer='threads')(delayed(score)(chunk) for chunk in chunks)
+    if not results:
+        return np.empty(0, dtype=np.float32)
+    return np.concatenate(results).astype(np.float32)
+
+def _fit_knn(X, sample_size=None, random_state=None, **params):
+    """
+    Fit PyOD's KNN model on a sample of X, remembering which rows were sampled so that
+    _knn_scores can score them without their self-match.
+
+    Parameters:
+    X (np.ndarray): Feature matrix.
+    sample_size (int): Maximum number of rows to fit on.
+    random_state (int): Seed for the sample.
+    **params: KNN hyperparameters.
+
+    Returns:
+    KNN: The fitted model, with the sampled positions in `sample_indices_` (None when fitted on all rows).
+    """
+    from pyod.models.knn import KNN
+    indices = _sample_indices(len(X), sample_size, random_state)
+    clf = KNN(**params).fit(X if indices is None else X[indices])
+    clf.sample_indices_ = indices
+    return clf
+
+def _knn_scores(clf, X, chunk_size=50000, n_jobs=None):
+    """
+    Score every row of X with a model from _fit_knn.
+    Rows the model was fitted on would find themselves as their nearest neighbour at distance 0,
+    so they take the model's training scores, which leave the row itself out as PyOD does.
+
+    Parameters:
+    clf (KNN): Model fitted by _fit_knn on X or a sample of it.
+    X (np.ndarray): Feature matrix.
+    chunk_size (int): Number of rows scored at a time.
+    n_jobs (int): Number of threads; -1 uses all cores.
+
+    Returns:
+    np.ndarray: float32 distance scores where higher means more anomalous.
+    """
+    if not hasattr(clf, 'sample_indices_'):
+        return _score_in_chunks(clf.decision_function, X, chunk_size, n_jobs)
+    if clf.sample_indices_ is None:
+        return clf.decision_scores_.astype(np.float32)
+    scores = _score_in_chunks(clf.decision_function, X, chunk_size, n_jobs)
+    scores[clf.sample_indices_] = clf.decision_scores_
+    return scores
+
+def detect_anomalies_knn_scalable(df, columns, n_neighbors=5, method='largest', contamination=0.1,
+                                  sample_size=100000, chunk_size=50000, n_jobs=-1, random_state=None,
+                                  registry=None):
+    """
+    Detect anomalies using PyOD's KNN model fitted on a representative subsample.
+    The neighbour index is built on at most `sample_size` rows, and every row is then scored against
+    it in chunks across `n_jobs` threads. The continuous scores are returned alongside the labels so
+    the threshold can be tuned without refitting. With a registry, the threshold is stored with the
+    model and score_anomalies labels new data against it.
+
+    Parameters:
+    df (pd.DataFrame): The dataframe.
+    columns (list): List of columns to use for anomaly detection.
+    n_neighbors (int): Number of neighbours used for the distance score.
+    method (str): How neighbour distances are combined - 'largest', 'mean' or 'median'.
+    contamination (float): Expected proportion of anomalies, used to set the threshold on the scores of all rows.
+    sample_size (int): Number of rows the neighbour index is fitted on.
+    chunk_size (int): Number of rows scored at a time.
+    n_jobs (int): Number of threads used for scoring; -1 uses all cores.
+    random_state (int): Seed for the subsample.
+    registry (ModelRegistry): Optional registry of fitted models.
+
+    Returns:
+    pd.DataFrame: Dataframe with a float32 'anomaly_score' column and 'anomaly' labels (1 for anomalies).
+    """
+    X = _feature_matrix(df, columns)
+    params = {'n_neighbors': n_neighbors, 'method': method, 'contamination': contamination,
+              'sample_size': sample_size, 'random_state': random_state}
+
+    clf, meta = None, None
+    if registry is not None:
+        fingerprint = registry.fingerprint(df, columns)
+        clf, meta = registry.load('knn_scalable', columns, params, fingerprint=fingerprint)
+    if clf is None:
+        clf = _fit_knn(X, sample_size, random_state, n_neighbors=n_neighbors, method=method,
+                       contamination=contamination)
+
+    scores = _knn_scores(clf, X, chunk_size, n_jobs)
+    if meta is not None:
+        threshold = meta['extra']['threshold']
+    else:
+        # Calibrated on all rows' scores and stored, so score_anomalies labels new data the same way
+        threshold = float(np.quantile(scores, 1 - contamination))
+        if registry is not None:
+            registry.save('knn_scalable', columns, params, clf, fingerprint, extra={'threshold': threshold})
+    df['anomaly_score'] = scores
+    df['anomaly'] = (scores > threshold).astype(int)
+    return df
+
+def _robust_statistics(X):
+    """
+    Column medians and interquartile ranges of a feature matrix, ignoring missing values.
+    Columns without spread get an IQR of 1 so that they are not divided by zero.
+
+    Parameters:
+    X (np.ndarray): Feature matrix.
+
+    Returns:
+    tuple: (median, iqr) as float32 arrays with one value per column.
+    """
+    q1, median, q3 = np.nanpercentile(X, [25, 50, 75], axis=0)
+    iqr = np.where(q3 - q1 > 0, q3 - q1, 1)
+    return median.astype(np.float32), iqr.astype(np.float32)
+
+def _apply_robust_statistics(X, median, iqr):
+    """
+    Fill missing values with the median and robustly scale X in place.
+
+    Parameters:
+    X (np.ndarray): float32 feature matrix.
+    median (np.ndarray): Column medians from _robust_statistics.
+    iqr (np.ndarray): Column interquartile ranges from _robust_statistics.
+
+    Returns:
+    np.ndarray: X.
+    """
+    missing = np.isnan(X)
+    if missing.any():
+        X[missing] = np.take(median, np.nonzero(missing)[1])
+    X -= median
+    X /= iqr
+    return X
+
+def _prepare_matrix(df, columns):
+    """
+    Build the minimal-preprocessing float32 matrix used by the lean detectors.
+
+    Parameters:
+    df (pd.DataFrame): The dataframe.
+    columns (list): List of numeric columns to use for anomaly detection.
+
+    Returns:
+    np.ndarray: C-contiguous float32 array of shape (rows, len(columns)).
+    """
+    X = _feature_matrix(df, columns)
+    return _apply_robust_statistics(X, *_robust_statistics(X))
+
+def prepare_features(df, columns):
+    """
+    Minimal preprocessing for the lean detectors: a float32 matrix with missing values replaced by
+    the column median and each column robustly scaled by its median and interquartile range.
+
+    Parameters:
+    df (pd.DataFrame): The dataframe.
+    columns (list): List of numeric columns to use for anomaly detection.
+
+    Returns:
+    pd.DataFrame: float32 dataframe with the prepared columns, aligned with df's index.
+    """
+    return pd.DataFrame(_prepare_matrix(df, columns), columns=columns, index=df.index)
+
+# Registry methods of the lean default detectors. They are fitted on prepared features, so they are
+# stored apart from the detectors fitted on raw features and keep their scaling statistics.
+DEFAULT_METHODS = {'isolation_forest': 'default_isolation_forest', 'knn': 'default_knn'}
+
+def detect_anomalies_default(df, columns, method='isolation_forest', contamination=0.1, sample_size=100000,
+                             n_jobs=-1, registry=None):
+    """
+    Detect anomalies with the lean default path.
+    Features go through prepare_features and straight into a sample-fitted Isolation Forest or KNN
+    detector, without PyCaret's setup pipeline. With a registry, the detector is stored under its own
+    'default_isolation_forest' or 'default_knn' method together with the median, IQR and threshold,
+    so that score_anomalies prepares and labels new data the same way.
+
+    Parameters:
+    df (pd.DataFrame): The dataframe.
+    columns (list): List of columns to use for anomaly detection.
+    method (str): 'isolation_forest' or 'knn'.
+    contamination (float): Expected proportion of anomalies.
+    sample_size (int): Maximum number of rows to fit on.
+    n_jobs (int): Number of workers; -1 uses all cores.
+    registry (ModelRegistry): Optional registry of fitted models.
+
+    Returns:
+    pd.DataFrame: Dataframe with 'anomaly_score' and 'anomaly' columns (1 for anomalies).
     """
-    clf = IsolationForest(contamination=0.1)
-    df['anomaly'] = clf.fit_predict(df[columns])
+    if method not in DEFAULT_METHODS:
+        raise ValueError(f"Unsupported anomaly detection method: {method}")
+    registry_method = DEFAULT_METHODS[method]
+    params = {'contamination': contamination, 'sample_size': sample_size}
+    X = _feature_matrix(df, columns)
+
+    model, meta = None, None
+    if registry is not None:
+        fingerprint = registry.fingerprint(df, columns)
+        model, meta = registry.load(registry_method, columns, params, fingerprint=fingerprint)
+    median, iqr = _robust_statistics(X)
+    _apply_robust_statistics(X, median, iqr)
+
+    if model is None:
+        if method == 'isolation_forest':
+            from sklearn.ensemble import IsolationForest
+            model = IsolationForest(contamination=contamination, n_jobs=n_jobs).fit(_sample_rows(X, sample_size))
+        else:
+            model = _fit_knn(X, sample_size, contamination=contamination)
+
+    if method == 'isolation_forest':
+        # Flip the scores so that higher means more anomalous, as for the other detectors
+        scores = -_score_in_chunks(model.score_samples, X, n_jobs=n_jobs)
+    else:
+        scores = _knn_scores(model, X, n_jobs=n_jobs)
+    if meta is not None:
+        threshold = meta['extra']['threshold']
+    else:
+        # Isolation Forest calibrates its offset on the fitting rows; KNN uses the quantile of all rows' scores
+        threshold = float(-model.offset_ if method == 'isolation_forest' else np.quantile(scores, 1 - contamination))
+        if registry is not None:
+            registry.save(registry_method, columns, params, model, fingerprint,
+                          extra={'median': median.tolist(), 'iqr': iqr.tolist(), 'threshold': threshold})
+    df['anomaly_score'] = scores
+    df['anomaly'] = (scores > threshold).astype(int)
     return df
 
 def build_autoencoder(input_dim):
@@ -67,6 +462,7 @@ def build_autoencoder(input_dim):
     Returns:
     keras.Model: Compiled autoencoder model.
     """
+    from keras import layers, models
     input_layer = layers.Input(shape=(input_dim,))
     encoder = layers.Dense(64, activation='relu')(input_layer)
     encoder = layers.Dense(32, activation='relu')(encoder)
@@ -78,25 +474,129 @@ def build_autoencoder(input_dim):
     autoencoder.compile(optimizer='adam', loss='mse')
     return autoencoder
 
-def detect_anomalies_autoencoder(df, columns, epochs=50, batch_size=32):
+def _reconstruction_dataset(X, indices, batch_size, shuffle=False, seed=None):
+    """
+    Build a float32 tf.data pipeline that yields (batch, batch) pairs for autoencoder training.
+    Batches are sliced from X on demand, so X (which may be a memory-mapped array) is never copied as a whole.
+
+    Parameters:
+    X (np.ndarray): float32 feature matrix.
+    indices (np.ndarray): Rows of X to include.
+    batch_size (int): Batch size.
+    shuffle (bool): Reshuffle the rows on every epoch.
+    seed (int): Seed for the shuffling.
+
+    Returns:
+    tf.data.Dataset: The input pipeline.
+    """
+    import tensorflow as tf
+    rng = np.random.default_rng(seed)
+
+    def batches():
+        order = rng.permutation(indices) if shuffle else indices
+        for start in range(0, len(order), batch_size):
+            batch = X[np.sort(order[start:start + batch_size])]
+            yield batch, batch
+
+    spec = tf.TensorSpec(shape=(None, X.shape[1]), dtype=tf.float32)
+    dataset = tf.data.Dataset.from_generator(batches, output_signature=(spec, spec))
+    n_batches = -(-len(indices) // batch_size)
+    return dataset.apply(tf.data.experimental.assert_cardinality(n_batches)).prefetch(tf.data.AUTOTUNE)
+
+def reconstruction_errors(model, X, chunk_size=65536):
+    """
+    Compute the per-row mean squared reconstruction error of an autoencoder.
+    Rows are scored chunk by chunk, so memory stays bounded on large tables.
+
+    Parameters:
+    model (keras.Model): Trained autoencoder.
+    X (np.ndarray): float32 feature matrix.
+    chunk_size (int): Number of rows scored at a time.
+
+    Returns:
+    np.ndarray: float32 array with one reconstruction error per row.
+    """
+    import tensorflow as tf
+    errors = np.empty(len(X), dtype=np.float32)
+    for start in range(0, len(X), chunk_size):
+        chunk = np.asarray(X[start:start + chunk_size], dtype=np.float32)
+        # One direct forward pass per chunk; unlike predict() this does not retrace for every call
+        reconstructed = model(chunk, training=False)
+        errors[start:start + len(chunk)] = tf.reduce_mean(tf.square(reconstructed - chunk), axis=1).numpy()
+    return errors
+
+def train_autoencoder(X, epochs=50, batch_size=32, validation_split=0.2, patience=5, seed=None):
+    """
+    Train an autoencoder on a float32 feature matrix with early stopping on validation loss.
+
+    Parameters:
+    X (np.ndarray): float32 feature matrix.
+    epochs (int): Maximum number of training epochs.
+    batch_size (int): Batch size for training.
+    validation_split (float): Fraction of rows held out for validation.
+    patience (int): Epochs without validation improvement before training stops.
+    seed (int): Seed for the train/validation split and shuffling.
+
+    Returns:
+    keras.Model: Trained autoencoder with the best validation weights restored.
+    """
+    from keras import callbacks
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(X))
+    n_val = int(len(X) * validation_split)
+    train_rows, val_rows = np.sort(order[n_val:]), np.sort(order[:n_val])
+
+    autoencoder = build_autoencoder(X.shape[1])
+    train_data = _reconstruction_dataset(X, train_rows, batch_size, shuffle=True, seed=seed)
+    val_data = _reconstruction_dataset(X, val_rows, batch_size) if n_val else None
+    early_stopping = callbacks.EarlyStopping(monitor='val_loss' if n_val else 'loss', patience=patience,
+                                             restore_best_weights=True)
+    # The input pipeline shuffles itself
+    autoencoder.fit(train_data, validation_data=val_data, epochs=epochs, callbacks=[early_stopping],
+                    shuffle=False, verbose=0)
+    return autoencoder
+
+def detect_anomalies_autoencoder(df, columns, epochs=50, batch_size=32, validation_split=0.2, patience=5,
+                                 quantile=0.95, chunk_size=65536, registry=None):
     """
     Detect anomalies using an autoencoder.
-    This method trains an autoencoder and uses reconstruction loss to identify anomalies.
+    This method trains an autoencoder and uses the per-row reconstruction error to identify anomalies.
+    Rows whose error exceeds the `quantile` of the errors are flagged. With a registry, an autoencoder
+    already trained on the same data is reused and its stored threshold is applied.
 
     Parameters:
     df (pd.DataFrame): The dataframe.
     columns (list): List of columns to use for anomaly detection.
-    epochs (int): Number of training epochs.
+    epochs (int): Maximum number of training epochs.
     batch_size (int): Batch size for training.
+    validation_split (float): Fraction of rows held out for early stopping.
+    patience (int): Epochs without validation improvement before training stops.
+    quantile (float): Quantile of the reconstruction error used as the anomaly threshold.
+    chunk_size (int): Number of rows scored at a time.
+    registry (ModelRegistry): Optional registry of fitted models.
 
     Returns:
     pd.DataFrame: Dataframe with anomaly labels assigned based on reconstruction loss.
     """
-    input_dim = len(columns)
-    autoencoder = build_autoencoder(input_dim)
-    autoencoder.fit(df[columns], df[columns], epochs=epochs, batch_size=batch_size, shuffle=True, validation_split=0.2, verbose=0)
-    df['reconstruction_loss'] = autoencoder.evaluate(df[columns], df[columns], verbose=0)
-    threshold = df['reconstruction_loss'].quantile(0.95)
+    X = df[columns].to_numpy(dtype=np.float32)
+    params = {'epochs': epochs, 'batch_size': batch_size, 'validation_split': validation_split,
+              'patience': patience, 'quantile': quantile}
+
+    autoencoder, meta = None, None
+    if registry is not None:
+        fingerprint = registry.fingerprint(df, columns)
+        autoencoder, meta = registry.load('autoencoder', columns, params, fingerprint=fingerprint)
+    if autoencoder is None:
+        autoencoder = train_autoencoder(X, epochs, batch_size, validation_split, patience)
+
+    df['reconstruction_loss'] = reconstruction_errors(autoencoder, X, chunk_size=chunk_size)
+    if meta is not None:
+        threshold = meta['extra']['threshold']
+    else:
+        threshold = float(df['reconstruction_loss'].quantile(quantile))
+        if registry is not None:
+            registry.save('autoencoder', columns, params, autoencoder, fingerprint, kind='keras',
+                          extra={'threshold': threshold})
     df['anomaly'] = df['reconstruction_loss'] > threshold
     return df
 
@@ -111,6 +611,7 @@ def build_lstm_autoencoder(input_shape):
     Returns:
     keras.Model: Compiled LSTM autoencoder model.
     """
+    from keras import layers, models
     model = models.Sequential()
     model.add(layers.LSTM(128, input_shape=input_shape, return_sequences=True))
     model.add(layers.LSTM(64, return_sequences=False))
@@ -121,52 +622,347 @@ def build_lstm_autoencoder(input_shape):
     model.compile(optimizer='adam', loss='mae')
     return model
 
-def detect_anomalies_lstm(df, column, time_steps=10, epochs=50, batch_size=32):
+def _window_starts(df, time_steps, entity_column=None):
+    """
+    Find the start row of every window that fits inside a single series.
+
+    Parameters:
+    df (pd.DataFrame): The dataframe, ordered by time within each entity.
+    time_steps (int): Window length.
+    entity_column (str): Optional column identifying independent series.
+
+    Returns:
+    np.ndarray: int64 start positions of all valid windows.
+    """
+    if entity_column is None:
+        return np.arange(max(len(df) - time_steps + 1, 0), dtype=np.int64)
+    entity = df[entity_column].to_numpy()
+    # A window is valid when its first and last rows belong to the same contiguous run of an entity
+    run_id = np.concatenate([[0], np.cumsum(entity[1:] != entity[:-1])])
+    n_windows = max(len(df) - time_steps + 1, 0)
+    starts = np.arange(n_windows, dtype=np.int64)
+    return starts[run_id[:n_windows] == run_id[time_steps - 1:]]
+
+def _window_dataset(series, starts, time_steps, batch_size, shuffle=False, seed=None):
+    """
+    Build a tf.data pipeline of (window, window) batches gathered from a single copy of the series.
+
+    Parameters:
+    series (tf.Tensor): float32 tensor of shape (rows, features).
+    starts (np.ndarray): Start positions of the windows to include.
+    time_steps (int): Window length.
+    batch_size (int): Batch size.
+    shuffle (bool): Reshuffle the windows on every epoch.
+    seed (int): Seed for the shuffling.
+
+    Returns:
+    tf.data.Dataset: The input pipeline.
+    """
+    import tensorflow as tf
+    offsets = tf.range(time_steps, dtype=tf.int64)
+    dataset = tf.data.Dataset.from_tensor_slices(starts)
+    if shuffle:
+        dataset = dataset.shuffle(len(starts), seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size)
+    dataset = dataset.map(lambda batch: tf.gather(series, batch[:, None] + offsets[None, :]),
+                          num_parallel_calls=tf.data.AUTOTUNE)
+    return dataset.map(lambda windows: (windows, windows)).prefetch(tf.data.AUTOTUNE)
+
+def window_scores_to_rows(window_errors, starts, n_rows):
+    """
+    Map per-window, per-timestep errors back to rows by averaging over all overlapping windows.
+
+    Parameters:
+    window_errors (np.ndarray): Array of shape (n_windows, time_steps).
+    starts (np.ndarray): Start row of each window.
+    n_rows (int): Number of rows in the series.
+
+    Returns:
+    np.ndarray: float32 score per row; NaN for rows not covered by any window.
+    """
+    sums = np.zeros(n_rows, dtype=np.float64)
+    counts = np.zeros(n_rows, dtype=np.int64)
+    for step in range(window_errors.shape[1]):
+        # For a fixed step, starts + step are unique, so buffered fancy-index addition is exact
+        sums[starts + step] += window_errors[:, step]
+        counts[starts + step] += 1
+    with np.errstate(invalid='ignore'):
+        return (sums / counts).astype(np.float32)
+
+def detect_anomalies_lstm(df, column, time_steps=10, epochs=50, batch_size=32, entity_column=None,
+                          validation_split=0.2, patience=5, quantile=0.95, chunk_size=65536):
     """
     Detect anomalies in time series data using an LSTM autoencoder.
-    This method trains an LSTM autoencoder and uses reconstruction loss to identify anomalies.
+    This method trains an LSTM autoencoder on sliding windows and uses reconstruction loss to identify anomalies.
+    Windows are gathered from a single copy of the series instead of being materialized, and each row's
+    reconstruction loss is the mean absolute error at that timestamp averaged over every window covering it.
 
     Parameters:
-    df (pd.DataFrame): The dataframe.
-    column (str): The column containing the time series data.
+    df (pd.DataFrame): The dataframe, ordered by time within each entity.
+    column (str or list): The column(s) containing the time series data.
     time_steps (int): Number of time steps for the LSTM.
-    epochs (int): Number of training epochs.
+    epochs (int): Maximum number of training epochs.
     batch_size (int): Batch size for training.
+    entity_column (str): Optional column identifying independent series; windows never cross entities.
+    validation_split (float): Fraction of windows held out for early stopping.
+    patience (int): Epochs without validation improvement before training stops.
+    quantile (float): Quantile of the reconstruction loss used as the anomaly threshold.
+    chunk_size (int): Number of windows scored at a time.
 
     Returns:
     pd.DataFrame: Dataframe with anomaly labels assigned based on reconstruction loss.
     """
-    data = df[column].values
-    data = data.reshape((len(data), 1))
-
-    X = []
-    for i in range(time_steps, len(data)):
-        X.append(data[i-time_steps:i, 0])
+    import tensorflow as tf
+    from keras import callbacks
+    columns = [column] if isinstance(column, str) else list(column)
+    data = df[columns].to_numpy(dtype=np.float32)
+    starts = _window_starts(df, time_steps, entity_column)
+    if len(starts) == 0:
+        raise ValueError(f"No series is at least {time_steps} rows long.")
 
-    X = np.array(X)
-    X = X.reshape((X.shape[0], X.shape[1], 1))
+    rng = np.random.default_rng()
+    order = rng.permutation(len(starts))
+    n_val = int(len(starts) * validation_split)
+    series = tf.constant(data)
+    train_data = _window_dataset(series, starts[order[n_val:]], time_steps, batch_size, shuffle=True)
+    val_data = _window_dataset(series, starts[order[:n_val]], time_steps, batch_size) if n_val else None
 
-    model = build_lstm_autoencoder((time_steps, 1))
-    model.fit(X, X, epochs=epochs, batch_size=batch_size, validation_split=0.2, verbose=0)
+    model = build_lstm_autoencoder((time_steps, len(columns)))
+    early_stopping = callbacks.EarlyStopping(monitor='val_loss' if n_val else 'loss', patience=patience,
+                                             restore_best_weights=True)
+    model.fit(train_data, validation_data=val_data, epochs=epochs, callbacks=[early_stopping],
+              shuffle=False, verbose=0)
 
-    X_pred = model.predict(X)
-    loss = np.mean(np.abs(X_pred - X), axis=1)
+    # Zero-copy view of every window: (n_windows, time_steps, features)
+    windows = sliding_window_view(data, time_steps, axis=0).transpose(0, 2, 1)
+    window_errors = np.empty((len(starts), time_steps), dtype=np.float32)
+    for begin in range(0, len(starts), chunk_size):
+        chunk = windows[starts[begin:begin + chunk_size]]
+        reconstructed = model.predict(chunk, batch_size=max(batch_size, 1024), verbose=0)
+        window_errors[begin:begin + len(chunk)] = np.mean(np.abs(reconstructed - chunk), axis=2)
 
-    df['reconstruction_loss'] = 0
-    df['reconstruction_loss'].iloc[time_steps:] = loss
-    threshold = df['reconstruction_loss'].quantile(0.95)
+    df['reconstruction_loss'] = window_scores_to_rows(window_errors, starts, len(df))
+    threshold = df['reconstruction_loss'].quantile(quantile)
     df['anomaly'] = df['reconstruction_loss'] > threshold
     return df
 
-def detect_anomalies_custom(df, columns):
-    if 'custom_model' in config:
-        custom_model = config['custom_model']
-        custom_model.fit(df[columns])
-        df['anomaly'] = custom_model.predict(df[columns])
+ENSEMBLE_METHODS = ('isolation_forest', 'knn', 'hbos', 'autoencoder')
+
+def _detector_scores(method, X, contamination=0.1, sample_size=100000, random_state=None, n_jobs=1):
+    """
+    Fit one ensemble member on a sample of X and score every row.
+
+    Parameters:
+    method (str): One of ENSEMBLE_METHODS.
+    X (np.ndarray): Shared float32 feature matrix.
+    contamination (float): Expected proportion of anomalies.
+    sample_size (int): Maximum number of rows to fit on.
+    random_state (int): Seed for the sample.
+    n_jobs (int): Number of threads used for scoring.
+
+    Returns:
+    np.ndarray: float32 scores where higher means more anomalous.
+    """
+    from sklearn.ensemble import IsolationForest
+    from pyod.models.hbos import HBOS
+    if method == 'knn':
+        clf = _fit_knn(X, sample_size, random_state, contamination=contamination)
+        return _knn_scores(clf, X, n_jobs=n_jobs)
+    sample = _sample_rows(X, sample_size, random_state)
+    if method == 'isolation_forest':
+        clf = IsolationForest(contamination=contamination, random_state=random_state).fit(sample)
+        return -_score_in_chunks(clf.score_samples, X, n_jobs=n_jobs)
+    elif method == 'hbos':
+        clf = HBOS(contamination=contamination).fit(sample)
+        return _score_in_chunks(clf.decision_function, X, n_jobs=n_jobs)
+    elif method == 'autoencoder':
+        return reconstruction_errors(train_autoencoder(np.ascontiguousarray(sample), seed=random_state), X)
+    raise ValueError(f"Unsupported ensemble method: {method}")
+
+def _ensemble_worker(source, shape, method, contamination, sample_size, random_state, n_jobs):
+    """
+    Process-pool entry point: attach to the shared feature matrix without copying it and score it.
+
+    Parameters:
+    source (str): Shared memory block name, or path of a memory-mapped .npy file.
+    shape (tuple): Shape of the feature matrix.
+    method (str): One of ENSEMBLE_METHODS.
+    contamination (float): Expected proportion of anomalies.
+    sample_size (int): Maximum number of rows to fit on.
+    random_state (int): Seed for the sample.
+    n_jobs (int): Number of threads used for scoring.
+
+    Returns:
+    np.ndarray: float32 scores where higher means more anomalous.
+    """
+    if source.endswith('.npy'):
+        return _detector_scores(method, np.load(source, mmap_mode='r'), contamination, sample_size,
+                                random_state, n_jobs)
+    shm = shared_memory.SharedMemory(name=source)
+    try:
+        return _detector_scores(method, np.ndarray(shape, dtype=np.float32, buffer=shm.buf), contamination,
+                                sample_size, random_state, n_jobs)
+    finally:
+        shm.close()
+
+def detect_anomalies_ensemble(df, columns, methods=('isolation_forest', 'knn', 'hbos'), combine='rank',
+                              contamination=0.1, sample_size=100000, n_jobs=None, memmap_dir=None,
+                              random_state=None):
+    """
+    Detect anomalies with several detectors running concurrently on one shared feature matrix.
+    The prepared float32 matrix is materialized once, in shared memory or as a memory-mapped file,
+    and every detector runs in its own process against that same buffer. Scores are normalized to
+    percentile ranks and combined by averaging ('rank') or by taking the maximum ('max').
+
+    Parameters:
+    df (pd.DataFrame): The dataframe.
+    columns (list): List of columns to use for anomaly detection.
+    methods (tuple): Detectors to combine, from ENSEMBLE_METHODS.
+    combine (str): 'rank' to average the normalized scores, 'max' to take their maximum.
+    contamination (float): Expected proportion of anomalies, used to threshold the combined score.
+    sample_size (int): Maximum number of rows each detector is fitted on.
+    n_jobs (int): Number of worker processes. Defaults to one per detector, capped at the core count.
+    memmap_dir (str): Optional directory for a memory-mapped matrix instead of shared memory.
+    random_state (int): Seed for the samples.
+
+    Returns:
+    pd.DataFrame: Dataframe with 'anomaly_score' (combined, in [0, 1]) and 'anomaly' (1 for anomalies) columns.
+    """
+    if combine not in ('rank', 'max'):
+        raise ValueError(f"Unsupported combination rule: {combine}")
+    n_workers = min(n_jobs or len(methods), len(methods), os.cpu_count() or 1)
+    threads_per_worker = max((os.cpu_count() or 1) // n_workers, 1)
+
+    X = _prepare_matrix(df, columns)
+    shm = None
+    if memmap_dir:
+        fd, source = tempfile.mkstemp(suffix='.npy', dir=memmap_dir)
+        os.close(fd)
+        np.save(source, X)
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=max(X.nbytes, 1))
+        np.ndarray(X.shape, dtype=np.float32, buffer=shm.buf)[:] = X
+        source = shm.name
+    shape = X.shape
+    del X
+
+    try:
+        # spawn keeps TensorFlow state from leaking into the workers through fork
+        with ProcessPoolExecutor(max_workers=n_workers, mp_context=get_context('spawn')) as executor:
+            futures = [executor.submit(_ensemble_worker, source, shape, method, contamination, sample_size,
+                                       random_state, threads_per_worker) for method in methods]
+            scores = [future.result() for future in futures]
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+        else:
+            os.remove(source)
+
+    ranks = np.column_stack([pd.Series(score).rank(pct=True).to_numpy(dtype=np.float32) for score in scores])
+    combined = ranks.mean(axis=1) if combine == 'rank' else ranks.max(axis=1)
+    df['anomaly_score'] = combined
+    df['anomaly'] = (combined > np.quantile(combined, 1 - contamination)).astype(int)
+    return df
+
+def detect_anomalies_custom(df, columns, progress_callback=None):
+    """
+    Detect anomalies with the custom model from Advanced Settings.
+    The model runs in worker processes (see data_cleaning.custom_model_runner) with the batch size,
+    worker count, timeout and memory limit stored in the shared config.
+
+    Parameters:
+    df (pd.DataFrame): The dataframe.
+    columns (list): List of columns to use for anomaly detection.
+    progress_callback (callable): Optional function called with (rows_done, rows_total).
+
+    Returns:
+    pd.DataFrame: Dataframe with anomaly labels assigned.
+
+    Raises:
+    ValueError: If a column is not numeric.
+    """
+    if 'custom_model_code' in config:
+        from data_cleaning.custom_model_runner import run_custom_model
+        non_numeric = [column for column in columns if not pd.api.types.is_numeric_dtype(df[column])]
+        if non_numeric:
+            raise ValueError(f"Custom anomaly models need numeric columns; not numeric: {', '.join(non_numeric)}")
+        # A float64 matrix can be shared with the worker processes; missing values of nullable columns become NaN
+        X = df[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        df['anomaly'] = run_custom_model(
+            config['custom_model_code'], config.get('model_parameters', {}), X,
+            batch_size=config.get('custom_model_batch_size', 50000),
+            n_workers=config.get('custom_model_workers'),
+            timeout=config.get('custom_model_timeout', 600),
+            memory_limit_mb=config.get('custom_model_memory_mb'),
+            progress_callback=progress_callback)
     return df
 
-def handle_anomalies(df, columns):
-    if 'custom_model' in config:
+def score_anomalies(df, columns, method, registry, params=None, version=None):
+    """
+    Score new data with a detector stored in the registry, without refitting.
+    This is the fast path for recurring scoring: fit once with a detect_anomalies_* function
+    and a registry, then call this on each new batch.
+
+    Parameters:
+    df (pd.DataFrame): The dataframe to score.
+    columns (list): List of columns the detector was fitted on.
+    method (str): The detection method - 'pycaret', 'pyod', 'knn_scalable', 'isolation_forest', 'autoencoder',
+                  'default_isolation_forest' or 'default_knn'.
+    registry (ModelRegistry): The registry holding the fitted detector.
+    params (dict): Detector hyperparameters the detector was fitted with.
+    version (int): Version to use. Defaults to the latest.
+
+    Returns:
+    pd.DataFrame: Dataframe with anomaly labels and, where available, anomaly scores.
+    """
+    model, meta = registry.load(method, columns, params, version=version)
+    if model is None:
+        raise ValueError(f"No fitted {method} model stored for columns {columns}.")
+
+    if method == 'pycaret':
+        return _score_pycaret_pipeline(*model, df, columns)
+    elif method == 'pyod':
+        df['anomaly_score'] = model.decision_function(df[columns])
+        df['anomaly'] = model.predict(df[columns])
+    elif method == 'knn_scalable':
+        df['anomaly_score'] = _score_in_chunks(model.decision_function, _feature_matrix(df, columns), n_jobs=-1)
+        df['anomaly'] = (df['anomaly_score'] > meta['extra']['threshold']).astype(int)
+    elif method in DEFAULT_METHODS.values():
+        extra = meta['extra']
+        X = _apply_robust_statistics(_feature_matrix(df, columns), np.array(extra['median'], dtype=np.float32),
+                                     np.array(extra['iqr'], dtype=np.float32))
+        if method == 'default_knn':
+            # New rows are not in the fit sample, so they are all scored against the neighbour index
+            df['anomaly_score'] = _score_in_chunks(model.decision_function, X, n_jobs=-1)
+        else:
+            df['anomaly_score'] = -_score_in_chunks(model.score_samples, X, n_jobs=-1)
+        df['anomaly'] = (df['anomaly_score'] > extra['threshold']).astype(int)
+    elif method == 'isolation_forest':
+        df['anomaly_score'] = _score_in_chunks(model.score_samples, _feature_matrix(df, columns), n_jobs=-1)
+        df['anomaly'] = np.where(df['anomaly_score'] < model.offset_, -1, 1)
+    elif method == 'autoencoder':
+        df['reconstruction_loss'] = reconstruction_errors(model, df[columns].to_numpy(dtype=np.float32))
+        df['anomaly'] = df['reconstruction_loss'] > meta['extra']['threshold']
+    else:
+        raise ValueError(f"Unsupported anomaly detection method: {method}")
+    return df
+
+def handle_anomalies(df, columns, backend='default'):
+    """
+    Detect anomalies with the custom model if one is configured, otherwise with the chosen backend.
+
+    Parameters:
+    df (pd.DataFrame): The dataframe.
+    columns (list): List of columns to use for anomaly detection.
+    backend (str): 'default' for the lean scikit-learn/PyOD path, or 'pycaret' to opt in to PyCaret.
+
+    Returns:
+    pd.DataFrame: Dataframe with anomaly labels assigned.
+    """
+    if 'custom_model_code' in config:
         return detect_anomalies_custom(df, columns)
+    elif backend == 'pycaret':
+        return detect_anomalies_pycaret(df, columns)
     else:
-        return detect_anomalies_pycaret(df, columns)
\ No newline at end of file
+        return detect_anomalies_default(df, columns)
\ No newline at end of file
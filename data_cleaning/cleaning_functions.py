@@ -1,10 +1,8 @@
 import pandas as pd
-from sklearn.impute import SimpleImputer, KNNImputer, IterativeImputer
+from sklearn.impute import SimpleImputer, KNNImputer
 from scipy.stats.mstats import winsorize
 from sklearn.preprocessing import RobustScaler, MinMaxScaler, OneHotEncoder, StandardScaler
-from imblearn.over_sampling import SMOTE
 from sklearn.cluster import KMeans
-import featuretools as ft
 import numpy as np
 
 def handle_missing_values(df, strategy='mean', columns=None):
@@ -80,6 +78,9 @@ def iterative_impute(df, columns):
     Returns:
     pd.DataFrame: Dataframe with imputed values.
     """
+    # IterativeImputer is experimental and has to be enabled before it can be imported
+    from sklearn.experimental import enable_iterative_imputer
+    from sklearn.impute import IterativeImputer
     imputer = IterativeImputer()
     df[columns] = imputer.fit_transform(df[columns])
     return df
@@ -264,6 +265,7 @@ def handle_imbalanced_data(X, y):
     Returns:
     pd.DataFrame, pd.Series: Resampled feature and target dataframes.
     """
+    from imblearn.over_sampling import SMOTE
     smote = SMOTE()
     X_res, y_res = smote.fit_resample(X, y)
     return X_res, y_res
@@ -315,6 +317,7 @@ def automated_feature_engineering(df, target_column):
     Returns:
     pd.DataFrame: Dataframe with automatically generated features.
     """
+    import featuretools as ft
     es = ft.EntitySet(id='data')
     es.entity_from_dataframe(entity_id='df', dataframe=df, index='index')
     feature_matrix, feature_defs = ft.dfs(entityset=es, target_entity='df')
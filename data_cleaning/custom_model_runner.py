@@ -0,0 +1,197 @@
+import os
+import pickle
+import logging
+import numpy as np
+from multiprocessing import get_context, shared_memory, TimeoutError as PoolTimeoutError
+
+try:
+    import resource
+except ImportError:  # Windows has no resource module; memory limits are then not enforced
+    resource = None
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Per-process state of the prediction workers
+_worker_model = None
+_worker_matrix = None
+_worker_shm = None
+
+class CustomModelError(Exception):
+    """
+    Raised when a user custom model fails, times out or exceeds its memory limit.
+    """
+
+def _limit_memory(memory_limit_mb):
+    """
+    Cap the address space of the current worker process.
+
+    Parameters:
+    memory_limit_mb (int): Limit in megabytes, or None for no limit.
+    """
+    if memory_limit_mb and resource is not None:
+        limit = int(memory_limit_mb) * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+def _load_model_class(code, class_name='CustomModel'):
+    """
+    Execute the user's code in a fresh namespace and return the model class it defines.
+
+    Parameters:
+    code (str): Python source defining the model class.
+    class_name (str): Name of the class to return.
+
+    Returns:
+    type: The model class.
+    """
+    namespace = {'__name__': 'custom_model'}
+    exec(compile(code, '<custom_model>', 'exec'), namespace)
+    if class_name not in namespace:
+        raise CustomModelError(f"The custom model code must define a class named {class_name}.")
+    return namespace[class_name]
+
+def _attach(shm_name, shape, dtype):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+def _validate_worker(code, params, memory_limit_mb):
+    _limit_memory(memory_limit_mb)
+    model = _load_model_class(code)()
+    for method in ('fit', 'predict', 'set_params'):
+        if not callable(getattr(model, method, None)):
+            raise CustomModelError(f"The custom model must implement {method}.")
+    model.set_params(**params)
+    return True
+
+def _fit_worker(code, params, shm_name, shape, dtype, memory_limit_mb):
+    _limit_memory(memory_limit_mb)
+    model = _load_model_class(code)()
+    model.set_params(**params)
+    shm, X = _attach(shm_name, shape, dtype)
+    try:
+        model.fit(X)
+    finally:
+        del X
+        shm.close()
+    # Instances of exec-defined classes cannot be pickled by reference, so only their state is shipped
+    return pickle.dumps(model.__dict__)
+
+def _init_predict_worker(code, state, shm_name, shape, dtype, memory_limit_mb):
+    global _worker_model, _worker_matrix, _worker_shm
+    _limit_memory(memory_limit_mb)
+    model_class = _load_model_class(code)
+    _worker_model = model_class.__new__(model_class)
+    _worker_model.__dict__.update(pickle.loads(state))
+    _worker_shm, _worker_matrix = _attach(shm_name, shape, dtype)
+
+def _predict_batch(bounds):
+    start, stop = bounds
+    return start, np.asarray(_worker_model.predict(_worker_matrix[start:stop])).reshape(-1)
+
+def validate_custom_model(code, params, timeout=30, memory_limit_mb=None):
+    """
+    Check in a separate process that the code defines a usable CustomModel class.
+
+    Parameters:
+    code (str): Python source defining a CustomModel class with fit, predict and set_params.
+    params (dict): Parameters passed to set_params.
+    timeout (float): Seconds to wait before giving up.
+    memory_limit_mb (int): Optional memory limit for the worker.
+
+    Raises:
+    CustomModelError: If the code fails, times out or does not define a valid model.
+    """
+    with get_context('spawn').Pool(1) as pool:
+        try:
+            pool.apply_async(_validate_worker, (code, params, memory_limit_mb)).get(timeout)
+        except PoolTimeoutError:
+            raise CustomModelError(f"Validating the custom model timed out after {timeout} seconds.")
+        except CustomModelError:
+            raise
+        except Exception as e:
+            raise CustomModelError(str(e)) from e
+
+def run_custom_model(code, params, X, batch_size=50000, n_workers=None, timeout=600, memory_limit_mb=None,
+                     progress_callback=None):
+    """
+    Fit a user custom model and predict every row, isolated in worker processes.
+    The feature matrix is placed in shared memory once. The model is fitted in one worker, and its
+    fitted state is loaded into a pool of prediction workers that read their batches directly from
+    the shared matrix. Predictions are collected as they arrive. Every worker runs under an optional
+    address-space limit, and each fit or batch must finish within `timeout` seconds, otherwise the
+    workers are terminated.
+
+    Parameters:
+    code (str): Python source defining a CustomModel class with fit, predict and set_params.
+    params (dict): Parameters passed to set_params.
+    X (np.ndarray): Feature matrix.
+    batch_size (int): Number of rows per prediction batch.
+    n_workers (int): Number of prediction processes. Defaults to the number of cores.
+    timeout (float): Seconds allowed for fitting and for each prediction batch.
+    memory_limit_mb (int): Optional memory limit per worker process.
+    progress_callback (callable): Optional function called with (rows_done, rows_total) as batches arrive.
+
+    Returns:
+    np.ndarray: One prediction per row.
+
+    Raises:
+    CustomModelError: If the model fails, times out or exceeds its memory limit, or if batch_size
+    or timeout is not positive.
+    """
+    if batch_size <= 0:
+        raise CustomModelError(f"The batch size must be positive, got {batch_size}.")
+    if timeout <= 0:
+        raise CustomModelError(f"The timeout must be positive, got {timeout}.")
+    X = np.ascontiguousarray(X)
+    context = get_context('spawn')
+    shm = shared_memory.SharedMemory(create=True, size=max(X.nbytes, 1))
+    try:
+        np.ndarray(X.shape, dtype=X.dtype, buffer=shm.buf)[:] = X
+        layout = (shm.name, X.shape, X.dtype.str)
+
+        with context.Pool(1) as pool:
+            try:
+                state = pool.apply_async(_fit_worker, (code, params, *layout, memory_limit_mb)).get(timeout)
+            except PoolTimeoutError:
+                raise CustomModelError(f"Fitting the custom model timed out after {timeout} seconds.")
+            except MemoryError:
+                raise CustomModelError(f"Fitting the custom model exceeded {memory_limit_mb} MB.")
+            except CustomModelError:
+                raise
+            except Exception as e:
+                raise CustomModelError(f"Fitting the custom model failed: {e}") from e
+
+        batches = []
+        bounds = [(start, min(start + batch_size, len(X))) for start in range(0, len(X), batch_size)]
+        n_workers = min(n_workers or os.cpu_count() or 1, max(len(bounds), 1))
+        with context.Pool(n_workers, initializer=_init_predict_worker,
+                          initargs=(code, state, *layout, memory_limit_mb)) as pool:
+            results = pool.imap_unordered(_predict_batch, bounds)
+            done = 0
+            for _ in bounds:
+                try:
+                    start, batch = results.next(timeout)
+                except PoolTimeoutError:
+                    pool.terminate()
+                    raise CustomModelError(f"A custom model batch timed out after {timeout} seconds.")
+                except MemoryError:
+                    pool.terminate()
+                    raise CustomModelError(f"A custom model batch exceeded {memory_limit_mb} MB.")
+                except Exception as e:
+                    pool.terminate()
+                    raise CustomModelError(f"Custom model prediction failed: {e}") from e
+                batches.append((start, batch))
+                done += len(batch)
+                if progress_callback:
+                    progress_callback(done, len(X))
+        # Batches may come back with different dtypes, e.g. int and float; use one that holds them all
+        predictions = np.empty(len(X), dtype=np.result_type(*(batch.dtype for _, batch in batches))
+                               if batches else np.float64)
+        for start, batch in batches:
+            predictions[start:start + len(batch)] = batch
+        logger.info(f'Custom model scored {len(X)} rows in {len(bounds)} batches.')
+        return predictions
+    finally:
+        shm.close()
+        shm.unlink()
@@ -0,0 +1,362 @@
+import os
+import logging
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from config import config  # Import the shared config dictionary
+from data_cleaning.pipeline import PipelineStep, run_pipeline
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Estimated size of the data: row count, average in-memory bytes per row and per column,
+# extrapolated distinct counts, share of missing values, and where the row count came from.
+DataProfile = namedtuple('DataProfile', ['rows', 'bytes_per_row', 'column_bytes', 'cardinality',
+                                         'missing_fraction', 'source'])
+
+# How one step (or the initial load) will run: 'in_memory', 'chunked' (chunk_rows at a time) or
+# 'two_pass' (column by column, see _two_pass_step), its estimated peak memory in bytes, and whether
+# that fits the budget.
+StepPlan = namedtuple('StepPlan', ['name', 'mode', 'peak_bytes', 'chunk_rows', 'fits', 'reason'])
+
+# settings are the pipeline settings the plan was made for; two-pass steps need the strategy or scale method
+ExecutionPlan = namedtuple('ExecutionPlan', ['budget_bytes', 'profile', 'load', 'steps', 'settings'],
+                           defaults=(None,))
+
+MB = 1024 * 1024
+
+# Smallest chunk worth running; below this the per-chunk overhead dominates
+MIN_CHUNK_ROWS = 1000
+
+def memory_budget():
+    """
+    Memory available to a cleaning run: config['memory_budget_mb'] if set, otherwise half of
+    the memory currently available on the machine.
+
+    Returns:
+    int: Budget in bytes.
+    """
+    if config.get('memory_budget_mb'):
+        return int(config['memory_budget_mb'] * MB)
+    try:
+        import psutil
+        available = psutil.virtual_memory().available
+    except ImportError:
+        try:
+            available = os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+        except (AttributeError, ValueError, OSError):
+            available = 4096 * MB
+    return int(available // 2)
+
+def _extrapolate_cardinality(distinct, sample_rows, rows):
+    # Columns whose sample is mostly distinct keep growing with the data; low-cardinality ones saturate
+    if sample_rows and distinct > sample_rows / 2:
+        return int(min(rows, distinct * rows / sample_rows))
+    return int(distinct)
+
+def profile_dataframe(df, sample_rows=100000, rows=None, source='dataframe'):
+    """
+    Estimate the memory footprint of a dataframe from a sample of its rows.
+
+    Parameters:
+    df (pd.DataFrame): The dataframe, or a sample of a larger table.
+    sample_rows (int): Rows used for the deep memory and cardinality measurements.
+    rows (int): Row count of the full data when df is a sample. Defaults to len(df).
+    source (str): Where the row count came from, shown in the plan report.
+
+    Returns:
+    DataProfile: The estimate.
+    """
+    rows = len(df) if rows is None else rows
+    sample = df.sample(sample_rows, random_state=0) if len(df) > sample_rows else df
+    n = max(len(sample), 1)
+    column_bytes = {column: float(size) / n for column, size in
+                    sample.memory_usage(deep=True, index=False).items()}
+    cardinality = {column: _extrapolate_cardinality(sample[column].nunique(), len(sample), rows)
+                   for column in sample.columns}
+    missing_fraction = {column: float(sample[column].isna().mean()) if len(sample) else 0.0
+                        for column in sample.columns}
+    return DataProfile(rows, sum(column_bytes.values()), column_bytes, cardinality, missing_fraction, source)
+
+def _estimated_rows(engine, table):
+    from sqlalchemy import select, func
+    from database.query_profiler import explain_query
+    try:
+        estimate = explain_query(engine, select(table))
+    except Exception as e:
+        logger.info(f'Could not read row statistics for {table.name}: {e}')
+        estimate = None
+    if estimate and estimate.get('estimated_rows'):
+        return int(estimate['estimated_rows']), 'statistics'
+    with engine.connect() as connection:
+        return int(connection.execute(select(func.count()).select_from(table)).scalar()), 'count'
+
+def profile_table(engine, table_name, sample_rows=10000):
+    """
+    Estimate the memory footprint of a database table before loading it. The row count comes from
+    the database's planner statistics (EXPLAIN), or COUNT(*) when there are none; bytes per row,
+    cardinalities and missing values come from the first sample_rows rows.
+
+    Parameters:
+    engine: A SQLAlchemy engine instance.
+    table_name (str): The table.
+    sample_rows (int): Rows fetched for the sample.
+
+    Returns:
+    DataProfile: The estimate.
+    """
+    from sqlalchemy import select
+    from database.query_builder import reflect_table, retry_on_stale_table
+
+    def sample():
+        table = reflect_table(engine, table_name)
+        rows, source = _estimated_rows(engine, table)
+        with engine.connect() as connection:
+            return rows, source, pd.read_sql(select(table).limit(sample_rows), connection)
+
+    rows, source, sample = retry_on_stale_table(engine, table_name, sample)
+    return profile_dataframe(sample, sample_rows, rows=max(rows, len(sample)), source=source)
+
+def _numeric_bytes(profile, columns):
+    # Steps that go through scikit-learn work on float64 copies of their columns
+    return profile.rows * 8 * max(len(columns), 1)
+
+def estimate_step(step, profile, settings=None):
+    """
+    Estimate the working memory of a pipeline step on top of its input frame, and how much the
+    step adds to the frame.
+
+    Parameters:
+    step (PipelineStep): The step; its kind and columns select the memory model.
+    profile (DataProfile): The size of the step's input.
+    settings (dict): The pipeline settings, for the anomaly method.
+
+    Returns:
+    tuple: (working bytes, bytes added to the frame, short explanation).
+    """
+    import sklearn
+    settings = settings or {}
+    rows = profile.rows
+    frame = rows * profile.bytes_per_row
+    columns = list(step.columns or [])
+    numeric = _numeric_bytes(profile, columns)
+    text = sum(profile.column_bytes.get(column, 0) for column in columns) * rows
+
+    if step.kind == 'impute':
+        return 2 * numeric, 0, 'float copy and imputed values'
+    if step.kind == 'knn_impute':
+        # KNNImputer computes distances from the rows with missing values to all rows in blocks
+        # capped by scikit-learn's working_memory
+        missing_rows = rows * max((profile.missing_fraction.get(column, 0) for column in columns), default=0)
+        distances = min(missing_rows * rows * 8, sklearn.get_config()['working_memory'] * MB)
+        return 3 * numeric + distances, 0, f'distance blocks of {_format_bytes(distances)}'
+    if step.kind == 'iterative_impute':
+        return 4 * numeric, 0, 'one regression per column on float copies'
+    if step.kind == 'dedup':
+        return frame + rows * 9, 0, 'row hashes and the de-duplicated copy'
+    if step.kind == 'scale':
+        return 2 * numeric, 0, 'float copy and scaled values'
+    if step.kind == 'encode':
+        # Dense one-hot encoding: one float64 column per category after the first
+        width = sum(max(profile.cardinality.get(column, 1) - 1, 1) for column in columns)
+        encoded = rows * width * 8
+        return frame + 2 * encoded, encoded, f'one-hot expansion to {width:,} columns'
+    if step.kind == 'anomaly':
+        method = settings.get('anomaly_method')
+        if method in ('PyOD', 'PyCaret'):
+            return 4 * numeric + rows * 5 * 16, rows * 16, 'full KNN fit with neighbour arrays'
+        if method in ('Autoencoder', 'LSTM'):
+            return 3 * numeric, rows * 16, 'float32 training copy and reconstruction errors'
+        return 2 * numeric, rows * 16, 'feature matrix and scores'
+    if step.kind == 'date':
+        return rows * 64, rows * 48, 'parsed dates and six date features'
+    if step.kind == 'text':
+        return 3 * text, 2 * text, 'transformed text column'
+    if step.kind == 'sentiment':
+        return rows * 8 + text, rows * 16, 'unique texts and four float32 scores'
+    if step.kind == 'near_duplicates':
+        from data_cleaning.text_cleaning import MINHASH_NUM_PERM, MINHASH_BATCH_SIZE
+        # uint32 signatures for every row; each hashing batch holds one uint64 per shingle and permutation
+        # (at most one shingle per character, bounded by the text's bytes); the band pass keeps a few
+        # int64 arrays per row
+        signatures = rows * MINHASH_NUM_PERM * 4
+        text_per_row = text / rows if rows else 0
+        batch = 2 * MINHASH_BATCH_SIZE * text_per_row * MINHASH_NUM_PERM * 8
+        return text + signatures + batch + rows * 32, rows * 8, \
+            f'MinHash signatures of {_format_bytes(signatures)} and hashing batches'
+    return frame, 0, 'one copy of the frame (unknown step)'
+
+def _format_bytes(value):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(value) < 1024 or unit == 'GB':
+            return f'{value:,.0f} {unit}' if unit == 'B' else f'{value:,.1f} {unit}'
+        value /= 1024
+
+# Steps with a two-pass implementation, see _two_pass_step
+TWO_PASS_KINDS = ('impute', 'scale')
+
+def _two_pass_working(step, profile, settings):
+    # One float64 copy of a single column, plus the sorted copy taken for medians and quartiles
+    if step.kind == 'impute' and settings.get('strategy') in ('mean', 'median', 'most_frequent', 'constant'):
+        return 2 * profile.rows * 8
+    if step.kind == 'scale' and settings.get('scale_method') in ('standard', 'minmax', 'robust'):
+        return 2 * profile.rows * 8
+    return None
+
+def plan_pipeline(steps, profile, settings=None, budget_bytes=None):
+    """
+    Choose in-memory, chunked or two-pass execution for each step so the run stays under the memory budget.
+    A step runs in memory when its input plus working memory fits. Otherwise a row-wise step is
+    chunked with the largest chunk that fits, and an impute or scale step runs in two passes over one
+    column at a time; other steps are planned in memory and flagged as over budget.
+
+    Parameters:
+    steps (list): PipelineStep tuples, e.g. from build_pipeline.
+    profile (DataProfile): Estimated size of the input data.
+    settings (dict): The pipeline settings.
+    budget_bytes (int): The memory budget. Defaults to memory_budget().
+
+    Returns:
+    ExecutionPlan: The budget, the profile, the plan for loading the data and one StepPlan per step.
+    """
+    settings = settings or {}
+    budget = budget_bytes or memory_budget()
+    frame = profile.rows * profile.bytes_per_row
+    load = StepPlan('Load data', 'in_memory', frame, None, frame <= budget,
+                    f'{profile.rows:,} rows x {_format_bytes(profile.bytes_per_row)} ({profile.source})')
+
+    plans = []
+    for step in steps:
+        working, added, reason = estimate_step(step, profile, settings)
+        peak = frame + working
+        if peak <= budget:
+            plans.append(StepPlan(step.name, 'in_memory', peak, None, True, reason))
+        elif step.row_wise and profile.rows:
+            # The output accumulates in full while only one chunk's working memory is live
+            per_row = working / profile.rows
+            chunk_rows = int((budget - frame - added) // per_row) if per_row else profile.rows
+            if chunk_rows >= MIN_CHUNK_ROWS:
+                plans.append(StepPlan(step.name, 'chunked', frame + added + chunk_rows * per_row, chunk_rows,
+                                      True, reason))
+            else:
+                plans.append(StepPlan(step.name, 'chunked', peak, MIN_CHUNK_ROWS, False, reason))
+        elif step.kind in TWO_PASS_KINDS and _two_pass_working(step, profile, settings) is not None:
+            two_pass = frame + _two_pass_working(step, profile, settings)
+            plans.append(StepPlan(step.name, 'two_pass', two_pass, None, two_pass <= budget,
+                                  'column statistics, then values replaced in place one column at a time'))
+        else:
+            plans.append(StepPlan(step.name, 'in_memory', peak, None, False, f'{reason}; no out-of-core variant'))
+        frame += added
+    return ExecutionPlan(budget, profile, load, plans, settings)
+
+def plan_fits(plan):
+    """
+    Return True when the load and every step are expected to stay under the budget.
+    """
+    return plan.load.fits and all(step.fits for step in plan.steps)
+
+def format_plan(plan):
+    """
+    Render an execution plan as a text table for logs and dialogs.
+
+    Parameters:
+    plan (ExecutionPlan): The plan.
+
+    Returns:
+    str: The report.
+    """
+    lines = [f'Memory budget {_format_bytes(plan.budget_bytes)}',
+             f"{'Step':<32} {'Mode':<10} {'Peak':>10} {'Chunk rows':>11}  Note"]
+    for step in [plan.load] + list(plan.steps):
+        chunk = f'{step.chunk_rows:,}' if step.chunk_rows else ''
+        note = step.reason if step.fits else f'OVER BUDGET: {step.reason}'
+        lines.append(f'{step.name[:32]:<32} {step.mode:<10} {_format_bytes(step.peak_bytes):>10} {chunk:>11}  {note}')
+    return '\n'.join(lines)
+
+def _column_values(df, column):
+    # float64 values of one column; a copy unless the column already is float64
+    return df[column].to_numpy(dtype=np.float64, copy=True)
+
+def _impute_two_pass(df, strategy, columns):
+    """
+    SimpleImputer's mean, median, most_frequent and constant strategies, applied one column at a time
+    so that only a single column is ever copied.
+    """
+    for column in columns:
+        values = _column_values(df, column)
+        missing = np.isnan(values)
+        if not missing.any():
+            df[column] = values
+            continue
+        if strategy == 'mean':
+            fill = np.nanmean(values)
+        elif strategy == 'median':
+            fill = np.nanmedian(values)
+        elif strategy == 'most_frequent':
+            counts = pd.Series(values[~missing]).value_counts()
+            # SimpleImputer breaks ties with the smallest value
+            fill = counts[counts == counts.max()].index.min()
+        else:
+            fill = 0.0
+        values[missing] = fill
+        df[column] = values
+    return df
+
+def _scale_two_pass(df, method, columns):
+    """
+    StandardScaler, MinMaxScaler or RobustScaler applied one column at a time, scaling the
+    column's values in place once its statistics are known.
+    """
+    for column in columns:
+        values = _column_values(df, column)
+        if method == 'standard':
+            center, spread = np.nanmean(values), np.nanstd(values)
+        elif method == 'minmax':
+            center = np.nanmin(values)
+            spread = np.nanmax(values) - center
+        else:
+            q1, center, q3 = np.nanpercentile(values, [25, 50, 75])
+            spread = q3 - q1
+        values -= center
+        # Constant columns are left unscaled, as scikit-learn does
+        values /= spread if spread else 1.0
+        df[column] = values
+    return df
+
+def _two_pass_step(step, settings):
+    """
+    Two-pass version of an impute or scale step: the statistics of each column are computed in a
+    first pass and applied in a second, without scikit-learn's float copy of all columns at once.
+    """
+    columns = list(step.columns or [])
+    if step.kind == 'impute':
+        return lambda df: _impute_two_pass(df, settings.get('strategy'), columns)
+    return lambda df: _scale_two_pass(df, settings.get('scale_method'), columns)
+
+def run_planned(df, steps, plan, progress_callback=None, step_callback=None, cancel_event=None):
+    """
+    Run pipeline steps with the execution mode chosen for each of them by plan_pipeline.
+
+    Parameters:
+    df (pd.DataFrame): The dataframe.
+    steps (list): PipelineStep tuples, in the order they were planned.
+    plan (ExecutionPlan): The plan from plan_pipeline.
+    progress_callback (callable): Optional function called with (step_name, step_index, step_count, fraction).
+    step_callback (callable): Optional function called with (step_name, seconds) when a step finishes.
+    cancel_event (threading.Event): Optional event; when set, the pipeline stops with PipelineCancelled.
+
+    Returns:
+    tuple: (cleaned dataframe, list of (step_name, seconds)).
+    """
+    timings = []
+    for index, (step, step_plan) in enumerate(zip(steps, plan.steps)):
+        def step_progress(name, _, __, fraction, index=index):
+            if progress_callback:
+                progress_callback(name, index, len(steps), fraction)
+        if step_plan.mode == 'two_pass':
+            step = PipelineStep(step.name, _two_pass_step(step, plan.settings or {}), False, step.kind, step.columns)
+        chunk_size = step_plan.chunk_rows if step_plan.mode == 'chunked' else max(len(df), 1)
+        df, step_timings = run_pipeline(df, [step], step_progress, step_callback, cancel_event, chunk_size)
+        timings.extend(step_timings)
+    return df, timings
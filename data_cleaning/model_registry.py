@@ -0,0 +1,191 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import joblib
+import pandas as pd
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class ModelRegistry:
+    """
+    On-disk store of fitted anomaly detectors so they can be fitted once and scored many times.
+
+    Models are grouped by a model key built from the detection method, the column set and the
+    hyperparameters. Every fit of the same key on different data is stored as a new version and
+    tagged with a fingerprint of the training data. Layout:
+
+        <root_dir>/<model_key>/v0001/meta.json
+        <root_dir>/<model_key>/v0001/model.joblib   (scikit-learn / PyOD / PyCaret pipelines)
+        <root_dir>/<model_key>/v0001/model.keras    (Keras)
+
+    When more than `max_versions` versions are stored, the least recently used ones are evicted.
+    """
+
+    def __init__(self, root_dir='model_registry', max_versions=50):
+        self.root_dir = root_dir
+        self.max_versions = max_versions
+        os.makedirs(root_dir, exist_ok=True)
+
+    @staticmethod
+    def model_key(method, columns, params=None):
+        """
+        Build the key shared by all versions of a detector.
+
+        Parameters:
+        - method (str): The detection method (e.g. 'pyod', 'isolation_forest').
+        - columns (list): Columns the detector is fitted on.
+        - params (dict, optional): Detector hyperparameters.
+
+        Returns:
+        - str: A stable hexadecimal key.
+        """
+        payload = json.dumps({'method': method, 'columns': list(columns), 'params': params or {}},
+                             sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+    @staticmethod
+    def fingerprint(df, columns):
+        """
+        Fingerprint the training data from its values, dtypes and shape.
+
+        Parameters:
+        - df (pd.DataFrame): The dataframe.
+        - columns (list): Columns the detector is fitted on.
+
+        Returns:
+        - str: A hexadecimal fingerprint.
+        """
+        data = df[list(columns)]
+        digest = hashlib.sha1(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+        digest.update(str(data.shape).encode())
+        digest.update(str(list(data.dtypes.astype(str))).encode())
+        return digest.hexdigest()[:16]
+
+    def _key_dir(self, key):
+        return os.path.join(self.root_dir, key)
+
+    def _read_meta(self, version_dir):
+        with open(os.path.join(version_dir, 'meta.json')) as file:
+            return json.load(file)
+
+    def _write_meta(self, version_dir, meta):
+        with open(os.path.join(version_dir, 'meta.json'), 'w') as file:
+            json.dump(meta, file, indent=2, default=str)
+
+    def versions(self, method, columns, params=None):
+        """
+        List the stored versions of a detector, oldest first.
+
+        Parameters:
+        - method (str): The detection method.
+        - columns (list): Columns the detector is fitted on.
+        - params (dict, optional): Detector hyperparameters.
+
+        Returns:
+        - list: Metadata dictionaries of each version.
+        """
+        key_dir = self._key_dir(self.model_key(method, columns, params))
+        if not os.path.isdir(key_dir):
+            return []
+        return [self._read_meta(os.path.join(key_dir, name)) for name in sorted(os.listdir(key_dir))]
+
+    def save(self, method, columns, params, model, fingerprint, kind='joblib', extra=None):
+        """
+        Store a fitted detector as a new version.
+
+        Parameters:
+        - method (str): The detection method.
+        - columns (list): Columns the detector was fitted on.
+        - params (dict): Detector hyperparameters.
+        - model: The fitted detector.
+        - fingerprint (str): Fingerprint of the training data.
+        - kind (str): Serialization format - 'joblib' or 'keras'.
+        - extra (dict, optional): JSON-serializable values needed for scoring (e.g. a threshold).
+
+        Returns:
+        - int: The new version number.
+        """
+        key = self.model_key(method, columns, params)
+        existing = self.versions(method, columns, params)
+        version = existing[-1]['version'] + 1 if existing else 1
+        version_dir = os.path.join(self._key_dir(key), f'v{version:04d}')
+        os.makedirs(version_dir)
+
+        if kind == 'joblib':
+            joblib.dump(model, os.path.join(version_dir, 'model.joblib'))
+        elif kind == 'keras':
+            model.save(os.path.join(version_dir, 'model.keras'))
+        else:
+            raise ValueError(f"Unsupported model kind: {kind}")
+
+        now = time.time()
+        self._write_meta(version_dir, {
+            'key': key, 'version': version, 'method': method, 'columns': list(columns),
+            'params': params or {}, 'fingerprint': fingerprint, 'kind': kind,
+            'extra': extra or {}, 'created': now, 'last_used': now,
+        })
+        logger.info(f'Stored {method} model {key} version {version}.')
+        self._evict()
+        return version
+
+    def load(self, method, columns, params=None, fingerprint=None, version=None):
+        """
+        Load a stored detector and mark it as recently used.
+
+        Parameters:
+        - method (str): The detection method.
+        - columns (list): Columns the detector was fitted on.
+        - params (dict, optional): Detector hyperparameters.
+        - fingerprint (str, optional): Only return a version fitted on data with this fingerprint.
+        - version (int, optional): Return this exact version. Defaults to the latest matching one.
+
+        Returns:
+        - tuple: (model, metadata), or (None, None) if no matching version is stored.
+        """
+        candidates = self.versions(method, columns, params)
+        if fingerprint is not None:
+            candidates = [meta for meta in candidates if meta['fingerprint'] == fingerprint]
+        if version is not None:
+            candidates = [meta for meta in candidates if meta['version'] == version]
+        if not candidates:
+            return None, None
+
+        meta = candidates[-1]
+        version_dir = os.path.join(self._key_dir(meta['key']), f"v{meta['version']:04d}")
+        if meta['kind'] == 'joblib':
+            model = joblib.load(os.path.join(version_dir, 'model.joblib'))
+        elif meta['kind'] == 'keras':
+            from keras import models
+            model = models.load_model(os.path.join(version_dir, 'model.keras'))
+        else:
+            raise ValueError(f"Unsupported model kind: {meta['kind']}")
+
+        meta['last_used'] = time.time()
+        self._write_meta(version_dir, meta)
+        return model, meta
+
+    def _evict(self):
+        """
+        Remove the least recently used versions until at most max_versions remain.
+        """
+        entries = []
+        for key in os.listdir(self.root_dir):
+            key_dir = self._key_dir(key)
+            if not os.path.isdir(key_dir):
+                continue
+            for name in os.listdir(key_dir):
+                version_dir = os.path.join(key_dir, name)
+                entries.append((self._read_meta(version_dir)['last_used'], version_dir))
+
+        entries.sort()
+        for _, version_dir in entries[:max(len(entries) - self.max_versions, 0)]:
+            shutil.rmtree(version_dir)
+            logger.info(f'Evicted model version {version_dir}.')
+            key_dir = os.path.dirname(version_dir)
+            if not os.listdir(key_dir):
+                os.rmdir(key_dir)
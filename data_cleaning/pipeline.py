@@ -0,0 +1,220 @@
+import time
+import logging
+from collections import namedtuple
+import pandas as pd
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# A cleaning step. Row-wise steps transform every row independently, so they can be run chunk by chunk.
+# kind and columns describe what the step does to which columns, for memory planning (see memory_governor).
+PipelineStep = namedtuple('PipelineStep', ['name', 'func', 'row_wise', 'kind', 'columns'], defaults=(None, ()))
+
+class PipelineCancelled(Exception):
+    """
+    Raised when a running pipeline is cancelled.
+    """
+
+def _split(value):
+    return [item.strip() for item in value.split(',') if item.strip()] if isinstance(value, str) else list(value or [])
+
+def build_pipeline(settings):
+    """
+    Build the list of cleaning steps for the options chosen in the Data Cleaning dialog.
+
+    Parameters:
+    settings (dict): Keys 'strategy', 'columns', 'scale_method', 'encode_columns', 'anomaly_method',
+                     'date_columns', 'text_columns' and 'near_duplicate_columns'. Column lists may be
+                     lists or comma separated strings.
+
+    Returns:
+    list: PipelineStep tuples in execution order.
+    """
+    from data_cleaning.cleaning_functions import (handle_missing_values, remove_duplicates, knn_impute,
+                                                  iterative_impute, robust_scale, parse_dates,
+                                                  extract_date_features, normalize_data, encode_categorical,
+                                                  scale_features)
+    from data_cleaning.text_cleaning import (tokenize_text_nltk, stem_text, lemmatize_text, remove_stopwords,
+                                             normalize_text, named_entity_recognition, sentiment_scores,
+                                             near_duplicate_clusters)
+    from data_cleaning import anomaly_detection
+
+    columns = _split(settings.get('columns'))
+    steps = []
+
+    # Handle missing values
+    strategy = settings.get('strategy')
+    if strategy in ['mean', 'median', 'most_frequent', 'constant']:
+        steps.append(PipelineStep('Missing values', lambda df: handle_missing_values(df, strategy, columns), False,
+                                  'impute', columns))
+    elif strategy == 'knn':
+        steps.append(PipelineStep('KNN imputation', lambda df: knn_impute(df, columns), False, 'knn_impute', columns))
+    elif strategy == 'iterative':
+        steps.append(PipelineStep('Iterative imputation', lambda df: iterative_impute(df, columns), False,
+                                  'iterative_impute', columns))
+
+    steps.append(PipelineStep('Remove duplicates', remove_duplicates, False, 'dedup'))
+
+    # Scale features
+    scalers = {'standard': scale_features, 'minmax': normalize_data, 'robust': robust_scale}
+    scaler = scalers.get(settings.get('scale_method'))
+    if scaler is not None:
+        steps.append(PipelineStep('Scaling', lambda df: scaler(df, columns), False, 'scale', columns))
+
+    # Encode categorical features
+    encode_columns = _split(settings.get('encode_columns'))
+    if encode_columns:
+        steps.append(PipelineStep('Encoding', lambda df: encode_categorical(df, encode_columns), False, 'encode',
+                                  encode_columns))
+
+    # Anomaly detection
+    detectors = {
+        'Default (Fast)': anomaly_detection.detect_anomalies_default,
+        'PyCaret': anomaly_detection.detect_anomalies_pycaret,
+        'PyOD': anomaly_detection.detect_anomalies_pyod,
+        'KNN (Scalable)': anomaly_detection.detect_anomalies_knn_scalable,
+        'IsolationForest': anomaly_detection.detect_anomalies_isolation_forest,
+        'Autoencoder': anomaly_detection.detect_anomalies_autoencoder,
+        'LSTM': anomaly_detection.detect_anomalies_lstm,
+        'Ensemble': anomaly_detection.detect_anomalies_ensemble,
+    }
+    anomaly_method = settings.get('anomaly_method')
+    if anomaly_method in detectors:
+        detector = detectors[anomaly_method]
+        steps.append(PipelineStep(f'Anomaly detection ({anomaly_method})', lambda df: detector(df, columns), False,
+                                  'anomaly', columns))
+
+    # Date features extraction
+    for column in _split(settings.get('date_columns')):
+        steps.append(PipelineStep(f'Date features: {column}',
+                                  lambda df, column=column: extract_date_features(parse_dates(df, [column]), column),
+                                  True, 'date', [column]))
+
+    # Text processing
+    for column in _split(settings.get('text_columns')):
+        for name, func, row_wise, kind in [('Tokenize', tokenize_text_nltk, True, 'text'), ('Stem', stem_text, True, 'text'),
+                                           ('Lemmatize', lemmatize_text, True, 'text'),
+                                           ('Stopwords', remove_stopwords, True, 'text'),
+                                           ('Normalize', normalize_text, True, 'text'),
+                                           ('Entities', named_entity_recognition, True, 'text'),
+                                           ('Sentiment', sentiment_scores, False, 'sentiment')]:
+            steps.append(PipelineStep(f'{name}: {column}', lambda df, func=func, column=column: func(df, column),
+                                      row_wise, kind, [column]))
+
+    # Near-duplicate text detection
+    for column in _split(settings.get('near_duplicate_columns')):
+        steps.append(PipelineStep(f'Near duplicates: {column}',
+                                  lambda df, column=column: near_duplicate_clusters(df, column), False,
+                                  'near_duplicates', [column]))
+    return steps
+
+def run_pipeline(df, steps, progress_callback=None, step_callback=None, cancel_event=None, chunk_size=50000):
+    """
+    Run cleaning steps in order with progress reporting and cooperative cancellation.
+    Cancellation is checked before every step and, for row-wise steps, between chunks of
+    `chunk_size` rows, so long text steps can be interrupted part way through.
+
+    Parameters:
+    df (pd.DataFrame): The dataframe.
+    steps (list): PipelineStep tuples, e.g. from build_pipeline.
+    progress_callback (callable): Optional function called with (step_name, step_index, step_count, fraction)
+                                  where fraction is the completed share of the current step.
+    step_callback (callable): Optional function called with (step_name, seconds) when a step finishes.
+    cancel_event (threading.Event): Optional event; when set, the pipeline stops with PipelineCancelled.
+    chunk_size (int): Number of rows per chunk for row-wise steps.
+
+    Returns:
+    tuple: (cleaned dataframe, list of (step_name, seconds)).
+    """
+    def checkpoint():
+        if cancel_event is not None and cancel_event.is_set():
+            raise PipelineCancelled()
+
+    timings = []
+    for index, step in enumerate(steps):
+        checkpoint()
+        if progress_callback:
+            progress_callback(step.name, index, len(steps), 0.0)
+        start = time.perf_counter()
+
+        if step.row_wise and len(df) > chunk_size:
+            parts = []
+            for offset in range(0, len(df), chunk_size):
+                checkpoint()
+                parts.append(step.func(df.iloc[offset:offset + chunk_size].copy()))
+                if progress_callback:
+                    progress_callback(step.name, index, len(steps), min(offset + chunk_size, len(df)) / len(df))
+            df = pd.concat(parts)
+        else:
+            df = step.func(df)
+
+        elapsed = time.perf_counter() - start
+        timings.append((step.name, elapsed))
+        logger.info(f'{step.name} finished in {elapsed:.2f}s.')
+        if step_callback:
+            step_callback(step.name, elapsed)
+    if progress_callback and steps:
+        progress_callback(steps[-1].name, len(steps) - 1, len(steps), 1.0)
+    return df, timings
+
+def run_pipeline_chunks(chunks, steps, progress_callback=None, step_callback=None, cancel_event=None,
+                        total_rows=None, chunk_size=50000, plan=None):
+    """
+    Run cleaning steps on data that arrives in chunks, e.g. from utils.file_operations.iter_excel.
+    The leading row-wise steps are applied to each chunk as it is read, so the raw data is never
+    held in memory as a whole; the chunks are then combined and the remaining steps run with run_pipeline.
+
+    Parameters:
+    chunks (iterable): pd.DataFrame chunks.
+    steps (list): PipelineStep tuples, e.g. from build_pipeline.
+    progress_callback (callable): Optional function called with (step_name, step_index, step_count, fraction).
+    step_callback (callable): Optional function called with (step_name, seconds) when a step finishes.
+    cancel_event (threading.Event): Optional event; when set, the pipeline stops with PipelineCancelled.
+    total_rows (int): Optional expected row count, used to report progress while streaming.
+    chunk_size (int): Number of rows per chunk for row-wise steps after the streamed ones.
+    plan (ExecutionPlan): Optional plan from memory_governor.plan_pipeline for all steps; the steps after
+                          the streamed ones then run with their planned execution mode.
+
+    Returns:
+    tuple: (cleaned dataframe, list of (step_name, seconds)).
+    """
+    streamed = 0
+    while streamed < len(steps) and steps[streamed].row_wise:
+        streamed += 1
+    step_seconds = [0.0] * streamed
+
+    parts = []
+    rows = 0
+    for chunk in chunks:
+        if cancel_event is not None and cancel_event.is_set():
+            raise PipelineCancelled()
+        for index in range(streamed):
+            start = time.perf_counter()
+            chunk = steps[index].func(chunk)
+            step_seconds[index] += time.perf_counter() - start
+        parts.append(chunk)
+        rows += len(chunk)
+        if progress_callback and streamed:
+            fraction = min(rows / total_rows, 1.0) if total_rows else 0.0
+            progress_callback(steps[0].name, 0, len(steps), fraction)
+
+    timings = []
+    for index in range(streamed):
+        timings.append((steps[index].name, step_seconds[index]))
+        logger.info(f'{steps[index].name} finished in {step_seconds[index]:.2f}s.')
+        if step_callback:
+            step_callback(steps[index].name, step_seconds[index])
+
+    def remaining_progress(name, index, count, fraction):
+        progress_callback(name, streamed + index, len(steps), fraction)
+
+    df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+    if plan is not None:
+        from data_cleaning.memory_governor import run_planned
+        df, rest = run_planned(df, steps[streamed:], plan._replace(steps=plan.steps[streamed:]),
+                               remaining_progress if progress_callback else None, step_callback, cancel_event)
+    else:
+        df, rest = run_pipeline(df, steps[streamed:], remaining_progress if progress_callback else None,
+                                step_callback, cancel_event, chunk_size)
+    return df, timings + rest
@@ -0,0 +1,285 @@
+import numpy as np
+
+class _Reservoir:
+    """
+    Fixed-size uniform sample of the rows seen so far (Algorithm R), used as a running sketch.
+    """
+
+    def __init__(self, size, random_state=None):
+        self.size = size
+        self.rng = np.random.default_rng(random_state)
+        self.rows = None
+        self.seen = 0
+
+    def add(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[:, None]
+        if self.rows is None:
+            self.rows = np.empty((self.size, X.shape[1]), dtype=np.float32)
+
+        # Fill the free slots first, then replace slots with probability size / (position + 1)
+        n_fill = min(max(self.size - self.seen, 0), len(X))
+        self.rows[self.seen:self.seen + n_fill] = X[:n_fill]
+        positions = self.seen + np.arange(n_fill, len(X))
+        slots = (self.rng.random(len(positions)) * (positions + 1)).astype(np.int64)
+        keep = slots < self.size
+        self.rows[slots[keep]] = X[n_fill:][keep]
+        self.seen += len(X)
+
+    def sample(self):
+        return self.rows[:min(self.seen, self.size)]
+
+class RobustZScoreDetector:
+    """
+    Incremental robust z-score detector.
+    The median and median absolute deviation of every column are estimated from a bounded
+    reservoir sample, and a row's score is its largest absolute robust z-score.
+    """
+
+    def __init__(self, reservoir_size=10000, random_state=None):
+        self.reservoir = _Reservoir(reservoir_size, random_state)
+        self._stats = None
+
+    def partial_fit(self, X):
+        """
+        Update the running sketch with a chunk of rows.
+
+        Parameters:
+        X (np.ndarray): Chunk of shape (rows, features).
+
+        Returns:
+        RobustZScoreDetector: self.
+        """
+        self.reservoir.add(X)
+        self._stats = None
+        return self
+
+    def score_chunk(self, X):
+        """
+        Score a chunk of rows against the current sketch.
+
+        Parameters:
+        X (np.ndarray): Chunk of shape (rows, features).
+
+        Returns:
+        np.ndarray: float32 scores, higher is more anomalous.
+        """
+        if self._stats is None:
+            sample = self.reservoir.sample()
+            median = np.median(sample, axis=0)
+            mad = 1.4826 * np.median(np.abs(sample - median), axis=0)
+            self._stats = median, np.where(mad > 0, mad, 1)
+        median, mad = self._stats
+        return np.max(np.abs(np.asarray(X, dtype=np.float32) - median) / mad, axis=1).astype(np.float32)
+
+class HalfSpaceTrees:
+    """
+    Streaming Half-Space Trees (Tan, Ting and Liu, 2011).
+    Each tree recursively halves the feature space with randomly chosen dimensions. Mass profiles
+    are counted over a tumbling window of `window_size` rows; a completed window becomes the
+    reference profile that later rows are scored against, so the model adapts without refits.
+    """
+
+    def __init__(self, n_trees=25, depth=15, window_size=250, feature_ranges=None, random_state=None):
+        self.n_trees = n_trees
+        self.depth = depth
+        self.window_size = window_size
+        self.size_limit = 0.1 * window_size
+        self.feature_ranges = feature_ranges
+        self.rng = np.random.default_rng(random_state)
+        self.split_dim = None
+        self.split_value = None
+        self.reference_mass = None
+        self.latest_mass = None
+        self.window_count = 0
+        self.windows_completed = 0
+
+    def _build(self, X):
+        if self.feature_ranges is None:
+            low, high = X.min(axis=0), X.max(axis=0)
+        else:
+            low, high = (np.asarray(bound, dtype=np.float32) for bound in zip(*self.feature_ranges))
+        n_nodes = 2 ** (self.depth + 1) - 1
+        n_internal = 2 ** self.depth - 1
+        self.split_dim = np.zeros((self.n_trees, n_internal), dtype=np.int64)
+        self.split_value = np.zeros((self.n_trees, n_internal), dtype=np.float32)
+
+        for tree in range(self.n_trees):
+            # Random work range around a random point keeps the trees diverse (Tan et al., section 3.1)
+            point = self.rng.uniform(low, high)
+            span = 2 * np.maximum(point - low, high - point)
+            level_low, level_high = (point - span)[None, :], (point + span)[None, :]
+            for level in range(self.depth):
+                # Nodes of a level are contiguous in heap order; node j's children are 2j and 2j + 1 of the next level
+                first, count = 2 ** level - 1, 2 ** level
+                nodes = np.arange(count)
+                dims = self.rng.integers(X.shape[1], size=count)
+                mids = (level_low[nodes, dims] + level_high[nodes, dims]) / 2
+                self.split_dim[tree, first:first + count] = dims
+                self.split_value[tree, first:first + count] = mids
+                left_high, right_low = level_high.copy(), level_low.copy()
+                left_high[nodes, dims] = mids
+                right_low[nodes, dims] = mids
+                next_low = np.empty((2 * count, X.shape[1]), dtype=level_low.dtype)
+                next_high = np.empty_like(next_low)
+                next_low[0::2], next_low[1::2] = level_low, right_low
+                next_high[0::2], next_high[1::2] = left_high, level_high
+                level_low, level_high = next_low, next_high
+
+        self.reference_mass = np.zeros((self.n_trees, n_nodes), dtype=np.float32)
+        self.latest_mass = np.zeros((self.n_trees, n_nodes), dtype=np.float32)
+
+    def _path(self, tree, X):
+        """
+        Node index at every level of one tree for every row: shape (rows, depth + 1).
+        """
+        rows = np.arange(len(X))
+        path = np.zeros((len(X), self.depth + 1), dtype=np.int64)
+        node = path[:, 0]
+        for level in range(self.depth):
+            go_right = X[rows, self.split_dim[tree, node]] >= self.split_value[tree, node]
+            node = 2 * node + 1 + go_right
+            path[:, level + 1] = node
+        return path
+
+    def _mass(self, X):
+        """
+        Mass profile of a block of rows: number of rows passing through every node of every tree.
+        """
+        n_nodes = self.latest_mass.shape[1]
+        return np.stack([np.bincount(self._path(tree, X).ravel(), minlength=n_nodes)
+                         for tree in range(self.n_trees)]).astype(np.float32)
+
+    def partial_fit(self, X):
+        """
+        Count a chunk of rows into the latest window, rolling windows as they fill.
+        Only the last window completed in the chunk can become the reference profile, so at most
+        two blocks of the chunk are counted regardless of how many windows it spans.
+
+        Parameters:
+        X (np.ndarray): Chunk of shape (rows, features).
+
+        Returns:
+        HalfSpaceTrees: self.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if self.split_dim is None:
+            self._build(X)
+        rows_to_fill = self.window_size - self.window_count
+        if len(X) < rows_to_fill:
+            self.latest_mass += self._mass(X)
+            self.window_count += len(X)
+            return self
+
+        n_completed = 1 + (len(X) - rows_to_fill) // self.window_size
+        last_end = rows_to_fill + (n_completed - 1) * self.window_size
+        if n_completed == 1:
+            self.reference_mass = self.latest_mass + self._mass(X[:last_end])
+        else:
+            self.reference_mass = self._mass(X[last_end - self.window_size:last_end])
+        self.latest_mass = self._mass(X[last_end:])
+        self.window_count = len(X) - last_end
+        self.windows_completed += n_completed
+        return self
+
+    def score_chunk(self, X):
+        """
+        Score a chunk of rows against the reference mass profile.
+
+        Parameters:
+        X (np.ndarray): Chunk of shape (rows, features).
+
+        Returns:
+        np.ndarray: float32 scores in [0, 1], higher is more anomalous.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        # Until the first window completes, score against the partial window
+        mass = self.reference_mass if self.windows_completed else self.latest_mass
+        level_weight = 2.0 ** np.arange(self.depth + 1)
+        total = np.zeros(len(X), dtype=np.float64)
+        for tree in range(self.n_trees):
+            path_mass = mass[tree][self._path(tree, X)]
+            # Stop at the first node whose mass falls below the size limit, or at the leaf
+            below = path_mass < self.size_limit
+            terminal = np.where(below.any(axis=1), below.argmax(axis=1), self.depth)
+            total += path_mass[np.arange(len(X)), terminal] * level_weight[terminal]
+        normalizer = self.n_trees * self.window_size * level_weight[-1]
+        return (1 - total / normalizer).astype(np.float32)
+
+class MiniBatchAutoencoderDetector:
+    """
+    Autoencoder updated with a few mini-batch epochs per chunk; rows are scored by reconstruction error.
+    """
+
+    def __init__(self, epochs_per_chunk=1, batch_size=256):
+        self.epochs_per_chunk = epochs_per_chunk
+        self.batch_size = batch_size
+        self.model = None
+
+    def partial_fit(self, X):
+        """
+        Train the autoencoder on a chunk of rows.
+
+        Parameters:
+        X (np.ndarray): Chunk of shape (rows, features).
+
+        Returns:
+        MiniBatchAutoencoderDetector: self.
+        """
+        from data_cleaning.anomaly_detection import build_autoencoder
+        X = np.asarray(X, dtype=np.float32)
+        if self.model is None:
+            self.model = build_autoencoder(X.shape[1])
+        self.model.fit(X, X, epochs=self.epochs_per_chunk, batch_size=self.batch_size, shuffle=True, verbose=0)
+        return self
+
+    def score_chunk(self, X):
+        """
+        Score a chunk of rows by reconstruction error.
+
+        Parameters:
+        X (np.ndarray): Chunk of shape (rows, features).
+
+        Returns:
+        np.ndarray: float32 per-row mean squared error, higher is more anomalous.
+        """
+        from data_cleaning.anomaly_detection import reconstruction_errors
+        return reconstruction_errors(self.model, np.asarray(X, dtype=np.float32))
+
+def detect_anomalies_stream(chunks, columns, detector=None, quantile=0.99, score_reservoir_size=10000,
+                            random_state=None):
+    """
+    Flag anomalies in a stream of dataframe chunks with bounded memory and no refits.
+    Each chunk is first scored with the detector's current state and then used to update it
+    (test-then-train). The threshold is the `quantile` of a bounded reservoir of past scores,
+    so it follows the stream as it drifts. The first chunk is used for fitting before it is scored.
+
+    Parameters:
+    chunks (iterable): DataFrames, e.g. from database.fetch_data.fetch_data_chunks.
+    columns (list): List of columns to use for anomaly detection.
+    detector: Object with partial_fit and score_chunk. Defaults to HalfSpaceTrees.
+    quantile (float): Quantile of past scores used as the anomaly threshold.
+    score_reservoir_size (int): Number of past scores kept for the threshold.
+    random_state (int): Seed for the score reservoir.
+
+    Yields:
+    pd.DataFrame: Each chunk with 'anomaly_score' and 'anomaly' columns.
+    """
+    detector = detector if detector is not None else HalfSpaceTrees(random_state=random_state)
+    scores_seen = _Reservoir(score_reservoir_size, random_state)
+    fitted = False
+    for chunk in chunks:
+        X = chunk[columns].to_numpy(dtype=np.float32)
+        if not fitted:
+            detector.partial_fit(X)
+            fitted = True
+            scores = detector.score_chunk(X)
+        else:
+            scores = detector.score_chunk(X)
+            detector.partial_fit(X)
+        scores_seen.add(scores)
+        threshold = np.quantile(scores_seen.sample(), quantile)
+        chunk['anomaly_score'] = scores
+        chunk['anomaly'] = scores > threshold
+        yield chunk
@@ -1,23 +1,63 @@
-import nltk
-from nltk.tokenize import word_tokenize
-from sklearn.feature_extraction.text import CountVectorizer
-from nltk.stem import PorterStemmer, WordNetLemmatizer
-from nltk.corpus import stopwords
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
+import os
 import re
 import string
-import spacy
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
+import pickle
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+import numpy as np
+import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize as normalize_rows
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+import joblib
 
-# Download necessary NLTK data
-nltk.download('punkt')
-nltk.download('wordnet')
-nltk.download('omw-1.4')
-nltk.download('stopwords')
-nltk.download('vader_lexicon')
+# NLTK data used by this module and where nltk.data.find looks for it
+NLTK_RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'wordnet': 'corpora/wordnet',
+    'omw-1.4': 'corpora/omw-1.4',
+    'stopwords': 'corpora/stopwords',
+    'vader_lexicon': 'sentiment/vader_lexicon.zip',
+}
 
-# Load spaCy model
-nlp = spacy.load('en_core_web_sm')
+# spaCy pipeline, loaded by the first call that needs it
+_nlp = None
+
+def ensure_nltk_data(*resources):
+    """
+    Download NLTK data on first use instead of at import time.
+    Resources that are already installed are not downloaded again.
+
+    Parameters:
+    *resources (str): Names from NLTK_RESOURCES.
+    """
+    import nltk
+    for resource in resources:
+        try:
+            nltk.data.find(NLTK_RESOURCES[resource])
+        except LookupError:
+            nltk.download(resource, quiet=True)
+
+def get_spacy_model():
+    """
+    Load the spaCy English model once, the first time it is needed.
+
+    Returns:
+    spacy.language.Language: The en_core_web_sm pipeline.
+    """
+    global _nlp
+    if _nlp is None:
+        import spacy
+        _nlp = spacy.load('en_core_web_sm')
+    return _nlp
+
+def _sentiment_analyzer():
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+    ensure_nltk_data('vader_lexicon')
+    return SentimentIntensityAnalyzer()
 
 def tokenize_text_nltk(df, column):
     """
@@ -31,6 +71,8 @@ def tokenize_text_nltk(df, column):
     Returns:
     pd.DataFrame: Dataframe with an additional column of tokenized words.
     """
+    from nltk.tokenize import word_tokenize
+    ensure_nltk_data('punkt')
     df[f'{column}_tokens'] = df[column].apply(word_tokenize)
     return df
 
@@ -62,6 +104,7 @@ def stem_text(df, column):
     Returns:
     pd.DataFrame: Dataframe with an additional column of stemmed text.
     """
+    from nltk.stem import PorterStemmer
     stemmer = PorterStemmer()
     df[f'{column}_stemmed'] = df[column].apply(lambda x: ' '.join([stemmer.stem(word) for word in x.split()]))
     return df
@@ -78,6 +121,8 @@ def lemmatize_text(df, column):
     Returns:
     pd.DataFrame: Dataframe with an additional column of lemmatized text.
     """
+    from nltk.stem import WordNetLemmatizer
+    ensure_nltk_data('wordnet', 'omw-1.4')
     lemmatizer = WordNetLemmatizer()
     df[f'{column}_lemmatized'] = df[column].apply(lambda x: ' '.join([lemmatizer.lemmatize(word) for word in x.split()]))
     return df
@@ -94,6 +139,8 @@ def remove_stopwords(df, column):
     Returns:
     pd.DataFrame: Dataframe with an additional column of text without stopwords.
     """
+    from nltk.corpus import stopwords
+    ensure_nltk_data('stopwords')
     stop_words = set(stopwords.words('english'))
     df[f'{column}_no_stopwords'] = df[column].apply(lambda x: ' '.join([word for word in x.split() if word.lower() not in stop_words]))
     return df
@@ -127,6 +174,7 @@ def named_entity_recognition(df, column):
     Returns:
     pd.DataFrame: Dataframe with an additional column of named entities and their labels.
     """
+    nlp = get_spacy_model()
     df[f'{column}_entities'] = df[column].apply(lambda x: [(ent.text, ent.label_) for ent in nlp(x).ents])
     return df
 
@@ -142,10 +190,119 @@ def sentiment_analysis(df, column):
     Returns:
     pd.DataFrame: Dataframe with an additional column of sentiment scores.
     """
-    sia = SentimentIntensityAnalyzer()
+    sia = _sentiment_analyzer()
     df[f'{column}_sentiment'] = df[column].apply(lambda x: sia.polarity_scores(x))
     return df
 
+SENTIMENT_FIELDS = ('neg', 'neu', 'pos', 'compound')
+
+# Per-process analyzer used by the sentiment worker pool
+_worker_analyzer = None
+
+def _init_sentiment_worker():
+    """
+    Create one VADER analyzer per worker process so the lexicon is loaded once.
+    """
+    global _worker_analyzer
+    _worker_analyzer = _sentiment_analyzer()
+
+def _score_sentiment_chunk(texts):
+    """
+    Score a chunk of texts with VADER.
+
+    Parameters:
+    texts (list): The texts to score.
+
+    Returns:
+    np.ndarray: float32 array of shape (len(texts), 4) in SENTIMENT_FIELDS order.
+    """
+    sia = _worker_analyzer or _sentiment_analyzer()
+    scores = np.empty((len(texts), len(SENTIMENT_FIELDS)), dtype=np.float32)
+    for i, text in enumerate(texts):
+        polarity = sia.polarity_scores(text)
+        scores[i] = [polarity[field] for field in SENTIMENT_FIELDS]
+    return scores
+
+def load_sentiment_cache(cache_path):
+    """
+    Load a persisted sentiment cache.
+
+    Parameters:
+    cache_path (str): Path of the pickled cache file.
+
+    Returns:
+    dict: Mapping of text to a (neg, neu, pos, compound) tuple. Empty if the file does not exist.
+    """
+    if not cache_path or not os.path.exists(cache_path):
+        return {}
+    with open(cache_path, 'rb') as file:
+        return pickle.load(file)
+
+def save_sentiment_cache(cache, cache_path):
+    """
+    Persist a sentiment cache. The file is written atomically so an interrupted run keeps the old cache.
+
+    Parameters:
+    cache (dict): Mapping of text to a (neg, neu, pos, compound) tuple.
+    cache_path (str): Path of the pickled cache file.
+    """
+    tmp_path = f'{cache_path}.tmp'
+    with open(tmp_path, 'wb') as file:
+        pickle.dump(cache, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_path)
+
+def sentiment_scores(df, column, cache_path=None, n_jobs=None, chunksize=10000):
+    """
+    Perform sentiment analysis using NLTK's VADER and store the scores as columns.
+    Only the unique texts of the column are scored; scores already present in the
+    cache are reused and the remaining texts are scored in chunks across a process pool.
+
+    Parameters:
+    df (pd.DataFrame): The dataframe.
+    column (str): The column containing text data.
+    cache_path (str): Optional path of a persisted cache shared across runs.
+    n_jobs (int): Number of worker processes. None uses all cores, 1 scores in-process.
+    chunksize (int): Number of unique texts sent to a worker at a time.
+
+    Returns:
+    pd.DataFrame: Dataframe with float32 columns {column}_neg, {column}_neu, {column}_pos and {column}_compound.
+    """
+    codes, uniques = pd.factorize(df[column].fillna('').astype(str))
+    cache = load_sentiment_cache(cache_path)
+
+    unique_scores = np.empty((len(uniques), len(SENTIMENT_FIELDS)), dtype=np.float32)
+    missing = []
+    for i, text in enumerate(uniques):
+        cached = cache.get(text)
+        if cached is None:
+            missing.append(i)
+        else:
+            unique_scores[i] = cached
+
+    if missing:
+        # Fetch the lexicon once here rather than racing downloads in every worker
+        ensure_nltk_data('vader_lexicon')
+        texts = [uniques[i] for i in missing]
+        chunks = [texts[start:start + chunksize] for start in range(0, len(texts), chunksize)]
+        if n_jobs == 1 or len(chunks) == 1:
+            results = [_score_sentiment_chunk(chunk) for chunk in chunks]
+        else:
+            # spawn: the pipeline runs on a worker thread of a process holding Qt and TensorFlow threads,
+            # and forking a multi-threaded process can deadlock
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_sentiment_worker,
+                                     mp_context=get_context('spawn')) as executor:
+                results = list(executor.map(_score_sentiment_chunk, chunks))
+        new_scores = np.concatenate(results)
+        unique_scores[missing] = new_scores
+        if cache_path:
+            cache.update(zip(texts, map(tuple, new_scores.tolist())))
+            save_sentiment_cache(cache, cache_path)
+
+    row_scores = unique_scores[codes]
+    for j, field in enumerate(SENTIMENT_FIELDS):
+        df[f'{column}_{field}'] = row_scores[:, j]
+    return df
+
 def tfidf_vectorization(df, column):
     """
     Perform TF-IDF vectorization on text.
@@ -161,3 +318,332 @@ def tfidf_vectorization(df, column):
     vectorizer = TfidfVectorizer()
     tfidf_matrix = vectorizer.fit_transform(df[column])
     return tfidf_matrix, vectorizer.get_feature_names_out()
+
+
+class StreamingTextVectorizer:
+    """
+    Memory-bounded count/TF-IDF vectorizer for text that arrives in chunks.
+
+    In 'hashing' mode tokens are mapped into a fixed number of feature columns with
+    HashingVectorizer, so no vocabulary is kept. In 'vocabulary' mode a vocabulary is
+    fitted on the first `sample_size` documents and then frozen. In both modes document
+    frequencies are accumulated in a fixed-size array, so memory does not grow with the corpus.
+
+    Fit with one pass of partial_fit over the chunks, then transform any number of chunks
+    (including new data) with the frozen vocabulary and IDF. The fitted state can be saved
+    and loaded with save/load.
+    """
+
+    def __init__(self, mode='hashing', n_features=2 ** 20, sample_size=100000, max_features=None,
+                 use_idf=True, norm='l2', **vectorizer_params):
+        if mode not in ('hashing', 'vocabulary'):
+            raise ValueError(f"Unsupported vectorization mode: {mode}")
+        self.mode = mode
+        self.n_features = n_features
+        self.sample_size = sample_size
+        self.max_features = max_features
+        self.use_idf = use_idf
+        self.norm = norm
+        self.vectorizer_params = vectorizer_params
+        self.vectorizer = None
+        self.n_docs = 0
+        self.doc_freq = None
+        self.idf_ = None
+        self._sample = []
+
+    def _make_hashing_vectorizer(self):
+        return HashingVectorizer(n_features=self.n_features, alternate_sign=False, norm=None,
+                                 dtype=np.float32, **self.vectorizer_params)
+
+    def _freeze_vocabulary(self):
+        counter = CountVectorizer(max_features=self.max_features, dtype=np.float32, **self.vectorizer_params)
+        sample_counts = counter.fit_transform(self._sample)
+        self.vectorizer = counter
+        self.doc_freq = np.zeros(len(counter.vocabulary_), dtype=np.int64)
+        self._accumulate(sample_counts)
+        self._sample = []
+
+    def _accumulate(self, counts):
+        self.n_docs += counts.shape[0]
+        self.doc_freq += np.bincount(counts.indices, minlength=len(self.doc_freq))
+
+    def partial_fit(self, texts):
+        """
+        Update the document frequencies with a chunk of texts.
+
+        Parameters:
+        texts (iterable): A chunk of text documents.
+
+        Returns:
+        StreamingTextVectorizer: self.
+        """
+        texts = pd.Series(texts).fillna('').astype(str)
+        if self.mode == 'hashing':
+            if self.vectorizer is None:
+                self.vectorizer = self._make_hashing_vectorizer()
+                self.doc_freq = np.zeros(self.n_features, dtype=np.int64)
+            self._accumulate(self.vectorizer.transform(texts))
+        elif self.vectorizer is None:
+            # Buffer documents until the vocabulary sample is complete
+            self._sample.extend(texts.tolist())
+            if len(self._sample) >= self.sample_size:
+                self._freeze_vocabulary()
+        else:
+            self._accumulate(self.vectorizer.transform(texts))
+        self.idf_ = None
+        return self
+
+    def fit(self, chunks, column=None):
+        """
+        Fit the vectorizer with one pass over an iterable of chunks.
+
+        Parameters:
+        chunks (iterable): DataFrames (e.g. from pd.read_sql with chunksize) or sequences of texts.
+        column (str): The column containing text data when the chunks are DataFrames.
+
+        Returns:
+        StreamingTextVectorizer: self.
+        """
+        for chunk in chunks:
+            self.partial_fit(chunk[column] if column is not None else chunk)
+        return self
+
+    def _finalize(self):
+        if self.vectorizer is None:
+            if self.mode == 'hashing':
+                # Hashed features need no fitting; only the IDF depends on partial_fit
+                self.vectorizer = self._make_hashing_vectorizer()
+                self.doc_freq = np.zeros(self.n_features, dtype=np.int64)
+            elif self._sample:
+                self._freeze_vocabulary()
+            else:
+                raise ValueError("The vectorizer has not been fitted.")
+        if self.idf_ is None and self.use_idf:
+            # Smoothed IDF, identical to scikit-learn's TfidfTransformer(smooth_idf=True)
+            self.idf_ = (np.log((1 + self.n_docs) / (1 + self.doc_freq)) + 1).astype(np.float32)
+
+    def transform(self, texts):
+        """
+        Transform a chunk of texts with the frozen vocabulary and IDF.
+
+        Parameters:
+        texts (iterable): A chunk of text documents.
+
+        Returns:
+        scipy.sparse.csr_matrix: float32 count or TF-IDF matrix for the chunk.
+        """
+        self._finalize()
+        texts = pd.Series(texts).fillna('').astype(str)
+        matrix = sparse.csr_matrix(self.vectorizer.transform(texts), dtype=np.float32)
+        if self.use_idf:
+            matrix.data *= self.idf_[matrix.indices]
+        if self.norm:
+            matrix = normalize_rows(matrix, norm=self.norm, copy=False)
+        return matrix
+
+    def transform_chunks(self, chunks, column=None, output_dir=None):
+        """
+        Transform an iterable of chunks, yielding one CSR matrix per chunk.
+
+        Parameters:
+        chunks (iterable): DataFrames or sequences of texts.
+        column (str): The column containing text data when the chunks are DataFrames.
+        output_dir (str): Optional directory; each chunk is also saved as chunk_<n>.npz.
+
+        Yields:
+        scipy.sparse.csr_matrix: float32 matrix for each chunk.
+        """
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        for i, chunk in enumerate(chunks):
+            matrix = self.transform(chunk[column] if column is not None else chunk)
+            if output_dir:
+                sparse.save_npz(os.path.join(output_dir, f'chunk_{i:06d}.npz'), matrix)
+            yield matrix
+
+    def get_feature_names_out(self):
+        """
+        Return the feature names in 'vocabulary' mode; hashed features have no names.
+
+        Returns:
+        np.ndarray: Feature names, or None in 'hashing' mode.
+        """
+        if self.mode == 'hashing':
+            return None
+        self._finalize()
+        return self.vectorizer.get_feature_names_out()
+
+    def save(self, path):
+        """
+        Save the fitted vocabulary and IDF so they can be reused without refitting.
+
+        Parameters:
+        path (str): Destination file.
+        """
+        self._finalize()
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path):
+        """
+        Load a vectorizer saved with save.
+
+        Parameters:
+        path (str): Source file.
+
+        Returns:
+        StreamingTextVectorizer: The fitted vectorizer.
+        """
+        return joblib.load(path)
+
+def streaming_tfidf_vectorization(make_chunks, column=None, vectorizer=None, output_dir=None, **params):
+    """
+    Perform TF-IDF vectorization on a chunked corpus in constant memory.
+    The corpus is read twice: once to accumulate document frequencies and once to transform.
+    A previously fitted vectorizer can be passed to skip the fitting pass.
+
+    Parameters:
+    make_chunks (callable): Returns a fresh iterable of chunks (DataFrames or sequences of texts) on each call.
+    column (str): The column containing text data when the chunks are DataFrames.
+    vectorizer (StreamingTextVectorizer): Optional fitted vectorizer to reuse.
+    output_dir (str): Optional directory to save each chunk's matrix as .npz.
+    **params: Arguments for a new StreamingTextVectorizer (e.g. mode, n_features).
+
+    Returns:
+    generator, StreamingTextVectorizer: Generator of float32 CSR chunks and the fitted vectorizer.
+    """
+    if vectorizer is None:
+        vectorizer = StreamingTextVectorizer(**params)
+        if vectorizer.use_idf or vectorizer.mode == 'vocabulary':
+            vectorizer.fit(make_chunks(), column)
+    return vectorizer.transform_chunks(make_chunks(), column, output_dir), vectorizer
+
+def streaming_count_vectorization(make_chunks, column=None, vectorizer=None, output_dir=None, **params):
+    """
+    Tokenize a chunked corpus into token counts in constant memory.
+    This is the streaming counterpart of tokenize_text_sklearn.
+
+    Parameters:
+    make_chunks (callable): Returns a fresh iterable of chunks (DataFrames or sequences of texts) on each call.
+    column (str): The column containing text data when the chunks are DataFrames.
+    vectorizer (StreamingTextVectorizer): Optional fitted vectorizer to reuse.
+    output_dir (str): Optional directory to save each chunk's matrix as .npz.
+    **params: Arguments for a new StreamingTextVectorizer (e.g. mode, n_features).
+
+    Returns:
+    generator, StreamingTextVectorizer: Generator of float32 CSR chunks and the fitted vectorizer.
+    """
+    params.setdefault('norm', None)
+    params['use_idf'] = False
+    return streaming_tfidf_vectorization(make_chunks, column, vectorizer, output_dir, **params)
+
+# Mersenne prime used for the universal hash family (a * x + b) mod p
+_MINHASH_PRIME = np.uint64((1 << 31) - 1)
+
+# Default signature length and hashing batch of near_duplicate_clusters, also used by the memory governor
+MINHASH_NUM_PERM = 128
+MINHASH_BATCH_SIZE = 1000
+
+def _char_shingles(text, size):
+    """
+    Split a text into overlapping character shingles. Texts shorter than a shingle are one
+    shingle on their own, so that only empty texts have no shingles.
+    """
+    return [text[i:i + size] for i in range(max(len(text) - size + 1, 1))] if text else []
+
+def _minhash_signatures(texts, hash_a, hash_b, shingle_size):
+    """
+    Compute MinHash signatures for a batch of texts over character shingles.
+
+    Parameters:
+    texts (list): Normalized texts.
+    hash_a (np.ndarray): uint64 multipliers, one per permutation.
+    hash_b (np.ndarray): uint64 offsets, one per permutation.
+    shingle_size (int): Length of the character shingles.
+
+    Returns:
+    np.ndarray: uint32 array of shape (len(texts), num_perm). Empty texts get all-max signatures.
+    """
+    shingler = HashingVectorizer(analyzer=partial(_char_shingles, size=shingle_size),
+                                 n_features=int(_MINHASH_PRIME), alternate_sign=False, norm=None, binary=True)
+    shingles = shingler.transform(texts)
+    signatures = np.full((len(texts), len(hash_a)), np.iinfo(np.uint32).max, dtype=np.uint32)
+    has_shingles = np.diff(shingles.indptr) > 0
+    if has_shingles.any():
+        # Hash every shingle under every permutation, then take the per-document minimum
+        x = shingles.indices.astype(np.uint64)[:, None]
+        hashed = (x * hash_a + hash_b) % _MINHASH_PRIME
+        starts = shingles.indptr[:-1][has_shingles]
+        signatures[has_shingles] = np.minimum.reduceat(hashed, starts, axis=0)
+    return signatures
+
+def near_duplicate_clusters(df, column, num_perm=MINHASH_NUM_PERM, bands=32, shingle_size=3, threshold=0.8,
+                            batch_size=MINHASH_BATCH_SIZE, seed=1):
+    """
+    Detect near-duplicate texts using MinHash signatures and LSH banding.
+    Texts are lowercased and stripped of punctuation, split into character shingles and
+    reduced to MinHash signatures in vectorized batches. Rows whose signatures agree on a whole
+    band become candidate pairs, candidates with an estimated Jaccard similarity below
+    `threshold` are discarded, and the remaining pairs are joined into clusters.
+    Candidate generation is linear in the number of rows, so no all-pairs comparison is made.
+
+    Parameters:
+    df (pd.DataFrame): The dataframe.
+    column (str): The column containing text data.
+    num_perm (int): Number of MinHash permutations. Must be divisible by bands.
+    bands (int): Number of LSH bands. More bands find less similar pairs.
+    shingle_size (int): Length of the character shingles.
+    threshold (float): Minimum estimated Jaccard similarity to link a candidate pair. None keeps all candidates.
+    batch_size (int): Number of texts hashed at a time.
+    seed (int): Seed for the hash permutations.
+
+    Returns:
+    pd.DataFrame: Dataframe with an additional column {column}_dup_cluster. Rows sharing a cluster ID are near duplicates;
+    empty texts each get a cluster of their own.
+    """
+    if num_perm % bands:
+        raise ValueError("num_perm must be divisible by bands.")
+    rows_per_band = num_perm // bands
+    rng = np.random.default_rng(seed)
+    hash_a = rng.integers(1, int(_MINHASH_PRIME), size=num_perm, dtype=np.uint64)
+    hash_b = rng.integers(0, int(_MINHASH_PRIME), size=num_perm, dtype=np.uint64)
+
+    texts = df[column].fillna('').astype(str).str.lower()
+    texts = texts.str.replace(f'[{re.escape(string.punctuation)}]', '', regex=True)
+    texts = texts.str.replace(r'\s+', ' ', regex=True).str.strip().tolist()
+    n_rows = len(texts)
+
+    signatures = np.empty((n_rows, num_perm), dtype=np.uint32)
+    for start in range(0, n_rows, batch_size):
+        batch = texts[start:start + batch_size]
+        signatures[start:start + len(batch)] = _minhash_signatures(batch, hash_a, hash_b, shingle_size)
+
+    # Empty texts share the all-max signature but are not duplicates of each other
+    has_text = np.array([bool(text) for text in texts], dtype=bool)
+
+    # Link every row to the first row that shares its bucket in each band
+    sources, targets = [], []
+    for band in range(bands):
+        band_values = signatures[:, band * rows_per_band:(band + 1) * rows_per_band]
+        bucket_keys = pd.util.hash_pandas_object(pd.DataFrame(band_values), index=False).to_numpy()
+        bucket_codes, _ = pd.factorize(bucket_keys)
+        _, first_rows = np.unique(bucket_codes, return_index=True)
+        leaders = first_rows[bucket_codes]
+        is_candidate = (leaders != np.arange(n_rows)) & has_text
+        sources.append(np.flatnonzero(is_candidate))
+        targets.append(leaders[is_candidate])
+    sources = np.concatenate(sources)
+    targets = np.concatenate(targets)
+
+    if threshold is not None and len(sources):
+        similarity = np.empty(len(sources), dtype=np.float32)
+        for start in range(0, len(sources), batch_size):
+            stop = start + batch_size
+            similarity[start:stop] = (signatures[sources[start:stop]] == signatures[targets[start:stop]]).mean(axis=1)
+        keep = similarity >= threshold
+        sources, targets = sources[keep], targets[keep]
+
+    graph = sparse.coo_matrix((np.ones(len(sources), dtype=np.int8), (sources, targets)), shape=(n_rows, n_rows))
+    _, labels = connected_components(graph, directed=False)
+    df[f'{column}_dup_cluster'] = labels
+    return df
@@ -1,5 +1,3 @@
-from sqlalchemy import create_engine
-from sqlalchemy.engine.url import URL
 import logging
 
 # Set up logging
@@ -24,6 +22,10 @@ def get_engine(db_type, host, port, username, password, db_name):
     Raises:
     - ValueError: If the specified database type is unsupported.
     """
+    # SQLAlchemy is imported on first use so the main window opens without loading it
+    from sqlalchemy import create_engine
+    from sqlalchemy.engine.url import URL
+
     # Define URLs for different database types
     db_urls = {
         'sqlite': f'sqlite:///{db_name}.db',
@@ -39,6 +41,9 @@ def get_engine(db_type, host, port, username, password, db_name):
 
     # Create and return the SQLAlchemy engine
     engine = create_engine(db_urls[db_type], pool_size=10, max_overflow=20)
+    # Tables reflected over an earlier connection to this database may have changed since
+    from database.query_builder import clear_reflection_cache
+    clear_reflection_cache(engine)
     return engine
 
 def test_connection(engine):
@@ -1,5 +1,7 @@
+import time
 import pandas as pd
 import logging
+from database.query_profiler import check_query_cost, get_query_history, result_bytes
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -15,12 +17,17 @@ def fetch_data(engine, table_name, chunksize=None):
     - chunksize (int, optional): Number of rows to fetch at a time. If None, fetch all data at once.
 
     Returns:
-    - pd.DataFrame: DataFrame containing the fetched data, or None if an error occurs.
+    - pd.DataFrame: DataFrame containing the fetched data, or None if an error occurs
+      (including a query blocked by the configured cost threshold).
     """
     try:
+        query = f'SELECT * FROM {table_name}'
+        # Preview the cost first when a threshold is configured
+        estimate = check_query_cost(engine, query)
+        started_at = time.time()
+        start = time.perf_counter()
         # Execute the SQL query to fetch data
         with engine.connect() as connection:
-            query = f'SELECT * FROM {table_name}'
             if chunksize:
                 # Fetch data in chunks if chunksize is specified
                 chunks = pd.read_sql(query, connection, chunksize=chunksize)
@@ -28,6 +35,10 @@ def fetch_data(engine, table_name, chunksize=None):
             else:
                 # Fetch all data at once
                 df = pd.read_sql(query, connection)
+        history = get_query_history()
+        if history is not None:
+            history.record(engine, query, started_at=started_at, elapsed=time.perf_counter() - start,
+                           rows=len(df), bytes_decoded=result_bytes(df), estimate=estimate)
         logger.info(f'Successfully fetched data from {table_name}.')
         return df
     except Exception as e:
@@ -35,6 +46,45 @@ def fetch_data(engine, table_name, chunksize=None):
         logger.error(f'Error fetching data from {table_name}: {e}')
         return None
 
+def fetch_data_chunks(engine, table_name, chunksize=100000):
+    """
+    Stream data from the specified table in chunks without materializing the whole table.
+    A server-side cursor is requested so drivers such as psycopg2 do not buffer the full result.
+    
+    Parameters:
+    - engine: A SQLAlchemy engine instance.
+    - table_name (str): The name of the table to fetch data from.
+    - chunksize (int): Number of rows per chunk.
+
+    Yields:
+    - pd.DataFrame: One DataFrame per chunk.
+
+    Raises:
+    - Exception: Errors while streaming are logged and re-raised, so a failed stream is never
+      mistaken for the end of the table.
+    """
+    try:
+        query = f'SELECT * FROM {table_name}'
+        estimate = check_query_cost(engine, query)
+        started_at = time.time()
+        start = time.perf_counter()
+        rows = bytes_decoded = 0
+        with engine.connect() as connection:
+            connection = connection.execution_options(stream_results=True)
+            for chunk in pd.read_sql(query, connection, chunksize=chunksize):
+                rows += len(chunk)
+                bytes_decoded += result_bytes(chunk)
+                yield chunk
+        history = get_query_history()
+        if history is not None:
+            history.record(engine, query, started_at=started_at, elapsed=time.perf_counter() - start,
+                           rows=rows, bytes_decoded=bytes_decoded, estimate=estimate)
+        logger.info(f'Successfully streamed data from {table_name}.')
+    except Exception as e:
+        # Log and re-raise; stopping quietly would hand callers a truncated table
+        logger.error(f'Error streaming data from {table_name}: {e}')
+        raise
+
 def insert_data(engine, table_name, df):
     """
     Insert data into the specified table in the database.
@@ -0,0 +1,282 @@
+import time
+import logging
+import datetime
+import decimal
+import threading
+from collections import OrderedDict
+from sqlalchemy import MetaData, Table, String, select, bindparam, cast, and_
+from sqlalchemy.exc import ProgrammingError
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Comparison operators of the query builder and how they apply to a column and a bound parameter
+OPERATORS = {
+    '=': lambda column, param: column == param,
+    '>': lambda column, param: column > param,
+    '<': lambda column, param: column < param,
+    '>=': lambda column, param: column >= param,
+    '<=': lambda column, param: column <= param,
+    '<>': lambda column, param: column != param,
+    'LIKE': lambda column, param: column.like(param),
+    'IN': lambda column, param: column.in_(param),
+}
+
+STATEMENT_CACHE_SIZE = 128
+# Seconds a reflected table is reused before the database is asked for its columns again
+REFLECTION_TTL = 300
+
+_tables = {}
+_statements = OrderedDict()
+_lock = threading.Lock()
+
+def reflect_table(engine, table_name):
+    """
+    Reflect a table and reuse the result for REFLECTION_TTL seconds per database.
+
+    Parameters:
+    - engine: A SQLAlchemy engine instance.
+    - table_name (str): The table name, optionally qualified as schema.table.
+
+    Returns:
+    - sqlalchemy.Table: The reflected table.
+    """
+    key = (str(engine.url), table_name)
+    with _lock:
+        entry = _tables.get(key)
+        if entry is None or time.monotonic() - entry[0] > REFLECTION_TTL:
+            schema, _, name = table_name.rpartition('.')
+            entry = _tables[key] = (time.monotonic(), Table(name, MetaData(), schema=schema or None,
+                                                            autoload_with=engine))
+            _forget_statements(key)
+        return entry[1]
+
+def _forget_statements(key):
+    # Cached statements are built from a reflected table and go stale with it
+    for statement_key in [statement_key for statement_key in _statements if statement_key[:len(key)] == key]:
+        del _statements[statement_key]
+
+def clear_reflection_cache(engine=None, table_name=None):
+    """
+    Forget reflected tables, and the statements built from them, so the next use reads the
+    columns from the database again. Called whenever a connection is (re)established.
+
+    Parameters:
+    - engine (optional): Only forget the tables of this engine's database. Defaults to every database.
+    - table_name (str, optional): Only forget this table.
+    """
+    with _lock:
+        for key in list(_tables):
+            if (engine is None or key[0] == str(engine.url)) and (table_name is None or key[1] == table_name):
+                del _tables[key]
+                _forget_statements(key)
+
+def retry_on_stale_table(engine, table_name, run):
+    """
+    Call `run`, which uses reflect_table, and retry it once with a fresh reflection if the database
+    rejects the statement with a ProgrammingError, e.g. because a column was dropped or renamed
+    since the table was reflected, or if a column is missing from the reflected table (KeyError),
+    e.g. because it was added since. The error is raised as is when the reflection was already fresh.
+
+    Parameters:
+    - engine: A SQLAlchemy engine instance.
+    - table_name (str): The reflected table.
+    - run (callable): Function without arguments that reflects the table and runs the statement.
+
+    Returns:
+    - The result of `run`.
+    """
+    started = time.monotonic()
+    try:
+        return run()
+    except (ProgrammingError, KeyError):
+        with _lock:
+            entry = _tables.get((str(engine.url), table_name))
+        if entry is None or entry[0] >= started:
+            raise
+        logger.info(f'Reflecting {table_name} again after a failed statement.')
+        clear_reflection_cache(engine, table_name)
+        return run()
+
+def coerce_value(column, value):
+    """
+    Convert a value typed into the query builder to the Python type of the column, so the
+    database compares numbers as numbers and dates as dates.
+
+    Parameters:
+    - column: The SQLAlchemy column.
+    - value (str): The value as entered.
+
+    Returns:
+    - The converted value. Values of columns without a known Python type are returned unchanged.
+    """
+    if not isinstance(value, str):
+        return value
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    value = value.strip()
+    if python_type is bool:
+        return value.lower() in ('1', 'true', 't', 'yes', 'y')
+    if python_type is datetime.datetime:
+        return datetime.datetime.fromisoformat(value)
+    if python_type is datetime.date:
+        return datetime.date.fromisoformat(value)
+    if python_type in (int, float, decimal.Decimal):
+        return python_type(value)
+    return value
+
+def _statement(engine, table_name, fields, conditions):
+    """
+    Build, or fetch from the LRU cache, the statement for one query shape. The shape is the
+    table, the selected fields and the (field, operator) pairs; values are bound parameters,
+    so the same statement and database plan serve every run with different values.
+    """
+    key = (str(engine.url), table_name, tuple(fields), tuple(conditions))
+    with _lock:
+        if key in _statements:
+            _statements.move_to_end(key)
+            return _statements[key]
+
+    table = reflect_table(engine, table_name)
+    unknown = [field for field in list(fields) + [field for field, _ in conditions] if field not in table.c]
+    if unknown:
+        # The columns may have been added since the table was reflected
+        clear_reflection_cache(engine, table_name)
+        table = reflect_table(engine, table_name)
+        unknown = [field for field in unknown if field not in table.c]
+    if unknown:
+        raise ValueError(f"Unknown columns for table {table_name}: {', '.join(unknown)}")
+    statement = select(*[table.c[field] for field in fields]) if fields else select(table)
+    clauses = []
+    for position, (field, operator) in enumerate(conditions):
+        column = table.c[field]
+        if operator == 'LIKE':
+            # A pattern is a string whatever the column type, e.g. '%5%' on an integer or '2024-%' on a date
+            param = bindparam(f'p{position}', type_=String())
+            column = column if isinstance(column.type, String) else cast(column, String)
+        else:
+            param = bindparam(f'p{position}', type_=column.type, expanding=operator == 'IN')
+        clauses.append(OPERATORS[operator](column, param))
+    if clauses:
+        statement = statement.where(and_(*clauses))
+
+    with _lock:
+        _statements[key] = statement
+        if len(_statements) > STATEMENT_CACHE_SIZE:
+            _statements.popitem(last=False)
+    return statement
+
+def compile_query(engine, query):
+    """
+    Compile a query builder UQL dictionary into a parameterized SQLAlchemy Core select().
+
+    Parameters:
+    - engine: A SQLAlchemy engine instance.
+    - query (dict): {'select': [fields], 'from': table name, 'where': [{'field', 'operator', 'value'}]}.
+      An empty select list or '*' selects every column. IN values are comma separated.
+
+    Returns:
+    - tuple: (statement, params) ready for connection.execute(statement, params).
+
+    Raises:
+    - ValueError: If a field does not exist or an operator is not supported.
+    """
+    fields = [field.strip() for field in query.get('select', []) if field.strip() and field.strip() != '*']
+    conditions = [cond for cond in query.get('where', []) if cond.get('field', '').strip()]
+    for cond in conditions:
+        if cond['operator'] not in OPERATORS:
+            raise ValueError(f"Unsupported operator: {cond['operator']}")
+    table_name = query['from'].strip()
+    statement = _statement(engine, table_name, fields,
+                           [(cond['field'].strip(), cond['operator']) for cond in conditions])
+
+    table = reflect_table(engine, table_name)
+    params = {}
+    for position, cond in enumerate(conditions):
+        column = table.c[cond['field'].strip()]
+        value = cond['value']
+        if cond['operator'] == 'IN':
+            values = value.split(',') if isinstance(value, str) else list(value)
+            params[f'p{position}'] = [coerce_value(column, item) for item in values]
+        elif cond['operator'] == 'LIKE':
+            params[f'p{position}'] = value
+        else:
+            params[f'p{position}'] = coerce_value(column, value)
+    return statement, params
+
+class QueryResultCache:
+    """
+    Local LRU cache of query results with a time-to-live.
+
+    Entries are keyed by the database, the SQL text compiled for the engine's dialect and the
+    normalized bound parameters, so repeating an exploratory query is answered without a round
+    trip to the database. Results larger than `max_rows` are not cached.
+    """
+
+    def __init__(self, max_entries=32, ttl=300, max_rows=200000):
+        """
+        Parameters:
+        - max_entries (int): Maximum number of cached results.
+        - ttl (float): Seconds a result stays valid.
+        - max_rows (int): Largest result, in rows, that is cached.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(engine, statement, params=None):
+        """
+        Build the cache key of a query.
+
+        Parameters:
+        - engine: A SQLAlchemy engine instance.
+        - statement: SQL string or SQLAlchemy executable.
+        - params (dict, optional): Bound parameters.
+
+        Returns:
+        - tuple: A hashable key.
+        """
+        sql = statement if isinstance(statement, str) else str(statement.compile(dialect=engine.dialect))
+        normalized_sql = ' '.join(sql.split())
+        normalized_params = tuple(sorted((name, repr(value)) for name, value in (params or {}).items()))
+        return str(engine.url), normalized_sql, normalized_params
+
+    def get(self, key):
+        """
+        Return a cached result, or None if it is missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, result = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return result
+
+    def put(self, key, result):
+        """
+        Store a result, evicting the least recently used entries beyond max_entries.
+        """
+        if len(result) > self.max_rows:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+# Result cache shared by all query builder dialogs
+result_cache = QueryResultCache()
@@ -0,0 +1,285 @@
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import logging
+import threading
+from contextlib import closing
+import xml.etree.ElementTree as ET
+import pandas as pd
+from sqlalchemy import text
+from config import config  # Import the shared config dictionary
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class QueryCostExceeded(Exception):
+    """
+    Raised when a query's estimated cost is above the configured threshold.
+    """
+
+def _compile(engine, statement, params=None):
+    """
+    Render a statement to SQL for the engine's dialect together with its driver parameters.
+    """
+    statement = text(statement) if isinstance(statement, str) else statement
+    if params:
+        statement = statement.params(**params)
+    compiled = statement.compile(dialect=engine.dialect, compile_kwargs={'render_postcompile': True})
+    if compiled.positional:
+        return str(compiled), tuple(compiled.params[name] for name in compiled.positiontup)
+    return str(compiled), dict(compiled.params)
+
+def _walk(node):
+    """
+    Yield every dictionary in a nested JSON plan.
+    """
+    if isinstance(node, dict):
+        yield node
+        for value in node.values():
+            yield from _walk(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _walk(item)
+
+def _explain_postgresql(connection, sql, params):
+    raw = connection.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {sql}', params).scalar()
+    plan = json.loads(raw) if isinstance(raw, str) else raw
+    root = plan[0]['Plan']
+    full_scans = [node.get('Relation Name', '') for node in _walk(plan) if node.get('Node Type') == 'Seq Scan']
+    return root.get('Plan Rows'), root.get('Total Cost'), full_scans, json.dumps(plan)
+
+def _explain_mysql(connection, sql, params):
+    raw = connection.exec_driver_sql(f'EXPLAIN FORMAT=JSON {sql}', params).scalar()
+    plan = json.loads(raw)
+    cost = plan.get('query_block', {}).get('cost_info', {}).get('query_cost')
+    nodes = list(_walk(plan))
+    rows = [node['rows_examined_per_scan'] for node in nodes if 'rows_examined_per_scan' in node]
+    full_scans = [node.get('table_name', '') for node in nodes if node.get('access_type') == 'ALL']
+    return (max(rows) if rows else None), (float(cost) if cost is not None else None), full_scans, raw
+
+def _explain_sqlite(connection, sql, params):
+    details = [row[-1] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}', params)]
+    # 'SCAN t USING (COVERING) INDEX i' walks an index, so only plain SCAN lines are full table scans
+    full_scans = [match.group(1) for match, detail in
+                  ((re.match(r'SCAN (?:TABLE )?(\w+)', detail), detail) for detail in details)
+                  if match and 'INDEX' not in detail]
+    # SQLite has no row estimates in its plan; use the ANALYZE statistics of scanned tables when present
+    rows = None
+    has_stats = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'").first()
+    if has_stats and full_scans:
+        counts = [connection.exec_driver_sql('SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1', (table,)).scalar()
+                  for table in full_scans]
+        counts = [int(count.split()[0]) for count in counts if count]
+        rows = max(counts) if counts else None
+    return rows, None, full_scans, '\n'.join(details)
+
+def _explain_mssql(connection, sql, params):
+    connection.exec_driver_sql('SET SHOWPLAN_XML ON')
+    try:
+        raw = connection.exec_driver_sql(sql, params).scalar()
+    finally:
+        connection.exec_driver_sql('SET SHOWPLAN_XML OFF')
+    root = ET.fromstring(raw)
+    statements = [element for element in root.iter() if element.tag.endswith('StmtSimple')]
+    rows = max((float(element.get('StatementEstRows', 0)) for element in statements), default=None)
+    cost = max((float(element.get('StatementSubTreeCost', 0)) for element in statements), default=None)
+    full_scans = []
+    for element in root.iter():
+        if element.tag.endswith('RelOp') and element.get('PhysicalOp') in ('Table Scan', 'Clustered Index Scan'):
+            # Scans are leaf operators; the Object element below them names the table, e.g. Table="[items]"
+            table = next((child.get('Table') for child in element.iter() if child.tag.endswith('Object')), None)
+            if table:
+                full_scans.append(table.strip('[]'))
+    return rows, cost, full_scans, raw
+
+EXPLAINERS = {
+    'postgresql': _explain_postgresql,
+    'mysql': _explain_mysql,
+    'sqlite': _explain_sqlite,
+    'mssql': _explain_mssql,
+}
+
+def explain_query(engine, statement, params=None):
+    """
+    Estimate the cost of a query with the dialect's EXPLAIN, without running it.
+
+    Parameters:
+    - engine: A SQLAlchemy engine instance.
+    - statement: SQL string or SQLAlchemy executable.
+    - params (dict, optional): Bound parameters.
+
+    Returns:
+    - dict: 'estimated_rows' and 'estimated_cost' (None when the database does not report them),
+      'full_scans' (tables read in full) and the raw 'plan'; None if the dialect is unsupported.
+    """
+    explainer = EXPLAINERS.get(engine.dialect.name)
+    if explainer is None:
+        logger.info(f'Cost preview is not supported for {engine.dialect.name}.')
+        return None
+    sql, driver_params = _compile(engine, statement, params)
+    with engine.connect() as connection:
+        rows, cost, full_scans, plan = explainer(connection, sql, driver_params)
+    return {'estimated_rows': rows, 'estimated_cost': cost, 'full_scans': full_scans, 'plan': plan}
+
+def check_query_cost(engine, statement, params=None, max_rows=None, max_cost=None, action=None):
+    """
+    Preview a query's cost and warn or block when it is above a threshold.
+    Thresholds default to config['query_max_estimated_rows'], config['query_max_estimated_cost']
+    and config['query_cost_action'] ('warn' or 'block'). Without a threshold nothing is run.
+
+    Parameters:
+    - engine: A SQLAlchemy engine instance.
+    - statement: SQL string or SQLAlchemy executable.
+    - params (dict, optional): Bound parameters.
+    - max_rows (float, optional): Largest acceptable estimated row count.
+    - max_cost (float, optional): Largest acceptable estimated cost, in the database's cost units.
+    - action (str, optional): 'warn' to log a warning, 'block' to raise QueryCostExceeded.
+
+    Returns:
+    - dict: The estimate from explain_query, or None if no threshold is set or the dialect is unsupported.
+
+    Raises:
+    - QueryCostExceeded: If the estimate is above a threshold and action is 'block'.
+    """
+    max_rows = max_rows if max_rows is not None else config.get('query_max_estimated_rows')
+    max_cost = max_cost if max_cost is not None else config.get('query_max_estimated_cost')
+    action = action or config.get('query_cost_action', 'warn')
+    if max_rows is None and max_cost is None:
+        return None
+
+    estimate = explain_query(engine, statement, params)
+    if estimate is None:
+        return None
+    problems = []
+    if max_rows is not None and estimate['estimated_rows'] is not None and estimate['estimated_rows'] > max_rows:
+        problems.append(f"an estimated {estimate['estimated_rows']:,.0f} rows (limit {max_rows:,.0f})")
+    if max_cost is not None and estimate['estimated_cost'] is not None and estimate['estimated_cost'] > max_cost:
+        problems.append(f"an estimated cost of {estimate['estimated_cost']:,.1f} (limit {max_cost:,.1f})")
+    estimate['exceeded'] = bool(problems)
+    if problems:
+        message = 'Query would read ' + ' and '.join(problems)
+        if estimate['full_scans']:
+            message += f" with full scans of {', '.join(estimate['full_scans'])}"
+        if action == 'block':
+            raise QueryCostExceeded(message)
+        logger.warning(message)
+    return estimate
+
+def default_history_path():
+    """
+    Location of the query history in the per-user data directory: %LOCALAPPDATA% on Windows,
+    ~/Library/Application Support on macOS and $XDG_DATA_HOME (~/.local/share) elsewhere.
+
+    Returns:
+    - str: Path of query_history.db; its directory is created if needed.
+    """
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~\\AppData\\Local')
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Application Support')
+    else:
+        base = os.environ.get('XDG_DATA_HOME') or os.path.expanduser('~/.local/share')
+    directory = os.path.join(base, 'data_cleaning_app')
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, 'query_history.db')
+
+class QueryHistory:
+    """
+    Queryable log of executed queries in a local SQLite database: when each query ran, how long
+    it took, how many rows and decoded bytes it returned, and its cost estimate when one was made.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_history_path()
+        self._lock = threading.Lock()
+        # sqlite3's connection context manager only commits, so closing() closes the connection
+        with closing(sqlite3.connect(self.path)) as connection, connection:
+            connection.execute('''CREATE TABLE IF NOT EXISTS query_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at REAL NOT NULL,
+                database TEXT,
+                sql TEXT NOT NULL,
+                params TEXT,
+                status TEXT NOT NULL,
+                elapsed_seconds REAL,
+                rows_fetched INTEGER,
+                bytes_decoded INTEGER,
+                estimated_rows REAL,
+                estimated_cost REAL)''')
+
+    def record(self, engine, statement, params=None, started_at=None, status='ok', elapsed=None, rows=None,
+               bytes_decoded=None, estimate=None):
+        """
+        Record one query execution.
+
+        Parameters:
+        - engine: The SQLAlchemy engine the query ran on.
+        - statement: SQL string or SQLAlchemy executable.
+        - params (dict, optional): Bound parameters.
+        - started_at (float, optional): Unix time the query started. Defaults to now.
+        - status (str): 'ok', 'cancelled' or 'error'.
+        - elapsed (float, optional): Execution time in seconds.
+        - rows (int, optional): Rows fetched.
+        - bytes_decoded (int, optional): Bytes of the decoded result.
+        - estimate (dict, optional): Result of explain_query.
+        """
+        sql = statement if isinstance(statement, str) else str(statement.compile(dialect=engine.dialect))
+        values = (started_at or time.time(), engine.url.render_as_string(hide_password=True), sql,
+                  json.dumps(params or {}, default=str), status, elapsed, rows, bytes_decoded,
+                  (estimate or {}).get('estimated_rows'), (estimate or {}).get('estimated_cost'))
+        try:
+            with self._lock, closing(sqlite3.connect(self.path)) as connection, connection:
+                connection.execute('''INSERT INTO query_history (started_at, database, sql, params, status,
+                    elapsed_seconds, rows_fetched, bytes_decoded, estimated_rows, estimated_cost)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', values)
+        except sqlite3.Error as e:
+            logger.error(f'Error recording query history: {e}')
+
+    def query(self, sql='SELECT * FROM query_history ORDER BY started_at DESC LIMIT 100', params=()):
+        """
+        Run a query against the history, e.g. the slowest queries of the day.
+
+        Parameters:
+        - sql (str): A SQLite query over the query_history table.
+        - params (tuple): Parameters for the query.
+
+        Returns:
+        - pd.DataFrame: The matching history rows.
+        """
+        with closing(sqlite3.connect(self.path)) as connection:
+            return pd.read_sql_query(sql, connection, params=params)
+
+_history = None
+
+def get_query_history():
+    """
+    Return the shared query history stored at config['query_history_path'], by default in the
+    per-user data directory (see default_history_path). Set the path to None in the config to disable recording.
+
+    Returns:
+    - QueryHistory: The shared history, or None if recording is disabled.
+    """
+    global _history
+    if 'query_history_path' in config and config['query_history_path'] is None:
+        return None
+    path = config.get('query_history_path') or default_history_path()
+    if _history is None or _history.path != path:
+        _history = QueryHistory(path)
+    return _history
+
+def result_bytes(df):
+    """
+    Bytes of a decoded result page, counting the contents of string columns.
+
+    Parameters:
+    - df (pd.DataFrame): The result page.
+
+    Returns:
+    - int: Size in bytes.
+    """
+    return int(df.memory_usage(deep=True, index=False).sum())
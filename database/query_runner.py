@@ -0,0 +1,146 @@
+import time
+import logging
+import threading
+import pandas as pd
+from sqlalchemy import text
+from database.query_profiler import result_bytes
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Statement returning the server-side id of the current session, per dialect
+SESSION_ID_QUERIES = {
+    'postgresql': 'SELECT pg_backend_pid()',
+    'mysql': 'SELECT CONNECTION_ID()',
+    'mssql': 'SELECT @@SPID',
+}
+
+class QueryCancelled(Exception):
+    """
+    Raised when a running query is cancelled.
+    """
+
+class QueryRunner:
+    """
+    Runs one query on a server-side cursor and returns its result page by page.
+
+    The query is executed with stream_results, so the driver keeps the result on the server and
+    each page is pulled with fetchmany; the first page is available as soon as the database
+    produces it. cancel() may be called from another thread: it stops paging and asks the
+    server to abort the running statement (pg_cancel_backend via the driver, KILL QUERY on MySQL,
+    KILL on SQL Server, interrupt() on SQLite).
+    """
+
+    def __init__(self, engine, query, params=None, page_size=1000, history=None, estimate=None):
+        """
+        Parameters:
+        - engine: A SQLAlchemy engine instance.
+        - query: SQL string or SQLAlchemy executable.
+        - params (dict, optional): Bound parameters for the query.
+        - page_size (int): Number of rows per page.
+        - history (QueryHistory, optional): History the execution is recorded in.
+        - estimate (dict, optional): Cost estimate of the query, stored with the history entry.
+        """
+        self.engine = engine
+        self.statement = query
+        self.query = text(query) if isinstance(query, str) else query
+        self.params = params or {}
+        self.page_size = page_size
+        self.history = history
+        self.estimate = estimate
+        self.rows_fetched = 0
+        self.bytes_fetched = 0
+        self.first_page_seconds = None
+        self.elapsed = 0.0
+        self._cancelled = threading.Event()
+        self._dbapi_connection = None
+        self._session_id = None
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def pages(self):
+        """
+        Execute the query and yield its result in pages.
+
+        Yields:
+        - pd.DataFrame: One DataFrame of at most page_size rows per page.
+
+        Raises:
+        - QueryCancelled: If the query is cancelled while running.
+        """
+        started_at = time.time()
+        start = time.perf_counter()
+        status = 'error'
+        try:
+            with self.engine.connect() as connection:
+                dialect = self.engine.dialect.name
+                if dialect in SESSION_ID_QUERIES:
+                    self._session_id = connection.execute(text(SESSION_ID_QUERIES[dialect])).scalar()
+                self._dbapi_connection = connection.connection.dbapi_connection
+                if self.cancelled:
+                    raise QueryCancelled()
+
+                result = connection.execution_options(stream_results=True).execute(self.query, self.params)
+                columns = list(result.keys())
+                while not self.cancelled:
+                    rows = result.fetchmany(self.page_size)
+                    if not rows:
+                        break
+                    page = pd.DataFrame(rows, columns=columns)
+                    self.rows_fetched += len(rows)
+                    self.bytes_fetched += result_bytes(page)
+                    self.elapsed = time.perf_counter() - start
+                    if self.first_page_seconds is None:
+                        self.first_page_seconds = self.elapsed
+                    # A consumer that stops early after a complete page still counts as a successful run
+                    status = 'ok'
+                    yield page
+                    status = 'error'
+                result.close()
+            if self.cancelled:
+                raise QueryCancelled()
+            status = 'ok'
+        except Exception:
+            # The driver reports a server-side cancel as an ordinary database error
+            if self.cancelled:
+                status = 'cancelled'
+                raise QueryCancelled()
+            raise
+        finally:
+            self._dbapi_connection = None
+            self.elapsed = time.perf_counter() - start
+            if self.cancelled:
+                status = 'cancelled'
+            if self.history is not None:
+                self.history.record(self.engine, self.statement, self.params, started_at=started_at, status=status,
+                                    elapsed=self.elapsed, rows=self.rows_fetched, bytes_decoded=self.bytes_fetched,
+                                    estimate=self.estimate)
+        logger.info(f'Query returned {self.rows_fetched} rows in {self.elapsed:.2f}s.')
+
+    def cancel(self):
+        """
+        Stop paging and ask the server to abort the running statement. Safe to call from any thread.
+        """
+        self._cancelled.set()
+        dbapi_connection = self._dbapi_connection
+        if dbapi_connection is None:
+            return
+        dialect = self.engine.dialect.name
+        try:
+            if dialect == 'sqlite':
+                dbapi_connection.interrupt()
+            elif hasattr(dbapi_connection, 'cancel'):
+                # psycopg2/psycopg and cx_Oracle/oracledb send an out-of-band cancel request
+                dbapi_connection.cancel()
+            elif dialect == 'mysql' and self._session_id is not None:
+                with self.engine.connect() as connection:
+                    connection.execute(text(f'KILL QUERY {int(self._session_id)}'))
+            elif dialect == 'mssql' and self._session_id is not None:
+                with self.engine.connect() as connection:
+                    connection.execute(text(f'KILL {int(self._session_id)}'))
+            logger.info('Sent server-side cancel for the running query.')
+        except Exception as e:
+            logger.error(f'Error cancelling query: {e}')
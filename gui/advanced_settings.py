@@ -1,17 +1,36 @@
 from PySide6.QtWidgets import QDialog, QVBoxLayout, QLabel, QLineEdit, QPushButton, QFormLayout, QTextEdit, QMessageBox
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
 import json
 from config import config  # Import the shared config dictionary
 
-# Placeholder for CustomModel. This should be replaced by user-defined code.
-class CustomModel:
-    def fit(self, X, y=None):
-        pass
+class ValidationSignals(QObject):
+    """
+    Signals emitted by a ValidationWorker. They are delivered on the GUI thread through queued connections.
+    """
+    finished = Signal()
+    error = Signal(str)
 
-    def predict(self, X):
-        pass
+class ValidationWorker(QRunnable):
+    """
+    Validates custom model code on a QThreadPool thread, so the dialog stays responsive while the
+    worker process starts and runs.
+    """
 
-    def set_params(self, **params):
-        pass
+    def __init__(self, code, params, memory_limit_mb=None):
+        super().__init__()
+        self.code = code
+        self.params = params
+        self.memory_limit_mb = memory_limit_mb
+        self.signals = ValidationSignals()
+
+    def run(self):
+        from data_cleaning.custom_model_runner import validate_custom_model, CustomModelError
+        try:
+            validate_custom_model(self.code, self.params, memory_limit_mb=self.memory_limit_mb)
+        except CustomModelError as e:
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.finished.emit()
 
 class AdvancedSettingsDialog(QDialog):
     def __init__(self, parent=None):
@@ -30,6 +49,16 @@ class AdvancedSettingsDialog(QDialog):
         self.param_input = QLineEdit()
         form_layout.addRow(self.param_label, self.param_input)
         
+        self.batch_size_input = QLineEdit(str(config.get('custom_model_batch_size', 50000)))
+        form_layout.addRow(QLabel('Batch Size (rows):'), self.batch_size_input)
+        
+        self.timeout_input = QLineEdit(str(config.get('custom_model_timeout', 600)))
+        form_layout.addRow(QLabel('Timeout per Batch (seconds):'), self.timeout_input)
+        
+        self.memory_limit_input = QLineEdit(str(config.get('custom_model_memory_mb') or ''))
+        self.memory_limit_input.setPlaceholderText('No limit')
+        form_layout.addRow(QLabel('Memory Limit per Worker (MB):'), self.memory_limit_input)
+        
         layout.addLayout(form_layout)
         
         self.save_button = QPushButton('Save Settings')
@@ -38,6 +67,7 @@ class AdvancedSettingsDialog(QDialog):
         layout.addWidget(self.save_button)
         
         self.setLayout(layout)
+        self.validation_worker = None
         
     def save_settings(self):
         custom_model_code = self.model_input.toPlainText()  # Get text from QTextEdit
@@ -45,19 +75,49 @@ class AdvancedSettingsDialog(QDialog):
         
         try:
             model_parameters = json.loads(model_parameters_json)
-            # Validate and store the custom model and parameters
-            exec(custom_model_code)
-            custom_model = CustomModel()
-            custom_model.set_params(**model_parameters)
-            
-            # Store the custom model and parameters in a configuration object
-            config['custom_model'] = custom_model
-            config['custom_model_code'] = custom_model_code
-            config['model_parameters'] = model_parameters
-            
-            QMessageBox.information(self, 'Settings Saved', 'Your advanced settings have been saved successfully.')
-            self.accept()
+            batch_size = int(self.batch_size_input.text())
+            timeout = float(self.timeout_input.text())
+            memory_limit_mb = int(self.memory_limit_input.text()) if self.memory_limit_input.text().strip() else None
         except json.JSONDecodeError:
             QMessageBox.critical(self, 'Error', 'Invalid JSON format for model parameters.')
-        except Exception as e:
+            return
+        except ValueError:
+            QMessageBox.critical(self, 'Error', 'Batch size, timeout and memory limit must be numbers.')
+            return
+        if batch_size <= 0 or timeout <= 0 or (memory_limit_mb is not None and memory_limit_mb <= 0):
+            QMessageBox.critical(self, 'Error', 'Batch size, timeout and memory limit must be positive.')
+            return
+        
+        try:
+            compile(custom_model_code, '<custom_model>', 'exec')
+        except SyntaxError as e:
             QMessageBox.critical(self, 'Error', f'Error in custom model code: {e}')
+            return
+        
+        settings = {
+            'custom_model_code': custom_model_code,
+            'model_parameters': model_parameters,
+            'custom_model_batch_size': batch_size,
+            'custom_model_timeout': timeout,
+            'custom_model_memory_mb': memory_limit_mb,
+        }
+        # The code is validated in a worker process, never in the GUI process, and waited for off the GUI thread
+        self.save_button.setEnabled(False)
+        self.save_button.setText('Validating...')
+        self.validation_worker = ValidationWorker(custom_model_code, model_parameters, memory_limit_mb)
+        self.validation_worker.signals.finished.connect(lambda: self.on_validated(settings))
+        self.validation_worker.signals.error.connect(self.on_validation_error)
+        QThreadPool.globalInstance().start(self.validation_worker)
+    
+    def on_validated(self, settings):
+        # Store the custom model code and runner settings in the shared configuration object
+        config.update(settings)
+        self.validation_worker = None
+        QMessageBox.information(self, 'Settings Saved', 'Your advanced settings have been saved successfully.')
+        self.accept()
+    
+    def on_validation_error(self, message):
+        self.validation_worker = None
+        self.save_button.setEnabled(True)
+        self.save_button.setText('Save Settings')
+        QMessageBox.critical(self, 'Error', f'Error in custom model code: {message}')
@@ -0,0 +1,154 @@
+import functools
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, func, case, cast, literal, desc, Integer
+
+# A database table used as a plot source; aggregations on it run in the database
+TableSource = namedtuple('TableSource', ['engine', 'table_name'])
+
+def _table(source):
+    from database.query_builder import reflect_table
+    return reflect_table(source.engine, source.table_name)
+
+def _refreshing(aggregate):
+    # Run a pushed-down aggregation again with a fresh reflection if the table changed since it was reflected
+    @functools.wraps(aggregate)
+    def wrapper(source, *args, **kwargs):
+        if isinstance(source, pd.DataFrame):
+            return aggregate(source, *args, **kwargs)
+        from database.query_builder import retry_on_stale_table
+        return retry_on_stale_table(source.engine, source.table_name, lambda: aggregate(source, *args, **kwargs))
+    return wrapper
+
+def _finite(values):
+    values = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=np.float64)
+    return values[np.isfinite(values)]
+
+def _numeric_bounds(source, column):
+    table = _table(source)
+    with source.engine.connect() as connection:
+        row = connection.execute(select(func.min(table.c[column]), func.max(table.c[column]),
+                                        func.count(table.c[column]))).one()
+    return row[0], row[1], row[2]
+
+@_refreshing
+def histogram_bins(source, column, bins=50):
+    """
+    Count the values of a column in equal-width bins.
+    DataFrames are binned with NumPy; a TableSource is binned in the database with GROUP BY
+    (width_bucket on PostgreSQL), so only the bin counts are transferred.
+
+    Parameters:
+    - source (pd.DataFrame or TableSource): The data.
+    - column (str): The column to bin.
+    - bins (int): Number of bins.
+
+    Returns:
+    - tuple: (counts, edges) as NumPy arrays, with len(edges) == len(counts) + 1.
+    """
+    if isinstance(source, pd.DataFrame):
+        return np.histogram(_finite(source[column]), bins=bins)
+
+    low, high, count = _numeric_bounds(source, column)
+    if not count:
+        return np.zeros(bins, dtype=np.int64), np.linspace(0, 1, bins + 1)
+    low, high = float(low), float(high)
+    edges = np.linspace(low, high, bins + 1) if high > low else np.linspace(low - 0.5, low + 0.5, bins + 1)
+    table = _table(source)
+    value = table.c[column]
+    if source.engine.dialect.name == 'postgresql':
+        # width_bucket puts the maximum into bucket bins + 1; fold it into the last bin like NumPy
+        bucket = func.least(func.width_bucket(value, edges[0], edges[-1], bins), bins) - 1
+    else:
+        width = (edges[-1] - edges[0]) / bins
+        offset = (value - edges[0]) / width
+        # The offset is never negative, so truncation is floor; SQLite has no floor() without its math extension
+        floor = cast(offset, Integer) if source.engine.dialect.name == 'sqlite' else func.floor(offset)
+        # Values just below the maximum can round up to bucket bins; clamp them into the last bin like NumPy
+        bucket = case((floor >= bins - 1, literal(bins - 1)), else_=floor)
+    bucket = bucket.label('bucket')
+    statement = select(bucket, func.count().label('n')).where(value.is_not(None)).group_by(bucket)
+    counts = np.zeros(bins, dtype=np.int64)
+    with source.engine.connect() as connection:
+        for index, n in connection.execute(statement):
+            counts[int(index)] = n
+    return counts, edges
+
+def _summary_from_quantiles(minimum, q1, median, q3, maximum, count):
+    iqr = q3 - q1
+    return {'min': minimum, 'q1': q1, 'median': median, 'q3': q3, 'max': maximum, 'count': count,
+            'lower_fence': max(minimum, q1 - 1.5 * iqr), 'upper_fence': min(maximum, q3 + 1.5 * iqr)}
+
+@_refreshing
+def five_number_summary(source, column, approximation_bins=2048):
+    """
+    Compute the box-plot summary of a column: minimum, quartiles, maximum and 1.5 IQR whisker fences.
+    DataFrames are summarized exactly with NumPy. On PostgreSQL and Oracle the quartiles are
+    computed in the database with percentile_cont; on other databases they are interpolated
+    from a fine histogram pushed down with GROUP BY, while the minimum and maximum stay exact.
+
+    Parameters:
+    - source (pd.DataFrame or TableSource): The data.
+    - column (str): The column to summarize.
+    - approximation_bins (int): Histogram resolution used when the database has no percentile function.
+
+    Returns:
+    - dict: 'min', 'q1', 'median', 'q3', 'max', 'count', 'lower_fence' and 'upper_fence'.
+    """
+    if isinstance(source, pd.DataFrame):
+        values = _finite(source[column])
+        if not len(values):
+            return None
+        q1, median, q3 = np.percentile(values, [25, 50, 75])
+        return _summary_from_quantiles(values.min(), q1, median, q3, values.max(), len(values))
+
+    if source.engine.dialect.name in ('postgresql', 'oracle'):
+        table = _table(source)
+        value = table.c[column]
+        statement = select(func.min(value), *[func.percentile_cont(q).within_group(value) for q in (0.25, 0.5, 0.75)],
+                           func.max(value), func.count(value))
+        with source.engine.connect() as connection:
+            row = connection.execute(statement).one()
+        if not row[-1]:
+            return None
+        return _summary_from_quantiles(*[float(item) for item in row[:-1]], row[-1])
+
+    counts, edges = histogram_bins(source, column, approximation_bins)
+    total = counts.sum()
+    if not total:
+        return None
+    # Interpolate each quantile linearly inside the bin that contains it
+    cumulative = np.concatenate([[0], np.cumsum(counts)])
+    q1, median, q3 = np.interp([0.25 * total, 0.5 * total, 0.75 * total], cumulative, edges)
+    return _summary_from_quantiles(edges[0], q1, median, q3, edges[-1], int(total))
+
+@_refreshing
+def grouped_totals(source, x_col, y_col, agg='sum', top_n=50):
+    """
+    Aggregate y per category of x for a bar chart, keeping the top_n largest groups.
+    DataFrames are grouped with pandas; a TableSource is grouped in the database with GROUP BY.
+
+    Parameters:
+    - source (pd.DataFrame or TableSource): The data.
+    - x_col (str): The category column.
+    - y_col (str): The value column.
+    - agg (str): 'sum', 'mean', 'count', 'min' or 'max'.
+    - top_n (int): Number of groups to keep.
+
+    Returns:
+    - pd.DataFrame: Columns x_col and y_col, largest groups first.
+    """
+    if agg not in ('sum', 'mean', 'count', 'min', 'max'):
+        raise ValueError(f"Unsupported aggregation: {agg}")
+    if isinstance(source, pd.DataFrame):
+        totals = source.groupby(x_col, observed=True, sort=False)[y_col].agg(agg)
+        return totals.nlargest(top_n).rename(y_col).reset_index()
+
+    table = _table(source)
+    aggregate = {'sum': func.sum, 'mean': func.avg, 'count': func.count, 'min': func.min, 'max': func.max}[agg]
+    total = aggregate(table.c[y_col]).label(y_col)
+    statement = (select(table.c[x_col], total).group_by(table.c[x_col])
+                 .order_by(desc(total)).limit(top_n))
+    with source.engine.connect() as connection:
+        return pd.DataFrame(connection.execute(statement).fetchall(), columns=[x_col, y_col])
@@ -0,0 +1,55 @@
+import threading
+from PySide6.QtCore import QObject, QRunnable, Signal
+from data_cleaning.pipeline import run_pipeline, PipelineCancelled
+from data_cleaning.memory_governor import run_planned
+
+class WorkerSignals(QObject):
+    """
+    Signals emitted by a CleaningWorker. They are delivered on the GUI thread through queued connections.
+    """
+    progress = Signal(str, int, int, float)  # step name, step index, step count, fraction of the step done
+    step_finished = Signal(str, float)  # step name, seconds
+    finished = Signal(object)  # the cleaned dataframe, passed by reference
+    error = Signal(str)
+    cancelled = Signal()
+
+class CleaningWorker(QRunnable):
+    """
+    Runs a cleaning pipeline on a QThreadPool thread so the GUI stays responsive.
+    """
+
+    def __init__(self, df, steps, chunk_size=50000, plan=None):
+        super().__init__()
+        self.df = df
+        self.steps = steps
+        self.chunk_size = chunk_size
+        self.plan = plan
+        self.signals = WorkerSignals()
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        """
+        Request cancellation; the pipeline stops at the next step or chunk boundary.
+        """
+        self.cancel_event.set()
+
+    def run(self):
+        try:
+            if self.plan is not None:
+                # Each step runs in memory, chunked or in two passes as chosen by the memory governor
+                df, _ = run_planned(self.df, self.steps, self.plan,
+                                    progress_callback=self.signals.progress.emit,
+                                    step_callback=self.signals.step_finished.emit, cancel_event=self.cancel_event)
+            else:
+                df, _ = run_pipeline(self.df, self.steps, progress_callback=self.signals.progress.emit,
+                                     step_callback=self.signals.step_finished.emit, cancel_event=self.cancel_event,
+                                     chunk_size=self.chunk_size)
+        except PipelineCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.finished.emit(df)
+        finally:
+            # Drop the worker's reference so the receiver holds the only one
+            self.df = None
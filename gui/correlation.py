@@ -0,0 +1,157 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+class CorrelationAccumulator:
+    """
+    Pairwise-complete Pearson correlation from running sums, updated chunk by chunk.
+
+    For every pair of columns the accumulator keeps the number of rows where both are present and
+    the sums of x, x squared and x*y over those rows. Each chunk contributes a few float32 matrix
+    products (missing values are masked to zero), which are added to float64 totals. Values are
+    shifted by the first chunk's column means before narrowing, which keeps float32 accurate for
+    columns whose mean is large compared with their spread.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        p = len(self.columns)
+        self.shift = None
+        self.n_rows = 0
+        self.count = np.zeros((p, p))
+        self.sum_x = np.zeros((p, p))  # sum_x[i, j]: sum of column i over rows where i and j are present
+        self.sum_xx = np.zeros((p, p))
+        self.sum_xy = np.zeros((p, p))
+
+    def partial_fit(self, df):
+        """
+        Add a chunk of rows.
+
+        Parameters:
+        - df (pd.DataFrame): Chunk containing the accumulator's columns.
+
+        Returns:
+        - CorrelationAccumulator: self.
+        """
+        X = df[self.columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        present = np.isfinite(X)
+        if self.shift is None:
+            with np.errstate(all='ignore'):
+                self.shift = np.nan_to_num(np.nanmean(X, axis=0))
+        # Shift before narrowing to float32 so large offsets do not swallow the variation
+        X = np.where(present, X - self.shift, 0).astype(np.float32)
+        mask = present.astype(np.float32)
+        self.count += mask.T @ mask
+        self.sum_x += X.T @ mask
+        self.sum_xx += (X * X).T @ mask
+        self.sum_xy += X.T @ X
+        self.n_rows += len(X)
+        return self
+
+    def correlation(self):
+        """
+        Current correlation matrix.
+
+        Returns:
+        - pd.DataFrame: Correlations, NaN where a pair has fewer than two complete rows or no variance.
+        """
+        n = self.count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            covariance = n * self.sum_xy - self.sum_x * self.sum_x.T
+            variance = n * self.sum_xx - self.sum_x ** 2
+            corr = covariance / np.sqrt(variance * variance.T)
+        corr[(n < 2) | ~np.isfinite(corr)] = np.nan
+        corr = np.clip(corr, -1, 1)
+        np.fill_diagonal(corr, np.where(np.diag(variance) > 0, 1.0, np.nan))
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+class CorrelationService:
+    """
+    Correlation matrices cached per data fingerprint and column set.
+
+    The fingerprint is a digest of per-row hashes. When a request comes for a dataframe whose
+    leading rows match a cached entry for the same columns (rows were appended), only the new
+    rows are added to the cached running sums instead of recomputing the matrix.
+    """
+
+    def __init__(self, max_entries=16, chunk_size=100000):
+        self.max_entries = max_entries
+        self.chunk_size = chunk_size
+        self._entries = OrderedDict()  # column tuple -> list of (digest, rows, accumulator)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(row_hashes):
+        return hashlib.sha1(row_hashes.tobytes()).hexdigest()
+
+    def _fit(self, accumulator, df):
+        for start in range(0, len(df), self.chunk_size):
+            accumulator.partial_fit(df.iloc[start:start + self.chunk_size])
+        return accumulator
+
+    def correlation(self, df, columns):
+        """
+        Correlation matrix of the given columns, from the cache when possible.
+
+        Parameters:
+        - df (pd.DataFrame): The dataframe.
+        - columns (list): Numeric columns to correlate.
+
+        Returns:
+        - pd.DataFrame: The correlation matrix.
+        """
+        key = tuple(columns)
+        row_hashes = pd.util.hash_pandas_object(df[list(columns)], index=False).to_numpy()
+        digest = self._digest(row_hashes)
+        with self._lock:
+            candidates = list(self._entries.get(key, []))
+
+        accumulator = None
+        for cached_digest, rows, cached in candidates:
+            if rows == len(df) and cached_digest == digest:
+                return cached.correlation()
+            if rows < len(df) and cached_digest == self._digest(row_hashes[:rows]):
+                # Rows were appended: continue from the cached running sums
+                accumulator = self._fit(_copy_accumulator(cached), df.iloc[rows:])
+                break
+        if accumulator is None:
+            accumulator = self._fit(CorrelationAccumulator(columns), df)
+
+        with self._lock:
+            entries = self._entries.setdefault(key, [])
+            entries.append((digest, len(df), accumulator))
+            del entries[:-2]  # keep the latest versions of this column set
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return accumulator.correlation()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+def _copy_accumulator(accumulator):
+    copy = CorrelationAccumulator(accumulator.columns)
+    copy.shift = accumulator.shift
+    copy.n_rows = accumulator.n_rows
+    for name in ('count', 'sum_x', 'sum_xx', 'sum_xy'):
+        setattr(copy, name, getattr(accumulator, name).copy())
+    return copy
+
+# Correlation cache shared by the heatmap plots
+correlation_service = CorrelationService()
+
+def correlation_matrix(df, columns):
+    """
+    Correlation matrix of the given columns through the shared, cached correlation service.
+
+    Parameters:
+    - df (pd.DataFrame): The dataframe.
+    - columns (list): Numeric columns to correlate.
+
+    Returns:
+    - pd.DataFrame: The correlation matrix.
+    """
+    return correlation_service.correlation(df, columns)
@@ -1,19 +1,10 @@
-from PySide6.QtWidgets import QDialog, QVBoxLayout, QLineEdit, QPushButton, QLabel, QFormLayout, QComboBox, QMessageBox
-import pandas as pd
-from data_cleaning.cleaning_functions import (handle_missing_values, remove_duplicates, 
-                                              convert_dtypes, knn_impute, iterative_impute, 
-                                              winsorize_data, robust_scale, parse_dates, 
-                                              extract_date_features, fill_missing_timestamps, 
-                                              smooth_time_series, remove_outliers, normalize_data,
-                                              encode_categorical, scale_features, handle_imbalanced_data,
-                                              log_transform, create_cluster_features, automated_feature_engineering)
-from data_cleaning.text_cleaning import (tokenize_text_nltk, tokenize_text_sklearn, stem_text, lemmatize_text, 
-                                         remove_stopwords, normalize_text, named_entity_recognition, 
-                                         sentiment_analysis, tfidf_vectorization)
-from data_cleaning.anomaly_detection import (detect_anomalies_pycaret, detect_anomalies_pyod, 
-                                             detect_anomalies_isolation_forest, detect_anomalies_autoencoder, 
-                                             detect_anomalies_lstm)
-
+from PySide6.QtWidgets import (QDialog, QVBoxLayout, QLineEdit, QPushButton, QLabel, QFormLayout, QComboBox,
+                               QMessageBox, QProgressBar)
+from PySide6.QtCore import QThreadPool
+from PySide6.QtGui import QFontDatabase
+from data_cleaning.pipeline import build_pipeline
+from data_cleaning.memory_governor import profile_dataframe, plan_pipeline, plan_fits, format_plan
+from gui.cleaning_worker import CleaningWorker
 
 class DataCleaningDialog(QDialog):
     def __init__(self, parent=None, df=None):
@@ -44,7 +35,7 @@ class DataCleaningDialog(QDialog):
 
         self.anomaly_label = QLabel('Anomaly Detection Method:')
         self.anomaly_input = QComboBox()
-        self.anomaly_input.addItems(['None', 'PyCaret', 'PyOD', 'IsolationForest', 'Autoencoder', 'LSTM'])
+        self.anomaly_input.addItems(['None', 'Default (Fast)', 'PyCaret', 'PyOD', 'KNN (Scalable)', 'IsolationForest', 'Autoencoder', 'LSTM', 'Ensemble'])
         form_layout.addRow(self.anomaly_label, self.anomaly_input)
 
         self.date_label = QLabel('Date Columns (comma separated):')
@@ -55,72 +46,150 @@ class DataCleaningDialog(QDialog):
         self.text_input = QLineEdit()
         form_layout.addRow(self.text_label, self.text_input)
 
+        self.near_duplicate_label = QLabel('Near-Duplicate Text Columns (comma separated):')
+        self.near_duplicate_input = QLineEdit()
+        form_layout.addRow(self.near_duplicate_label, self.near_duplicate_input)
+
         layout.addLayout(form_layout)
 
         self.clean_button = QPushButton('Clean Data')
         self.clean_button.clicked.connect(self.clean_data)
         layout.addWidget(self.clean_button)
 
+        # Execution plan chosen by the memory governor, shown before the run starts
+        self.plan_label = QLabel('')
+        self.plan_label.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.plan_label.setVisible(False)
+        layout.addWidget(self.plan_label)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 1000)
+        self.progress_bar.setVisible(False)
+        layout.addWidget(self.progress_bar)
+
+        self.status_label = QLabel('')
+        layout.addWidget(self.status_label)
+
+        self.cancel_button = QPushButton('Cancel')
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_cleaning)
+        layout.addWidget(self.cancel_button)
+
         self.setLayout(layout)
+        self.worker = None
+        self.source_df = None
+        self.step_timings = []
+
+    def working_copy(self, steps):
+        """
+        Copy of the frame for the worker in which only the columns the steps write are duplicated.
+        The other columns share their data with the main window's frame, so a wide frame is not copied
+        whole, and the worker can never write into the frame the window shows.
+
+        Parameters:
+        steps (list): The PipelineStep objects that will run.
+
+        Returns:
+        pd.DataFrame: The frame to clean.
+        """
+        df = self.df.copy(deep=False)
+        written = dict.fromkeys(column for step in steps for column in step.columns if column in df.columns)
+        for column in written:
+            df[column] = df[column].copy()
+        return df
 
     def clean_data(self):
-        strategy = self.strategy_input.currentText()
-        columns = self.columns_input.text().split(',')
-
-        # Handle missing values
-        if strategy in ['mean', 'median', 'most_frequent', 'constant']:
-            self.df = handle_missing_values(self.df, strategy, columns)
-        elif strategy == 'knn':
-            self.df = knn_impute(self.df, columns)
-        elif strategy == 'iterative':
-            self.df = iterative_impute(self.df, columns)
-        
-        self.df = remove_duplicates(self.df)
-
-        # Scale features
-        scale_method = self.scale_input.currentText()
-        if scale_method == 'standard':
-            self.df = scale_features(self.df, columns)
-        elif scale_method == 'minmax':
-            self.df = normalize_data(self.df, columns)
-        elif scale_method == 'robust':
-            self.df = robust_scale(self.df, columns)
-
-        # Encode categorical features
-        encode_columns = self.encode_input.text().split(',')
-        if encode_columns:
-            self.df = encode_categorical(self.df, encode_columns)
-
-        # Anomaly detection
-        anomaly_method = self.anomaly_input.currentText()
-        if anomaly_method == 'PyCaret':
-            self.df = detect_anomalies_pycaret(self.df, columns)
-        elif anomaly_method == 'PyOD':
-            self.df = detect_anomalies_pyod(self.df, columns)
-        elif anomaly_method == 'IsolationForest':
-            self.df = detect_anomalies_isolation_forest(self.df, columns)
-        elif anomaly_method == 'Autoencoder':
-            self.df = detect_anomalies_autoencoder(self.df, columns)
-        elif anomaly_method == 'LSTM':
-            self.df = detect_anomalies_lstm(self.df, columns)
-
-        # Date features extraction
-        date_columns = self.date_input.text().split(',')
-        for column in date_columns:
-            self.df = parse_dates(self.df, [column])
-            self.df = extract_date_features(self.df, column)
-
-        # Text processing
-        text_columns = self.text_input.text().split(',')
-        for column in text_columns:
-            self.df = tokenize_text_nltk(self.df, column)
-            self.df = stem_text(self.df, column)
-            self.df = lemmatize_text(self.df, column)
-            self.df = remove_stopwords(self.df, column)
-            self.df = normalize_text(self.df, column)
-            self.df = named_entity_recognition(self.df, column)
-            self.df = sentiment_analysis(self.df, column)
-            # Additional: TF-IDF vectorization can be handled separately due to its output format
-
-        QMessageBox.information(self, 'Data Cleaning', 'Data cleaning completed successfully!')
+        """
+        Build the cleaning pipeline from the chosen options and run it on the global thread pool.
+        """
+        settings = {
+            'strategy': self.strategy_input.currentText(),
+            'columns': self.columns_input.text(),
+            'scale_method': self.scale_input.currentText(),
+            'encode_columns': self.encode_input.text(),
+            'anomaly_method': self.anomaly_input.currentText(),
+            'date_columns': self.date_input.text(),
+            'text_columns': self.text_input.text(),
+            'near_duplicate_columns': self.near_duplicate_input.text(),
+        }
+        try:
+            steps = build_pipeline(settings)
+        except Exception as e:
+            QMessageBox.critical(self, 'Data Cleaning', f'Could not prepare the cleaning steps: {e}')
+            return
+
+        plan = plan_pipeline(steps, profile_dataframe(self.df), settings)
+        report = format_plan(plan)
+        self.plan_label.setText(report)
+        self.plan_label.setVisible(True)
+        if not plan_fits(plan):
+            answer = QMessageBox.question(self, 'Memory Budget',
+                                          f'Some steps are expected to exceed the memory budget:\n\n{report}\n\nRun anyway?')
+            if answer != QMessageBox.Yes:
+                return
+
+        self.step_timings = []
+        # The dialog is non-modal, so the worker cleans its own frame while the main window keeps using
+        # this one; the result only replaces that frame if it is still the one the run started from
+        self.source_df = self.df
+        self.worker = CleaningWorker(self.working_copy(steps), steps, plan=plan)
+        self.worker.signals.progress.connect(self.on_progress)
+        self.worker.signals.step_finished.connect(self.on_step_finished)
+        self.worker.signals.finished.connect(self.on_finished)
+        self.worker.signals.error.connect(self.on_error)
+        self.worker.signals.cancelled.connect(self.on_cancelled)
+
+        self.clean_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        QThreadPool.globalInstance().start(self.worker)
+
+    def cancel_cleaning(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.cancel_button.setEnabled(False)
+            self.status_label.setText('Cancelling after the current step...')
+
+    def on_progress(self, step_name, step_index, step_count, fraction):
+        self.progress_bar.setValue(int(1000 * (step_index + fraction) / max(step_count, 1)))
+        self.status_label.setText(f'Step {step_index + 1} of {step_count}: {step_name}')
+
+    def on_step_finished(self, step_name, seconds):
+        self.step_timings.append((step_name, seconds))
+
+    def finish_run(self):
+        self.worker = None
+        self.clean_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+
+    def on_finished(self, df):
+        self.finish_run()
+        self.df = df
+        parent = self.parent()
+        replaced = parent is not None and getattr(parent, 'df', None) is self.source_df
+        if replaced:
+            parent.df = df
+        self.source_df = None
+        self.progress_bar.setValue(1000)
+        total = sum(seconds for _, seconds in self.step_timings)
+        message = f'Data cleaning completed successfully in {total:.1f} seconds!'
+        if parent is not None and not replaced:
+            message += '\nOther data was loaded in the meantime, so the cleaned data was not applied to it.'
+        QMessageBox.information(self, 'Data Cleaning', message)
         self.accept()
+
+    def on_error(self, message):
+        self.finish_run()
+        self.status_label.setText('Data cleaning failed.')
+        QMessageBox.critical(self, 'Data Cleaning', f'Data cleaning failed: {message}')
+
+    def on_cancelled(self):
+        self.finish_run()
+        self.progress_bar.setVisible(False)
+        self.status_label.setText('Data cleaning was cancelled.')
+
+    def reject(self):
+        # Closing the dialog cancels a running job instead of leaving it orphaned
+        self.cancel_cleaning()
+        super().reject()
@@ -0,0 +1,303 @@
+from bisect import bisect_right
+import numpy as np
+import pandas as pd
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QThreadPool
+from PySide6.QtWidgets import QDialog, QVBoxLayout, QLabel, QTableView, QHeaderView
+from gui.sort_worker import SortWorker
+
+class DataFrameModel(QAbstractTableModel):
+    """
+    Virtualized table model over a DataFrame.
+
+    Cells are read from the column arrays (NumPy or Arrow backed) only when the view asks for
+    them, so only the visible rows are ever formatted. Rows are exposed in pages of `page_size`
+    through fetchMore, sorting permutes rows through an argsort index computed on the thread pool
+    and cached per column and order, and every column header carries a short summary (dtype, nulls, range or distinct count).
+    Appended pages, e.g. of a streamed query result, are kept as separate frames and only joined
+    when the whole dataframe is asked for.
+    """
+
+    def __init__(self, df=None, page_size=1000, summary_sample=100000, parent=None):
+        super().__init__(parent)
+        self.page_size = page_size
+        self.summary_sample = summary_sample
+        self._generation = 0
+        self._sort_workers = {}
+        self.set_dataframe(df if df is not None else pd.DataFrame())
+
+    def set_dataframe(self, df):
+        """
+        Show a new DataFrame. The model keeps references to its column arrays; nothing is copied.
+
+        Parameters:
+        df (pd.DataFrame): The dataframe to show.
+        """
+        self.beginResetModel()
+        self._pages = []
+        self._arrays = []
+        self._starts = []
+        self._page_stats = []
+        self._rows = 0
+        self._add_page(df)
+        self._loaded = min(self.page_size, len(df))
+        self._order = None
+        self._sort_cache = {}
+        self._pending_sort = None
+        self._generation += 1
+        self._summaries = {}
+        self._distinct = {}
+        self.endResetModel()
+
+    def _add_page(self, df):
+        self._pages.append(df)
+        self._arrays.append([df.iloc[:, position].array for position in range(df.shape[1])])
+        self._starts.append(self._rows)
+        self._page_stats.append({})
+        self._rows += len(df)
+        dtypes = list(df.dtypes)
+        if len(self._pages) > 1:
+            dtypes = [self._common_dtype(current, dtype) for current, dtype in zip(self._dtypes, dtypes)]
+        self._dtypes = dtypes
+        self._numeric = [pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+                         for dtype in dtypes]
+
+    @staticmethod
+    def _common_dtype(first, second):
+        # The dtype pd.concat gives a column from pages of these dtypes, for the header summary
+        if first == second:
+            return first
+        if isinstance(first, np.dtype) and isinstance(second, np.dtype) and first.kind in 'iuf' and second.kind in 'iuf':
+            return np.result_type(first, second)
+        return np.dtype(object)
+
+    def append_dataframe(self, df):
+        """
+        Append rows, e.g. the next page of a query result. The rows are kept as a page of their own,
+        so appending does not copy the rows already loaded. Cached sort indexes and summaries are
+        dropped and the view returns to the original row order.
+
+        Parameters:
+        df (pd.DataFrame): Rows with the same columns as the current dataframe.
+        """
+        if self._pages[0].shape[1] == 0:
+            self.set_dataframe(df)
+            return
+        if len(df) == 0:
+            return
+        start = self._rows
+        if self._order is not None:
+            self.layoutAboutToBeChanged.emit()
+            self._order = None
+            self.layoutChanged.emit()
+        self._add_page(df)
+        self._sort_cache = {}
+        self._pending_sort = None
+        self._generation += 1
+        self._summaries = {}
+        self.headerDataChanged.emit(Qt.Horizontal, 0, len(self._dtypes) - 1)
+        if self._loaded == start:
+            self.fetchMore()
+
+    def dataframe(self):
+        """
+        Return the whole dataframe. Appended pages are joined into one frame on the first call
+        after an append; a dataframe set with set_dataframe is returned as is.
+        """
+        if len(self._pages) > 1:
+            joined = pd.concat(self._pages, ignore_index=True)
+            self._pages = [joined]
+            self._arrays = [[joined.iloc[:, position].array for position in range(joined.shape[1])]]
+            self._starts = [0]
+            self._page_stats = [{}]
+        return self._pages[0]
+
+    def _column(self, column, rows=None):
+        """
+        One column across all pages (or the pages holding the first `rows` rows) as a single series.
+        """
+        pages = [page for page, start in zip(self._pages, self._starts) if rows is None or start < rows]
+        if len(pages) == 1:
+            series = pages[0].iloc[:, column]
+        else:
+            series = pd.concat([page.iloc[:, column] for page in pages], ignore_index=True)
+        return series if rows is None else series.iloc[:rows]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._dtypes)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < self._rows
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(self.page_size, self._rows - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def _row(self, row):
+        return int(self._order[row]) if self._order is not None else row
+
+    def _locate(self, row):
+        # Page holding a row of the joined frame, and the row's position inside that page
+        page = bisect_right(self._starts, row) - 1
+        return page, row - self._starts[page]
+
+    @staticmethod
+    def format_value(value):
+        """
+        Format a single cell for display.
+
+        Parameters:
+        value: The cell value.
+
+        Returns:
+        str: The display text; missing values are shown as an empty string.
+        """
+        if value is None or value is pd.NA or value is pd.NaT:
+            return ''
+        if isinstance(value, (float, np.floating)):
+            return '' if np.isnan(value) else f'{value:.6g}'
+        return str(value)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            page, row = self._locate(self._row(index.row()))
+            return self.format_value(self._arrays[page][index.column()][row])
+        if role == Qt.TextAlignmentRole and self._numeric[index.column()]:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def column_summary(self, column):
+        """
+        Summarize a column for its header. Numeric ranges are exact; distinct counts of other
+        columns are estimated from the first `summary_sample` rows on large frames.
+
+        Parameters:
+        column (int): Column position.
+
+        Returns:
+        str: The summary text.
+        """
+        if column not in self._summaries:
+            # Nulls and ranges are kept per page, so each appended page is only summarized once
+            for page, stats in zip(self._pages, self._page_stats):
+                if column not in stats:
+                    series = page.iloc[:, column]
+                    valid = self._numeric[column] and series.notna().any()
+                    stats[column] = (int(series.isna().sum()), series.min() if valid else None,
+                                     series.max() if valid else None)
+            stats = [page_stats[column] for page_stats in self._page_stats]
+            parts = [str(self._dtypes[column]), f'{sum(nulls for nulls, _, _ in stats)} null']
+            lows = [low for _, low, _ in stats if low is not None]
+            highs = [high for _, _, high in stats if high is not None]
+            if self._numeric[column] and lows:
+                parts.append(f'{self.format_value(min(lows))} .. {self.format_value(max(highs))}')
+            elif self._rows > self.summary_sample:
+                # The sampled rows do not change once they are all loaded
+                if column not in self._distinct:
+                    self._distinct[column] = self._column(column, self.summary_sample).nunique()
+                parts.append(f'~{self._distinct[column]} distinct')
+            else:
+                parts.append(f'{self._column(column).nunique()} distinct')
+            self._summaries[column] = ' | '.join(parts)
+        return self._summaries[column]
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal:
+            if role == Qt.DisplayRole:
+                return f'{self._pages[0].columns[section]}\n{self.column_summary(section)}'
+            if role == Qt.ToolTipRole:
+                return self.column_summary(section)
+        elif role == Qt.DisplayRole:
+            # Appended pages are numbered like the joined frame, which has a fresh range index
+            row = self._row(section)
+            return str(self._pages[0].index[row]) if len(self._pages) == 1 else str(row)
+        return None
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """
+        Sort the view by a column. The permutation is computed once per column and order on the
+        thread pool and applied when it is ready; later sorts by the same column and order reuse it.
+        The underlying DataFrame is not reordered. Missing values sort last. A negative column
+        restores the original order.
+        """
+        if column < 0:
+            self._pending_sort = None
+            self._apply_order(None)
+            return
+        key = (column, order == Qt.AscendingOrder)
+        self._pending_sort = key
+        if key in self._sort_cache:
+            self._apply_order(self._sort_cache[key])
+            return
+        running = (key, self._generation)
+        if running in self._sort_workers:
+            return
+        worker = SortWorker([arrays[column] for arrays in self._arrays], key, self._generation)
+        worker.signals.finished.connect(self._on_sorted)
+        worker.signals.error.connect(lambda message: self._sort_workers.pop(running, None))
+        self._sort_workers[running] = worker
+        QThreadPool.globalInstance().start(worker)
+
+    def _on_sorted(self, key, generation, order):
+        self._sort_workers.pop((key, generation), None)
+        if generation != self._generation:
+            # Rows were appended or replaced while sorting; the permutation no longer fits
+            return
+        self._sort_cache[key] = order
+        if key == self._pending_sort:
+            self._apply_order(order)
+
+    def _apply_order(self, order):
+        self.layoutAboutToBeChanged.emit()
+        self._order = order
+        self.layoutChanged.emit()
+
+class DataFramePreviewDialog(QDialog):
+    """
+    Dialog showing a DataFrame in a virtualized, sortable table.
+    """
+
+    def __init__(self, df, parent=None, title='Data Preview'):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.resize(900, 600)
+
+        layout = QVBoxLayout()
+        self.info_label = QLabel(f'{len(df):,} rows x {df.shape[1]} columns')
+        layout.addWidget(self.info_label)
+
+        self.model = DataFrameModel(df, parent=self)
+        self.table_view = create_table_view(self.model)
+        layout.addWidget(self.table_view)
+        self.setLayout(layout)
+
+def create_table_view(model):
+    """
+    Create a QTableView configured for large models: fixed row heights and on-demand sorting.
+
+    Parameters:
+    model (DataFrameModel): The model to show.
+
+    Returns:
+    QTableView: The configured view.
+    """
+    view = QTableView()
+    view.setModel(model)
+    # Fixed section sizes keep the view from measuring every row
+    view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+    view.verticalHeader().setDefaultSectionSize(22)
+    view.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+    # Enabling sorting sorts by the current indicator; -1 keeps the original order until a header is clicked
+    view.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+    view.setSortingEnabled(True)
+    return view
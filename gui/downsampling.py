@@ -0,0 +1,159 @@
+import numpy as np
+import pandas as pd
+
+def _as_numeric(values):
+    """
+    View a column as float64 for the downsampling math; datetimes become nanoseconds since the epoch.
+    """
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        # Whatever the resolution of the column, count nanoseconds; NaT becomes NaN
+        numeric = values.dt.as_unit('ns').astype('int64').to_numpy(dtype=np.float64)
+        numeric[values.isna().to_numpy()] = np.nan
+        return numeric
+    return pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64)
+
+def _numeric_range(value_range):
+    """
+    Convert a (start, end) window given in the column's own units, e.g. Timestamps, like _as_numeric.
+    """
+    return None if value_range is None else tuple(_as_numeric(list(value_range)))
+
+def _visible(x, y, x_range=None, y_range=None):
+    """
+    Positions of the rows with finite coordinates inside the requested ranges, which are in the
+    units returned by _numeric_range.
+    """
+    mask = np.isfinite(x) & np.isfinite(y)
+    if x_range is not None:
+        mask &= (x >= x_range[0]) & (x <= x_range[1])
+    if y_range is not None:
+        mask &= (y >= y_range[0]) & (y <= y_range[1])
+    return np.flatnonzero(mask)
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling (Steinarsson, 2013).
+    The series is split into n_out - 2 buckets; from each bucket the point forming the largest
+    triangle with the previously kept point and the average of the next bucket is kept.
+
+    Parameters:
+    - x (np.ndarray): Sorted x values.
+    - y (np.ndarray): y values.
+    - n_out (int): Number of points to keep.
+
+    Returns:
+    - np.ndarray: Positions of the kept points.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_stop = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[stop:next_stop].mean() if next_stop > stop else x[-1]
+        next_y = y[stop:next_stop].mean() if next_stop > stop else y[-1]
+        # Twice the triangle area for every candidate in the bucket
+        area = np.abs((x[previous] - next_x) * (y[start:stop] - y[previous])
+                      - (x[previous] - x[start:stop]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        kept[bucket + 1] = previous
+    return kept
+
+def min_max_indices(y, n_buckets):
+    """
+    Keep the first, minimum, maximum and last point of each of n_buckets equal-count buckets, which
+    preserves every spike of a dense series at a fixed number of points per pixel.
+
+    Parameters:
+    - y (np.ndarray): y values in x order.
+    - n_buckets (int): Number of buckets, typically the plot width in pixels.
+
+    Returns:
+    - np.ndarray: Sorted positions of the kept points.
+    """
+    n = len(y)
+    if 4 * n_buckets >= n:
+        return np.arange(n)
+    bucket = np.arange(n) * n_buckets // n
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    counts = np.diff(np.r_[starts, n])
+    keep = [starts, starts + counts - 1]
+    for reduce in (np.minimum, np.maximum):
+        extreme = np.repeat(reduce.reduceat(y, starts), counts)
+        hits = np.flatnonzero(y == extreme)
+        _, first = np.unique(bucket[hits], return_index=True)
+        keep.append(hits[first])
+    return np.unique(np.concatenate(keep))
+
+def downsample_line(x, y, width=1200, method='lttb', x_range=None):
+    """
+    Reduce a line series to a number of points bounded by the plot width.
+
+    Parameters:
+    - x (array-like): x values (numeric or datetime).
+    - y (array-like): y values.
+    - width (int): Plot width in pixels; at most two points per pixel are kept.
+    - method (str): 'lttb' for shape-preserving selection or 'minmax' to keep every extreme.
+    - x_range (tuple, optional): Only downsample the visible window, e.g. after zooming. Given in
+      the units of x, e.g. Timestamps for a datetime axis.
+
+    Returns:
+    - np.ndarray: Positions of the rows to plot, in x order.
+    """
+    x_num, y_num = _as_numeric(x), _as_numeric(y)
+    visible = _visible(x_num, y_num, _numeric_range(x_range))
+    order = visible[np.argsort(x_num[visible], kind='stable')]
+    if method == 'minmax':
+        kept = min_max_indices(y_num[order], width)
+    elif method == 'lttb':
+        kept = lttb_indices(x_num[order], y_num[order], 2 * width)
+    else:
+        raise ValueError(f"Unsupported downsampling method: {method}")
+    return order[kept]
+
+def density_grid(x, y, width=400, height=300, x_range=None, y_range=None):
+    """
+    Bin a scatter into a pixel grid of point counts.
+
+    Parameters:
+    - x (array-like): x values (numeric or datetime).
+    - y (array-like): y values.
+    - width (int): Number of bins along x.
+    - height (int): Number of bins along y.
+    - x_range (tuple, optional): Limits of the visible x window, in the units of x.
+    - y_range (tuple, optional): Limits of the visible y window, in the units of y.
+
+    Returns:
+    - tuple: (counts of shape (height, width), x bin edges, y bin edges). Edges are numeric, with
+      datetimes as nanoseconds. Without visible points the counts are all zero.
+    """
+    x_num, y_num = _as_numeric(x), _as_numeric(y)
+    x_range, y_range = _numeric_range(x_range), _numeric_range(y_range)
+    visible = _visible(x_num, y_num, x_range, y_range)
+    x_num, y_num = x_num[visible], y_num[visible]
+    # With no visible point and no window there is nothing to take the limits from; bin an empty unit square
+    bounds = [x_range or ((x_num.min(), x_num.max()) if len(x_num) else (0, 1)),
+              y_range or ((y_num.min(), y_num.max()) if len(y_num) else (0, 1))]
+    counts, x_edges, y_edges = np.histogram2d(x_num, y_num, bins=(width, height), range=bounds)
+    return counts.T, x_edges, y_edges
+
+def scatter_plan(n_rows, width=1200, height=800, max_points=None):
+    """
+    Decide whether a scatter is drawn point by point or as a density image.
+
+    Parameters:
+    - n_rows (int): Number of points.
+    - width (int): Plot width in pixels.
+    - height (int): Plot height in pixels.
+    - max_points (int, optional): Largest number of individual markers. Defaults to one per 20 pixels.
+
+    Returns:
+    - str: 'points' or 'density'.
+    """
+    max_points = max_points or width * height // 20
+    return 'points' if n_rows <= max_points else 'density'
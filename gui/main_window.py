@@ -1,8 +1,6 @@
 from PySide6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QLabel, QPushButton, QHBoxLayout, QMessageBox, QDialog, QInputDialog, QSizePolicy
 from PySide6.QtGui import QFont, QIcon
 from database.connection import get_engine, test_connection
-from database.fetch_data import fetch_data
-from gui.sql_query_builder import SQLQueryBuilderDialog
 from gui.advanced_settings import AdvancedSettingsDialog
 
 class MainWindow(QMainWindow):
@@ -33,6 +31,10 @@ class MainWindow(QMainWindow):
         self.visualize_button.setEnabled(False)
         button_layout.addWidget(self.visualize_button)
 
+        self.preview_button = self.create_button('Preview Data', 'icons/preview_icon.png', self.preview_data)
+        self.preview_button.setEnabled(False)
+        button_layout.addWidget(self.preview_button)
+
         self.sql_button = self.create_button('SQL Query Builder', 'icons/sql_icon.png', self.open_sql_query_builder)
         self.sql_button.setEnabled(False)
         button_layout.addWidget(self.sql_button)
@@ -92,25 +94,40 @@ class MainWindow(QMainWindow):
             if test_connection(self.engine):
                 self.clean_button.setEnabled(True)
                 self.visualize_button.setEnabled(True)
+                self.preview_button.setEnabled(True)
                 self.sql_button.setEnabled(True)
                 QMessageBox.information(self, 'Connection Successful', 'Successfully connected to the database.')
             else:
                 self.clean_button.setEnabled(False)
                 self.visualize_button.setEnabled(False)
+                self.preview_button.setEnabled(False)
                 self.sql_button.setEnabled(False)
                 QMessageBox.critical(self, 'Connection Failed', 'Failed to connect to the database.')
 
     def start_data_cleaning(self):
         table_name, ok = QInputDialog.getText(self, 'Table Name', 'Enter the table name:')
         if ok and table_name:
+            from database.fetch_data import fetch_data
             self.df = fetch_data(self.engine, table_name)
             if self.df is not None:
                 from gui.data_cleaning import DataCleaningDialog
+                # Non-modal so cleaning runs in the background and several jobs can run at once
                 dialog = DataCleaningDialog(self, df=self.df)
-                dialog.exec()
+                dialog.show()
             else:
                 QMessageBox.critical(self, 'Fetch Data', 'Failed to fetch data from the specified table.')
 
+    def preview_data(self):
+        """
+        Show the fetched or cleaned data in a virtualized table.
+        """
+        if self.df is None:
+            QMessageBox.critical(self, 'No Data', 'Please fetch the data first.')
+            return
+        from gui.dataframe_model import DataFramePreviewDialog
+        dialog = DataFramePreviewDialog(self.df, self)
+        dialog.show()
+
     def visualize_data(self):
         if self.df is None:
             QMessageBox.critical(self, 'No Data', 'Please fetch and clean the data first.')
@@ -196,6 +213,7 @@ class MainWindow(QMainWindow):
         Open the SQL Query Builder dialog.
         """
         if self.engine:
+            from gui.sql_query_builder import SQLQueryBuilderDialog
             dialog = SQLQueryBuilderDialog(self, engine=self.engine)
             dialog.exec()
 
@@ -0,0 +1,63 @@
+import threading
+from PySide6.QtCore import QObject, QRunnable, Signal
+from database.query_runner import QueryCancelled
+
+class QuerySignals(QObject):
+    """
+    Signals emitted by a QueryWorker. They are delivered on the GUI thread through queued connections.
+    """
+    page = Signal(object, int, float)  # page dataframe, rows fetched so far, elapsed seconds
+    finished = Signal(int, float)  # total rows, elapsed seconds
+    error = Signal(str)
+    cancelled = Signal()
+
+class QueryWorker(QRunnable):
+    """
+    Runs a QueryRunner on a QThreadPool thread. After each page the worker waits until the next
+    page is requested, so only the pages the user looks at are pulled from the server. A cursor
+    left idle for `idle_timeout` seconds is cancelled to release its connection.
+    """
+
+    def __init__(self, runner, prefetch_pages=1, idle_timeout=300):
+        super().__init__()
+        self.runner = runner
+        self.idle_timeout = idle_timeout
+        self.signals = QuerySignals()
+        self._more = threading.Semaphore(prefetch_pages)
+
+    def request_more(self):
+        """
+        Ask for the next page.
+        """
+        self._more.release()
+
+    def cancel(self):
+        """
+        Cancel the query on the server and stop paging.
+        """
+        self.runner.cancel()
+        self._more.release()
+
+    def run(self):
+        try:
+            pages = self.runner.pages()
+            while True:
+                if not self._more.acquire(timeout=self.idle_timeout):
+                    self.runner.cancel()
+                if self.runner.cancelled:
+                    pages.close()
+                    raise QueryCancelled()
+                page = next(pages, None)
+                if page is None:
+                    break
+                self.signals.page.emit(page, self.runner.rows_fetched, self.runner.elapsed)
+                if len(page) < self.runner.page_size:
+                    # A short page is the last one; finish without waiting for another request
+                    pages.close()
+                    break
+        except QueryCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.finished.emit(self.runner.rows_fetched, self.runner.elapsed)
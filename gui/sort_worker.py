@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+def sort_permutation(arrays, ascending=True):
+    """
+    Stable argsort of a column stored as one array per page, with missing values last.
+
+    Parameters:
+    arrays (list): The column's arrays (NumPy or pandas extension arrays), one per page, in row order.
+    ascending (bool): Sort order. Equal values keep their original order in both directions.
+
+    Returns:
+    np.ndarray: Row positions of the joined column in sorted order.
+    """
+    values = [np.asarray(array) for array in arrays]
+    values = values[0] if len(values) == 1 else np.concatenate(values)
+    if values.dtype.kind in 'mM':
+        missing = np.isnat(values)
+    elif values.dtype.kind == 'f':
+        missing = np.isnan(values)
+    elif values.dtype.kind in 'biu':
+        missing = None
+    else:
+        # Strings, nullable and other object columns are ranked through their sorted distinct values
+        values, _ = pd.factorize(values, sort=True)
+        missing = values < 0
+    rows = np.flatnonzero(~missing) if missing is not None and missing.any() else None
+    present = values if rows is None else values[rows]
+    if ascending:
+        order = np.argsort(present, kind='stable')
+    else:
+        # Sorting the reversed column and reversing the result keeps ties in their original order
+        order = len(present) - 1 - np.argsort(present[::-1], kind='stable')[::-1]
+    if rows is None:
+        return order
+    return np.concatenate([rows[order], np.flatnonzero(missing)])
+
+class SortSignals(QObject):
+    """
+    Signals emitted by a SortWorker. They are delivered on the GUI thread through queued connections.
+    """
+    finished = Signal(object, int, object)  # sort key, model generation, row permutation
+    error = Signal(str)
+
+class SortWorker(QRunnable):
+    """
+    Computes the row permutation for sorting a DataFrameModel on a QThreadPool thread, so a click
+    on a header never blocks the GUI, however many rows the model has.
+    """
+
+    def __init__(self, arrays, key, generation):
+        super().__init__()
+        self.arrays = arrays
+        self.key = key
+        self.generation = generation
+        self.signals = SortSignals()
+
+    def run(self):
+        try:
+            order = sort_permutation(self.arrays, ascending=self.key[1])
+        except Exception as e:
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.finished.emit(self.key, self.generation, order)
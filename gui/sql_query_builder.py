@@ -1,5 +1,11 @@
-from PySide6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox, QPushButton, QTextEdit, QMessageBox
-from sqlalchemy.exc import SQLAlchemyError
+from PySide6.QtWidgets import QApplication, QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox, QPushButton, QMessageBox
+from PySide6.QtCore import QThreadPool
+import pandas as pd
+from database.query_runner import QueryRunner
+from database.query_builder import compile_query, result_cache, clear_reflection_cache
+from database.query_profiler import explain_query, check_query_cost, get_query_history, QueryCostExceeded
+from gui.dataframe_model import DataFrameModel, create_table_view
+from gui.query_worker import QueryWorker
 
 class SQLQueryBuilderDialog(QDialog):
     def __init__(self, parent=None, engine=None):
@@ -40,12 +46,31 @@ class SQLQueryBuilderDialog(QDialog):
         self.execute_button.clicked.connect(self.execute_query)
         main_layout.addWidget(self.execute_button)
 
+        self.cost_button = QPushButton('Preview Cost')
+        self.cost_button.clicked.connect(self.preview_cost)
+        main_layout.addWidget(self.cost_button)
+
+        self.cancel_button = QPushButton('Cancel Query')
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_query)
+        main_layout.addWidget(self.cancel_button)
+
         # Result output
-        self.result_output = QTextEdit()
-        self.result_output.setReadOnly(True)
+        self.result_label = QLabel('')
+        main_layout.addWidget(self.result_label)
+        self.result_model = DataFrameModel(parent=self)
+        self.result_output = create_table_view(self.result_model)
         main_layout.addWidget(self.result_output)
+        self.result_output.verticalScrollBar().valueChanged.connect(self.on_scroll)
 
         self.setLayout(main_layout)
+        self.worker = None
+        self.page_pending = False
+        self.cache_key = None
+        self.query_table = None
+        if QApplication.instance() is not None:
+            # A paused query would otherwise keep the thread pool, and the application, from exiting
+            QApplication.instance().aboutToQuit.connect(self.cancel_query)
 
     def add_condition(self):
         """
@@ -78,9 +103,9 @@ class SQLQueryBuilderDialog(QDialog):
         self.condition_layout.removeItem(condition_layout)
         self.condition_inputs = [ci for ci in self.condition_inputs if ci[0].parent()]
 
-    def execute_query(self):
+    def build_query(self):
         """
-        Build the SQL query from user inputs and execute it.
+        Gather the user inputs into a UQL dictionary.
         """
         select_fields = self.select_input.text().split(',')
         from_table = self.from_input.text()
@@ -96,34 +121,148 @@ class SQLQueryBuilderDialog(QDialog):
             "from": from_table,
             "where": conditions
         }
+        return query
 
-        sql_query = self.translate_to_sql(query)
-        self.run_query(sql_query)
+    def execute_query(self):
+        """
+        Build the SQL query from user inputs, check its estimated cost and execute it.
+        """
+        query = self.build_query()
+        try:
+            statement, params = self.translate_to_sql(query)
+        except Exception as e:
+            QMessageBox.critical(self, 'Error', f'Failed to build query:\n{e}')
+            return
+        self.query_table = query['from'].strip()
+
+        try:
+            estimate = check_query_cost(self.engine, statement, params)
+        except QueryCostExceeded as e:
+            QMessageBox.critical(self, 'Query Blocked', str(e))
+            return
+        except Exception as e:
+            # A failing EXPLAIN should not stop the query itself
+            estimate = None
+            self.result_label.setText(f'Cost preview failed: {e}')
+        if estimate is not None and estimate.get('exceeded'):
+            answer = QMessageBox.question(self, 'Expensive Query', 'This query is estimated to be expensive. Run it anyway?')
+            if answer != QMessageBox.Yes:
+                return
+        self.run_query(statement, params, estimate=estimate)
+
+    def preview_cost(self):
+        """
+        Show the database's cost estimate for the query without running it.
+        """
+        try:
+            statement, params = self.translate_to_sql(self.build_query())
+            estimate = explain_query(self.engine, statement, params)
+        except Exception as e:
+            QMessageBox.critical(self, 'Error', f'Failed to estimate query cost:\n{e}')
+            return
+        if estimate is None:
+            QMessageBox.information(self, 'Cost Preview', 'Cost preview is not supported for this database.')
+            return
+        rows = 'unknown' if estimate['estimated_rows'] is None else f"{estimate['estimated_rows']:,.0f}"
+        cost = 'unknown' if estimate['estimated_cost'] is None else f"{estimate['estimated_cost']:,.1f}"
+        scans = ', '.join(estimate['full_scans']) or 'none'
+        QMessageBox.information(self, 'Cost Preview', f'Estimated rows: {rows}\nEstimated cost: {cost}\nFull scans: {scans}')
 
     def translate_to_sql(self, query):
         """
-        Translate the UQL to an SQL query string.
+        Compile the UQL to a parameterized SQLAlchemy select() and its bound parameters.
         """
-        select_clause = "SELECT " + ", ".join(query["select"])
-        from_clause = "FROM " + query["from"]
-        where_clause = "WHERE " + " AND ".join([f'{cond["field"]} {cond["operator"]} "{cond["value"]}"' for cond in query["where"]])
-        return f"{select_clause} {from_clause} {where_clause}"
+        return compile_query(self.engine, query)
 
-    def run_query(self, sql_query):
+    def run_query(self, sql_query, params=None, page_size=1000, estimate=None):
         """
-        Execute the SQL query and display the results.
+        Execute the SQL query on a worker thread and display the results page by page.
         """
-        try:
-            with self.engine.connect() as connection:
-                result = connection.execute(sql_query)
-                output = ""
-                for row in result:
-                    output += str(row) + "\n"
-                self.result_output.setPlainText(output)
-                QMessageBox.information(self, 'Success', 'Query executed successfully.')
-        except SQLAlchemyError as e:
-            self.result_output.setPlainText(str(e))
-            QMessageBox.critical(self, 'Error', f'Failed to execute query:\n{e}')
+        if self.worker is not None:
+            # Signals of the previous query that are still queued are ignored by is_current()
+            self.worker.cancel()
+            self.worker = None
+        self.cache_key = result_cache.make_key(self.engine, sql_query, params)
+        cached = result_cache.get(self.cache_key)
+        if cached is not None:
+            self.result_model.set_dataframe(cached)
+            self.result_label.setText(f'{len(cached):,} rows (cached result)')
+            self.finish_query()
+            return
+        self.result_model.set_dataframe(pd.DataFrame())
+        self.result_label.setText('Running query...')
+        self.worker = QueryWorker(QueryRunner(self.engine, sql_query, params, page_size=page_size,
+                                             history=get_query_history(), estimate=estimate))
+        self.worker.signals.page.connect(self.on_page)
+        self.worker.signals.finished.connect(self.on_query_finished)
+        self.worker.signals.error.connect(self.on_query_error)
+        self.worker.signals.cancelled.connect(self.on_query_cancelled)
+        self.page_pending = True
+        self.execute_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        QThreadPool.globalInstance().start(self.worker)
+
+    def is_current(self):
+        return self.worker is not None and self.sender() is self.worker.signals
+
+    def request_next_page(self):
+        if self.worker is not None and not self.page_pending:
+            self.page_pending = True
+            self.worker.request_more()
+
+    def on_scroll(self, value):
+        # Pull the next page from the server when the user scrolls to the end of the fetched rows
+        if value == self.result_output.verticalScrollBar().maximum() and not self.result_model.canFetchMore():
+            self.request_next_page()
+
+    def on_page(self, page, rows_fetched, elapsed):
+        if not self.is_current():
+            return
+        self.page_pending = False
+        self.result_model.append_dataframe(page)
+        self.result_label.setText(f'{rows_fetched:,} rows fetched in {elapsed:.2f} s (scroll for more)')
+
+    def finish_query(self):
+        self.worker = None
+        self.page_pending = False
+        self.execute_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+
+    def on_query_finished(self, rows, elapsed):
+        if not self.is_current():
+            return
+        self.finish_query()
+        # Only complete results are cached
+        result_cache.put(self.cache_key, self.result_model.dataframe())
+        self.result_label.setText(f'{rows:,} rows in {elapsed:.2f} s')
+
+    def on_query_error(self, message):
+        if not self.is_current():
+            return
+        self.finish_query()
+        # The table may have changed since it was reflected; the next run reflects it again
+        clear_reflection_cache(self.engine, self.query_table)
+        self.result_label.setText(message)
+        QMessageBox.critical(self, 'Error', f'Failed to execute query:\n{message}')
+
+    def on_query_cancelled(self):
+        if not self.is_current():
+            return
+        self.finish_query()
+        self.result_label.setText(f'Query cancelled after {self.result_model.dataframe().shape[0]:,} rows.')
+
+    def cancel_query(self):
+        """
+        Cancel the running query on the server.
+        """
+        if self.worker is not None:
+            self.worker.cancel()
+            self.cancel_button.setEnabled(False)
+
+    def reject(self):
+        # Closing the dialog releases the server-side cursor
+        self.cancel_query()
+        super().reject()
 
 '''
 Usage Guide
@@ -132,13 +271,18 @@ Usage Guide
 - Conditions: Add conditions using the Add Condition button. For each condition, specify:
    - Field: The field name to apply the condition on.
    - Operator: The comparison operator (e.g., =, >, <, LIKE).
-   - Value: The value to compare against.
-- Execute Query: Click the Execute Query button to build and execute the SQL query. Results will be displayed in the Result Output section.
+   - Value: The value to compare against. It is converted to the column's type; for IN, separate values with commas.
+- Execute Query: Click the Execute Query button to build and execute the SQL query. The query runs in the background and the first page of results is displayed in a sortable table as soon as it arrives; scrolling to the end fetches the next page.
+- Preview Cost: Shows the database's estimated rows, cost and full table scans for the query without running it. When a threshold is configured, expensive queries ask for confirmation or are blocked before they run.
+- Repeated queries within five minutes are answered from a local result cache.
+- Cancel Query: Stops the running query on the database server.
 
 Key Methods
 - add_condition(): Adds a new row to input a condition.
 - remove_condition(condition_layout): Removes a specific condition row.
 - execute_query(): Gathers input data, builds the UQL, translates it to SQL, and executes the query.
-- translate_to_sql(query): Converts the UQL to an SQL query string.
-- run_query(sql_query): Executes the SQL query and displays the results.
+- translate_to_sql(query): Compiles the UQL to a parameterized SQLAlchemy select() with typed bound values.
+- run_query(sql_query): Executes the SQL query on a worker thread and displays the results page by page.
+- preview_cost(): Shows the EXPLAIN-based cost estimate of the query.
+- cancel_query(): Cancels the running query on the server.
 '''
\ No newline at end of file
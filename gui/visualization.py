@@ -1,167 +1,277 @@
 import plotly.express as px
+import plotly.graph_objects as go
 from bokeh.plotting import figure, output_file, save
+from bokeh.models import ColumnDataSource, LinearColorMapper, ColorBar, HoverTool
+from bokeh.palettes import RdBu11
 import pandas as pd
 import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
+from gui.downsampling import downsample_line, density_grid, scatter_plan
+from gui.aggregation import histogram_bins, five_number_summary, grouped_totals
+from gui.correlation import correlation_matrix
+
+def _bin_centers(edges, column):
+    """
+    Centers of density bins, converted back to datetimes for datetime columns.
+    """
+    centers = (edges[:-1] + edges[1:]) / 2
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return pd.to_datetime(centers.astype('int64'))
+    return centers
 
 # Plotly Visualizations
-def plot_scatter_plotly(df, x_col, y_col):
+def plot_scatter_plotly(df, x_col, y_col, width=1200, height=800, x_range=None, y_range=None):
     """
     Create a scatter plot using Plotly.
+    Up to one marker per 20 pixels is drawn with WebGL; larger data is binned into a density
+    image at the plot's resolution, so the figure size depends on pixels, not rows.
 
     Parameters:
     - df (pd.DataFrame): The data frame containing the data to plot.
     - x_col (str): The name of the column to use for the x-axis.
     - y_col (str): The name of the column to use for the y-axis.
+    - width (int): Plot width in pixels.
+    - height (int): Plot height in pixels.
+    - x_range (tuple, optional): Visible x window; call again with the zoomed window to re-aggregate.
+    - y_range (tuple, optional): Visible y window.
     """
-    fig = px.scatter(df, x=x_col, y=y_col, title="Scatter Plot")
+    if scatter_plan(len(df), width, height) == 'points':
+        fig = px.scatter(df, x=x_col, y=y_col, title="Scatter Plot", render_mode='webgl', width=width, height=height)
+    else:
+        counts, x_edges, y_edges = density_grid(df[x_col], df[y_col], width // 2, height // 2, x_range, y_range)
+        fig = go.Figure(go.Heatmap(z=np.where(counts > 0, counts, np.nan), x=_bin_centers(x_edges, df[x_col]),
+                                   y=_bin_centers(y_edges, df[y_col]), colorscale='Viridis', colorbar={'title': 'Points'}))
+        fig.update_layout(title="Scatter Plot (density)", xaxis_title=x_col, yaxis_title=y_col, width=width, height=height)
+    fig.update_xaxes(range=x_range)
+    fig.update_yaxes(range=y_range)
     fig.show()
 
-def plot_line_plotly(df, x_col, y_col):
+def plot_line_plotly(df, x_col, y_col, width=1200, height=800, method='lttb', x_range=None):
     """
     Create a line plot using Plotly.
+    The series is downsampled to at most two points per pixel (LTTB or min-max) and drawn with WebGL.
 
     Parameters:
     - df (pd.DataFrame): The data frame containing the data to plot.
     - x_col (str): The name of the column to use for the x-axis.
     - y_col (str): The name of the column to use for the y-axis.
+    - width (int): Plot width in pixels.
+    - height (int): Plot height in pixels.
+    - method (str): Downsampling method, 'lttb' or 'minmax'.
+    - x_range (tuple, optional): Visible x window; call again with the zoomed window to re-aggregate.
     """
-    fig = px.line(df, x=x_col, y=y_col, title="Line Plot")
+    rows = df.iloc[downsample_line(df[x_col], df[y_col], width, method, x_range)]
+    fig = px.line(rows, x=x_col, y=y_col, title="Line Plot", render_mode='webgl', width=width, height=height)
     fig.show()
 
-def plot_histogram_plotly(df, col):
+def plot_histogram_plotly(df, col, bins=50):
     """
-    Create a histogram using Plotly.
+    Create a histogram using Plotly. Bins are counted up front and only the counts are plotted.
 
     Parameters:
-    - df (pd.DataFrame): The data frame containing the data to plot.
+    - df (pd.DataFrame or TableSource): The data to plot; a TableSource is aggregated in the database.
     - col (str): The name of the column to use for the histogram.
+    - bins (int): Number of bins.
     """
-    fig = px.histogram(df, x=col, title="Histogram")
+    counts, edges = histogram_bins(df, col, bins)
+    fig = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges)))
+    fig.update_layout(title="Histogram", xaxis_title=col, yaxis_title='Frequency', bargap=0)
     fig.show()
 
-def plot_bar_plotly(df, x_col, y_col):
+def plot_bar_plotly(df, x_col, y_col, agg='sum', top_n=50):
     """
-    Create a bar plot using Plotly.
+    Create a bar plot using Plotly, with one bar per category of x_col.
 
     Parameters:
-    - df (pd.DataFrame): The data frame containing the data to plot.
+    - df (pd.DataFrame or TableSource): The data to plot; a TableSource is aggregated in the database.
     - x_col (str): The name of the column to use for the x-axis.
     - y_col (str): The name of the column to use for the y-axis.
+    - agg (str): How y values of a category are combined: 'sum', 'mean', 'count', 'min' or 'max'.
+    - top_n (int): Number of largest categories to show.
     """
-    fig = px.bar(df, x=x_col, y=y_col, title="Bar Plot")
+    totals = grouped_totals(df, x_col, y_col, agg, top_n)
+    fig = px.bar(totals, x=x_col, y=y_col, title="Bar Plot")
+    fig.update_xaxes(type='category')
     fig.show()
 
 def plot_box_plotly(df, col):
     """
-    Create a box plot using Plotly.
+    Create a box plot using Plotly from a precomputed five-number summary.
 
     Parameters:
-    - df (pd.DataFrame): The data frame containing the data to plot.
+    - df (pd.DataFrame or TableSource): The data to plot; a TableSource is aggregated in the database.
     - col (str): The name of the column to use for the box plot.
     """
-    fig = px.box(df, y=col, title="Box Plot")
+    summary = five_number_summary(df, col)
+    if summary is None:
+        fig = go.Figure()
+        fig.update_layout(title=f"Box Plot: {col} has no numeric values", yaxis_title=col)
+        fig.show()
+        return
+    fig = go.Figure(go.Box(name=col, q1=[summary['q1']], median=[summary['median']], q3=[summary['q3']],
+                           lowerfence=[summary['lower_fence']], upperfence=[summary['upper_fence']]))
+    fig.update_layout(title="Box Plot", yaxis_title=col)
     fig.show()
 
 def plot_heatmap_plotly(df, cols):
     """
-    Create a heatmap using Plotly.
+    Create a correlation heatmap using Plotly.
+    The matrix comes from the cached correlation service; cell labels are only drawn for small matrices.
 
     Parameters:
     - df (pd.DataFrame): The data frame containing the data to plot.
     - cols (list): The columns to use for the heatmap.
     """
-    corr_matrix = df[cols].corr()
-    fig = px.imshow(corr_matrix, text_auto=True, title="Heatmap")
+    corr_matrix = correlation_matrix(df, cols)
+    fig = px.imshow(corr_matrix, text_auto='.2f' if len(cols) <= 20 else False, title="Heatmap",
+                    color_continuous_scale='RdBu_r', zmin=-1, zmax=1)
     fig.show()
 
 # Bokeh Visualizations
-def plot_scatter_bokeh(df, x_col, y_col, output_filename="scatter.html"):
+def plot_scatter_bokeh(df, x_col, y_col, output_filename="scatter.html", width=1200, height=800,
+                       x_range=None, y_range=None):
     """
     Create a scatter plot using Bokeh and save it as an HTML file.
+    Up to one marker per 20 pixels is drawn with WebGL; larger data is binned into a density
+    image at the plot's resolution.
 
     Parameters:
     - df (pd.DataFrame): The data frame containing the data to plot.
     - x_col (str): The name of the column to use for the x-axis.
     - y_col (str): The name of the column to use for the y-axis.
     - output_filename (str): The name of the output HTML file.
+    - width (int): Plot width in pixels.
+    - height (int): Plot height in pixels.
+    - x_range (tuple, optional): Visible x window; call again with the zoomed window to re-aggregate.
+    - y_range (tuple, optional): Visible y window.
     """
-    p = figure(title="Scatter Plot", x_axis_label=x_col, y_axis_label=y_col)
-    p.scatter(df[x_col], df[y_col])
+    p = figure(title="Scatter Plot", x_axis_label=x_col, y_axis_label=y_col, width=width, height=height,
+               output_backend="webgl")
+    if scatter_plan(len(df), width, height) == 'points':
+        p.scatter(df[x_col], df[y_col])
+    else:
+        counts, x_edges, y_edges = density_grid(df[x_col], df[y_col], width // 2, height // 2, x_range, y_range)
+        p.image(image=[np.where(counts > 0, counts, np.nan)], x=x_edges[0], y=y_edges[0],
+                dw=x_edges[-1] - x_edges[0], dh=y_edges[-1] - y_edges[0], palette="Viridis256")
+    if x_range is not None:
+        p.x_range.start, p.x_range.end = x_range
+    if y_range is not None:
+        p.y_range.start, p.y_range.end = y_range
     output_file(output_filename)
     save(p)
 
-def plot_line_bokeh(df, x_col, y_col, output_filename="line.html"):
+def plot_line_bokeh(df, x_col, y_col, output_filename="line.html", width=1200, height=800, method='lttb',
+                    x_range=None):
     """
     Create a line plot using Bokeh and save it as an HTML file.
+    The series is downsampled to at most two points per pixel (LTTB or min-max) and drawn with WebGL.
 
     Parameters:
     - df (pd.DataFrame): The data frame containing the data to plot.
     - x_col (str): The name of the column to use for the x-axis.
     - y_col (str): The name of the column to use for the y-axis.
     - output_filename (str): The name of the output HTML file.
+    - width (int): Plot width in pixels.
+    - height (int): Plot height in pixels.
+    - method (str): Downsampling method, 'lttb' or 'minmax'.
+    - x_range (tuple, optional): Visible x window; call again with the zoomed window to re-aggregate.
     """
-    p = figure(title="Line Plot", x_axis_label=x_col, y_axis_label=y_col)
-    p.line(df[x_col], df[y_col], line_width=2)
+    rows = df.iloc[downsample_line(df[x_col], df[y_col], width, method, x_range)]
+    x_axis_type = 'datetime' if pd.api.types.is_datetime64_any_dtype(df[x_col]) else 'auto'
+    p = figure(title="Line Plot", x_axis_label=x_col, y_axis_label=y_col, width=width, height=height,
+               x_axis_type=x_axis_type, output_backend="webgl")
+    p.line(rows[x_col], rows[y_col], line_width=2)
     output_file(output_filename)
     save(p)
 
-def plot_histogram_bokeh(df, col, output_filename="histogram.html"):
+def plot_histogram_bokeh(df, col, output_filename="histogram.html", bins=50):
     """
     Create a histogram using Bokeh and save it as an HTML file.
 
     Parameters:
-    - df (pd.DataFrame): The data frame containing the data to plot.
+    - df (pd.DataFrame or TableSource): The data to plot; a TableSource is aggregated in the database.
     - col (str): The name of the column to use for the histogram.
     - output_filename (str): The name of the output HTML file.
+    - bins (int): Number of bins.
     """
     p = figure(title="Histogram", x_axis_label=col, y_axis_label='Frequency')
-    hist, edges = np.histogram(df[col], bins=50)
+    hist, edges = histogram_bins(df, col, bins)
     p.quad(top=hist, bottom=0, left=edges[:-1], right=edges[1:])
     output_file(output_filename)
     save(p)
 
-def plot_bar_bokeh(df, x_col, y_col, output_filename="bar.html"):
+def plot_bar_bokeh(df, x_col, y_col, output_filename="bar.html", agg='sum', top_n=50):
     """
-    Create a bar plot using Bokeh and save it as an HTML file.
+    Create a bar plot using Bokeh and save it as an HTML file, with one bar per category of x_col.
 
     Parameters:
-    - df (pd.DataFrame): The data frame containing the data to plot.
+    - df (pd.DataFrame or TableSource): The data to plot; a TableSource is aggregated in the database.
     - x_col (str): The name of the column to use for the x-axis.
     - y_col (str): The name of the column to use for the y-axis.
     - output_filename (str): The name of the output HTML file.
+    - agg (str): How y values of a category are combined: 'sum', 'mean', 'count', 'min' or 'max'.
+    - top_n (int): Number of largest categories to show.
     """
-    p = figure(title="Bar Plot", x_axis_label=x_col, y_axis_label=y_col)
-    p.vbar(x=df[x_col], top=df[y_col], width=0.9)
+    totals = grouped_totals(df, x_col, y_col, agg, top_n)
+    categories = totals[x_col].astype(str).tolist()
+    p = figure(title="Bar Plot", x_axis_label=x_col, y_axis_label=y_col, x_range=categories)
+    p.vbar(x=categories, top=totals[y_col].tolist(), width=0.9)
     output_file(output_filename)
     save(p)
 
 def plot_box_bokeh(df, col, output_filename="box.html"):
     """
-    Create a box plot using Bokeh and save it as an HTML file.
+    Create a box plot using Bokeh from a precomputed five-number summary and save it as an HTML file.
 
     Parameters:
-    - df (pd.DataFrame): The data frame containing the data to plot.
+    - df (pd.DataFrame or TableSource): The data to plot; a TableSource is aggregated in the database.
     - col (str): The name of the column to use for the box plot.
     - output_filename (str): The name of the output HTML file.
     """
-    p = figure(title="Box Plot", y_axis_label=col)
-    p.boxplot(df[col])
+    summary = five_number_summary(df, col)
+    if summary is None:
+        p = figure(title="Box Plot", y_axis_label=col, x_range=[col])
+        p.text(x=[col], y=[0], text=[f'{col} has no numeric values'], text_align='center')
+        output_file(output_filename)
+        save(p)
+        return
+    p = figure(title="Box Plot", y_axis_label=col, x_range=[col])
+    p.segment(x0=[col, col], y0=[summary['lower_fence'], summary['q3']],
+              x1=[col, col], y1=[summary['q1'], summary['upper_fence']], line_color='black')
+    p.vbar(x=[col, col], bottom=[summary['q1'], summary['median']], top=[summary['median'], summary['q3']],
+           width=0.5, fill_color=['#1f77b4', '#aec7e8'], line_color='black')
     output_file(output_filename)
     save(p)
 
 def plot_heatmap_bokeh(df, cols, output_filename="heatmap.html"):
     """
-    Create a heatmap using Bokeh and save it as an HTML file.
+    Create a correlation heatmap using Bokeh and save it as an HTML file.
+    The matrix comes from the cached correlation service and is drawn as colour-mapped rects.
 
     Parameters:
     - df (pd.DataFrame): The data frame containing the data to plot.
     - cols (list): The columns to use for the heatmap.
     - output_filename (str): The name of the output HTML file.
     """
-    corr_matrix = df[cols].corr()
-    p = figure(title="Heatmap")
-    heatmap = sns.heatmap(corr_matrix, annot=True, cmap='coolwarm')
-    plt.savefig(output_filename)
-    plt.close()
\ No newline at end of file
+    corr_matrix = correlation_matrix(df, cols)
+    names = [str(col) for col in cols]
+    source = ColumnDataSource(data={
+        'x': np.tile(names, len(names)),
+        'y': np.repeat(names, len(names)),
+        'value': corr_matrix.to_numpy().ravel(),
+    })
+    mapper = LinearColorMapper(palette=list(reversed(RdBu11)), low=-1, high=1, nan_color='lightgray')
+    size = min(1200, max(400, 20 * len(names)))
+    p = figure(title="Heatmap", x_range=names, y_range=list(reversed(names)), width=size, height=size,
+               tools="pan,wheel_zoom,box_zoom,reset,save", output_backend="webgl")
+    p.rect(x='x', y='y', width=1, height=1, source=source, line_color=None,
+           fill_color={'field': 'value', 'transform': mapper})
+    if len(names) <= 20:
+        source.data['label'] = [f"{value:.2f}" for value in source.data['value']]
+        p.text(x='x', y='y', text='label', source=source, text_align='center', text_baseline='middle',
+               text_font_size='9pt')
+    p.add_tools(HoverTool(tooltips=[('x', '@x'), ('y', '@y'), ('r', '@value{0.000}')]))
+    p.add_layout(ColorBar(color_mapper=mapper), 'right')
+    p.xaxis.major_label_orientation = np.pi / 3
+    p.grid.grid_line_color = None
+    output_file(output_filename)
+    save(p)
\ No newline at end of file
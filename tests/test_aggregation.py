@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from gui.aggregation import TableSource, histogram_bins, five_number_summary, grouped_totals
+
+class TestAggregation(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp_dir.name, 'test.db')}")
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame({'value': rng.normal(size=5000), 'group': rng.choice(list('abcde'), size=5000)})
+        self.df.to_sql('measurements', self.engine, index=False)
+        self.source = TableSource(self.engine, 'measurements')
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmp_dir.cleanup()
+
+    def test_histogram_pushdown_matches_numpy(self):
+        counts, edges = histogram_bins(self.df, 'value', bins=20)
+        sql_counts, sql_edges = histogram_bins(self.source, 'value', bins=20)
+        np.testing.assert_allclose(sql_edges, edges)
+        np.testing.assert_array_equal(sql_counts, counts)
+
+    def test_histogram_pushdown_values_below_maximum(self):
+        df = pd.DataFrame({'value': [0.0, 0.5, np.nextafter(1.0, 0), 1.0]})
+        df.to_sql('edges', self.engine, index=False)
+        for bins in (3, 7, 49):
+            counts, _ = histogram_bins(TableSource(self.engine, 'edges'), 'value', bins=bins)
+            np.testing.assert_array_equal(counts, np.histogram(df['value'], bins=bins)[0])
+
+    def test_five_number_summary(self):
+        exact = five_number_summary(self.df, 'value')
+        approximate = five_number_summary(self.source, 'value')
+        self.assertEqual(approximate['min'], exact['min'], "Minimum should be exact")
+        self.assertEqual(approximate['max'], exact['max'], "Maximum should be exact")
+        for key in ('q1', 'median', 'q3'):
+            self.assertAlmostEqual(approximate[key], exact[key], delta=0.01, msg=f"{key} should be close")
+        self.assertGreaterEqual(exact['lower_fence'], exact['min'], "Whisker should not pass the minimum")
+
+    def test_five_number_summary_without_values(self):
+        self.assertIsNone(five_number_summary(pd.DataFrame({'value': [np.nan, np.nan]}), 'value'))
+
+    def test_grouped_totals(self):
+        expected = self.df.groupby('group')['value'].sum().sort_values(ascending=False)
+        totals = grouped_totals(self.source, 'group', 'value', top_n=3)
+        self.assertEqual(totals['group'].tolist(), expected.index[:3].tolist(), "Largest groups should come first")
+        np.testing.assert_allclose(totals['value'], expected.to_numpy()[:3])
+        local = grouped_totals(self.df, 'group', 'value', top_n=3)
+        self.assertEqual(local['group'].tolist(), totals['group'].tolist(), "NumPy and SQL should agree")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,202 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from pyod.models.knn import KNN
+from sklearn.ensemble import IsolationForest
+from data_cleaning.model_registry import ModelRegistry
+from data_cleaning.anomaly_detection import (detect_anomalies_knn_scalable, _detector_scores, build_autoencoder,
+                                             reconstruction_errors, detect_anomalies_autoencoder, _window_starts,
+                                             window_scores_to_rows, detect_anomalies_lstm,
+                                             detect_anomalies_isolation_forest, prepare_features,
+                                             detect_anomalies_default, handle_anomalies, detect_anomalies_ensemble,
+                                             score_anomalies, detect_anomalies_custom)
+
+class TestAnomalyDetection(unittest.TestCase):
+
+    def setUp(self):
+        self.columns = ['A', 'B', 'C']
+        self.X = np.random.default_rng(0).normal(size=(2000, 3)).astype(np.float32)
+        self.df = pd.DataFrame(self.X, columns=self.columns)
+
+    def test_reconstruction_errors_per_row(self):
+        X = np.random.default_rng(1).random((50, 3)).astype(np.float32)
+        model = build_autoencoder(3)
+        expected = np.mean((model.predict(X, verbose=0) - X) ** 2, axis=1)
+        errors = reconstruction_errors(model, X, chunk_size=7)
+        self.assertEqual(errors.shape, (50,), "There should be one error per row")
+        np.testing.assert_allclose(errors, expected, rtol=1e-4, atol=1e-6)
+
+    def test_autoencoder_flags_rows_above_quantile(self):
+        df = pd.DataFrame(np.random.default_rng(2).random((400, 3)), columns=self.columns)
+        df.iloc[:10] = 5.0
+        result = detect_anomalies_autoencoder(df, self.columns, epochs=2, batch_size=64, quantile=0.95)
+        self.assertGreater(result['reconstruction_loss'].nunique(), 1, "Errors should be per row, not per batch")
+        self.assertEqual(int(result['anomaly'].sum()), 20, "Rows above the 0.95 quantile should be flagged")
+        self.assertTrue(result['anomaly'].iloc[:10].all(), "Rows far outside the data should be flagged")
+
+    def test_windows_do_not_cross_entities(self):
+        df = pd.DataFrame({'entity': ['a'] * 5 + ['b'] * 2 + ['c'] * 4})
+        self.assertEqual(_window_starts(df, 3).tolist(), list(range(9)))
+        self.assertEqual(_window_starts(df, 3, 'entity').tolist(), [0, 1, 2, 7, 8],
+                         "Windows should only start where they fit inside one entity")
+
+    def test_window_scores_to_rows_averages_overlaps(self):
+        window_errors = np.arange(12, dtype=np.float32).reshape(4, 3)
+        starts = np.array([0, 1, 2, 5])
+        expected = np.full(9, np.nan)
+        for row in range(9):
+            covering = [window_errors[w, row - start] for w, start in enumerate(starts) if start <= row < start + 3]
+            if covering:
+                expected[row] = np.mean(covering)
+        np.testing.assert_allclose(window_scores_to_rows(window_errors, starts, 9), expected, rtol=1e-6)
+
+    def test_lstm_scores_every_covered_row(self):
+        values = np.sin(np.arange(120) / 5)
+        values[60] = 8.0
+        df = pd.DataFrame({'value': values, 'entity': ['a'] * 60 + ['b'] * 58 + ['c'] * 2})
+        result = detect_anomalies_lstm(df, 'value', time_steps=5, epochs=1, batch_size=16, entity_column='entity')
+        loss = result['reconstruction_loss']
+        self.assertTrue(loss.iloc[:118].notna().all(), "Every row inside a window should get a score")
+        self.assertTrue(loss.iloc[118:].isna().all(), "Rows of a series shorter than a window have no score")
+        self.assertTrue(result['anomaly'].iloc[60], "The spike should be flagged")
+
+    def test_isolation_forest_chunked_scores_match_sklearn(self):
+        reference = IsolationForest(contamination=0.1, random_state=0).fit(self.X)
+        result = detect_anomalies_isolation_forest(self.df.copy(), self.columns, chunk_size=300, n_jobs=2, random_state=0)
+        np.testing.assert_allclose(result['anomaly_score'], reference.score_samples(self.X), rtol=1e-5)
+        self.assertEqual(result['anomaly'].tolist(), reference.predict(self.X).tolist(), "Labels should match sklearn")
+
+    def test_isolation_forest_on_sample(self):
+        df = self.df.copy()
+        df.iloc[:10] = 8.0
+        result = detect_anomalies_isolation_forest(df, self.columns, sample_size=500, random_state=0)
+        self.assertTrue((result['anomaly'].iloc[:10] == -1).all(), "Extreme rows should be flagged")
+        self.assertAlmostEqual((result['anomaly'] == -1).mean(), 0.1, delta=0.03,
+                               msg="The threshold calibrated on the sample should hold on all rows")
+
+    def test_prepare_features(self):
+        df = pd.DataFrame({'A': [1.0, 2.0, np.nan, 4.0, 100.0], 'B': [5, 5, 5, 5, 5]})
+        prepared = prepare_features(df, ['A', 'B'])
+        self.assertEqual(prepared.dtypes.tolist(), [np.float32, np.float32])
+        self.assertFalse(prepared.isna().any().any(), "Missing values should be filled with the median")
+        self.assertEqual(prepared['A'].iloc[2], 0, "The median should be centred at zero")
+        self.assertTrue((prepared['B'] == 0).all(), "Constant columns should not be divided by zero")
+
+    def test_default_detectors_flag_outliers(self):
+        df = self.df.copy()
+        # Scattered outliers: identical ones would be each other's nearest neighbours
+        df.iloc[:10] = np.random.default_rng(3).uniform(6, 12, size=(10, 3)).astype(np.float32)
+        for method in ('isolation_forest', 'knn'):
+            result = detect_anomalies_default(df.copy(), self.columns, method=method, sample_size=1000)
+            self.assertEqual(set(result['anomaly'].unique()), {0, 1}, f"{method} labels should be 0 or 1")
+            self.assertTrue(result['anomaly'].iloc[:10].all(), f"{method} should flag the extreme rows")
+            self.assertGreater(result['anomaly_score'].iloc[:10].min(), result['anomaly_score'].iloc[10:].median(),
+                               f"{method} scores should be higher for anomalies")
+        with self.assertRaises(ValueError):
+            detect_anomalies_default(df, self.columns, method='unknown')
+
+    def test_default_registry_models_keep_their_scaling(self):
+        # Raw features far from the unit scale, so scoring them unprepared would flag almost every row
+        df = pd.DataFrame(self.X * 1000 + 5000, columns=self.columns)
+        df.iloc[:10] = np.random.default_rng(3).uniform(11000, 17000, size=(10, 3)).astype(np.float32)
+        params = {'contamination': 0.1, 'sample_size': 1000}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            registry = ModelRegistry(tmp_dir)
+            for method in ('isolation_forest', 'knn'):
+                fitted = detect_anomalies_default(df.copy(), self.columns, method=method, registry=registry, **params)
+                self.assertEqual(registry.versions(method, self.columns, params), [],
+                                 "Default models should not share keys with models fitted on raw features")
+                _, meta = registry.load(f'default_{method}', self.columns, params)
+                self.assertEqual(set(meta['extra']), {'median', 'iqr', 'threshold'})
+                scored = score_anomalies(df.iloc[:500].copy(), self.columns, f'default_{method}', registry, params)
+                self.assertTrue(scored['anomaly'].iloc[:10].all(), f"{method} should flag the extreme rows")
+                self.assertLess(scored['anomaly'].mean(), 0.2, f"{method} should score new rows on the prepared scale")
+                if method == 'isolation_forest':
+                    np.testing.assert_allclose(scored['anomaly_score'], fitted['anomaly_score'].iloc[:500], rtol=1e-5)
+                    self.assertEqual(scored['anomaly'].tolist(), fitted['anomaly'].iloc[:500].tolist(),
+                                     "The score-only path should label rows like the fit")
+
+    def test_custom_model_gets_a_float_matrix(self):
+        df = pd.DataFrame({'A': pd.array([1, None, 3], dtype='Int64'), 'B': [0.5, 1.5, 2.5], 'C': ['x', 'y', 'z']})
+        with patch.dict('data_cleaning.anomaly_detection.config', {'custom_model_code': 'class CustomModel: pass'}), \
+                patch('data_cleaning.custom_model_runner.run_custom_model', return_value=np.zeros(3)) as run:
+            detect_anomalies_custom(df, ['A', 'B'])
+            X = run.call_args[0][2]
+            self.assertEqual(X.dtype, np.float64, "Nullable and mixed numeric columns should give a float64 matrix")
+            self.assertTrue(np.isnan(X[1, 0]), "Missing values should be passed as NaN")
+            with self.assertRaises(ValueError):
+                detect_anomalies_custom(df, ['A', 'C'])
+
+    def test_backend_switch(self):
+        with patch('data_cleaning.anomaly_detection.detect_anomalies_default') as default, \
+                patch('data_cleaning.anomaly_detection.detect_anomalies_pycaret') as pycaret:
+            handle_anomalies(self.df, self.columns)
+            handle_anomalies(self.df, self.columns, backend='pycaret')
+        default.assert_called_once()
+        pycaret.assert_called_once()
+
+    def test_ensemble_on_shared_memory_and_memmap(self):
+        df = self.df.copy()
+        # Scattered outliers: identical ones would be each other's nearest neighbours
+        df.iloc[:10] = np.random.default_rng(3).uniform(6, 12, size=(10, 3)).astype(np.float32)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            shared = detect_anomalies_ensemble(df.copy(), self.columns, n_jobs=3, random_state=0)
+            mapped = detect_anomalies_ensemble(df.copy(), self.columns, combine='max', memmap_dir=tmp_dir, random_state=0)
+            self.assertEqual(os.listdir(tmp_dir), [], "The memory-mapped matrix should be removed")
+        for result in (shared, mapped):
+            self.assertTrue(result['anomaly'].iloc[:10].all(), "Rows flagged by every detector should be flagged")
+            self.assertTrue(result['anomaly_score'].between(0, 1).all(), "Combined scores should be percentile ranks")
+            self.assertLessEqual(result['anomaly'].mean(), 0.1)
+        with self.assertRaises(ValueError):
+            detect_anomalies_ensemble(df, self.columns, combine='median')
+
+    def test_knn_scalable_matches_pyod(self):
+        reference = KNN(contamination=0.1).fit(self.X)
+        result = detect_anomalies_knn_scalable(self.df.copy(), self.columns, sample_size=None)
+        np.testing.assert_allclose(result['anomaly_score'], reference.decision_scores_, rtol=1e-5)
+        self.assertEqual(result['anomaly'].tolist(), reference.labels_.tolist(), "Labels should match a full PyOD fit")
+
+    def test_knn_scalable_sampled_flags_contamination(self):
+        result = detect_anomalies_knn_scalable(self.df.copy(), self.columns, sample_size=1000, random_state=0)
+        self.assertEqual(result['anomaly'].sum(), 200, "The threshold should be the contamination quantile of all rows")
+        reference = KNN().fit(self.X).decision_scores_
+        sample_rows = np.sort(np.random.default_rng(0).choice(2000, 1000, replace=False))
+        in_sample = result['anomaly_score'].to_numpy()[sample_rows]
+        self.assertGreater(in_sample.min(), 0, "Sampled rows should not match themselves at distance 0")
+        self.assertGreater(np.corrcoef(result['anomaly_score'], reference)[0, 1], 0.9)
+
+    def test_knn_scalable_reuses_registry_model(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            registry = ModelRegistry(tmp_dir)
+            first = detect_anomalies_knn_scalable(self.df.copy(), self.columns, sample_size=500, random_state=0,
+                                                  registry=registry)
+            second = detect_anomalies_knn_scalable(self.df.copy(), self.columns, sample_size=500, random_state=0,
+                                                   registry=registry)
+        np.testing.assert_array_equal(second['anomaly_score'], first['anomaly_score'],
+                                      "A stored model should score its sample rows the same way")
+
+    def test_knn_scalable_score_path_uses_calibrated_threshold(self):
+        params = {'n_neighbors': 5, 'method': 'largest', 'contamination': 0.1, 'sample_size': 500, 'random_state': 0}
+        new_data = pd.DataFrame(np.random.default_rng(4).normal(scale=1.5, size=(300, 3)), columns=self.columns)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            registry = ModelRegistry(tmp_dir)
+            fitted = detect_anomalies_knn_scalable(self.df.copy(), self.columns, sample_size=500, random_state=0,
+                                                   registry=registry)
+            scored = score_anomalies(new_data.copy(), self.columns, 'knn_scalable', registry, params)
+            _, meta = registry.load('knn_scalable', self.columns, params)
+        threshold = np.quantile(fitted['anomaly_score'], 0.9)
+        self.assertAlmostEqual(meta['extra']['threshold'], threshold, places=5,
+                               msg="The stored threshold should be the contamination quantile of all rows")
+        self.assertEqual(scored['anomaly'].tolist(), (scored['anomaly_score'] > threshold).astype(int).tolist(),
+                         "The score-only path should label with the same threshold as the fit")
+
+    def test_ensemble_knn_member_has_no_self_match(self):
+        scores = _detector_scores('knn', self.X, sample_size=1000, random_state=0)
+        self.assertEqual(len(scores), len(self.X))
+        self.assertGreater(scores.min(), 0, "No row should be scored against itself")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import json
+import pickle
+import tempfile
+import unittest
+import pandas as pd
+from sqlalchemy import create_engine
+from cli import build_jobs, main
+
+class TestCli(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_name = os.path.join(self.tmp_dir.name, 'warehouse')
+        engine = create_engine(f'sqlite:///{self.db_name}.db')
+        pd.DataFrame({'a': [1.0, None, 3.0, 3.0], 'b': [1, 2, 3, 3]}).to_sql('sales', engine, index=False)
+        pd.DataFrame({'a': [None, 4.0], 'b': [5, 6]}).to_sql('returns', engine, index=False)
+        engine.dispose()
+        self.spec = {
+            'connection': {'db_type': 'sqlite', 'db_name': self.db_name},
+            'pipeline': {'strategy': 'mean', 'columns': 'a'},
+            'tables': ['sales', {'table': 'returns', 'output': {'mode': 'table', 'suffix': '_clean'}}, 'missing'],
+            'output': {'mode': 'file', 'directory': os.path.join(self.tmp_dir.name, 'out'), 'format': 'parquet'},
+            'workers': 2,
+            'config': {'query_history_path': None},
+        }
+        self.spec_path = os.path.join(self.tmp_dir.name, 'spec.json')
+        with open(self.spec_path, 'w') as file:
+            json.dump(self.spec, file)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_build_jobs_overrides(self):
+        jobs = build_jobs(self.spec, tables=['returns'])
+        self.assertEqual(len(jobs), 1)
+        self.assertEqual(jobs[0]['output']['mode'], 'table', "Per-table output should override the default")
+        self.assertEqual(jobs[0]['pipeline']['strategy'], 'mean', "Per-table jobs should inherit the pipeline")
+
+    def test_run(self):
+        report_path = os.path.join(self.tmp_dir.name, 'report.json')
+        self.assertEqual(main([self.spec_path, '--report', report_path]), 1, "A failed job should fail the run")
+        with open(report_path) as file:
+            report = json.load(file)
+        jobs = {job['table']: job for job in report['jobs']}
+        self.assertEqual((report['succeeded'], report['failed']), (2, 1))
+        self.assertEqual(jobs['missing']['status'], 'failed', "An unknown table should be reported as failed")
+
+        sales = pd.read_parquet(jobs['sales']['output'])
+        self.assertEqual((jobs['sales']['rows_in'], jobs['sales']['rows_out']), (4, 3), "Duplicates should be removed")
+        self.assertFalse(sales['a'].isnull().any(), "Missing values should be imputed")
+        self.assertEqual([step['name'] for step in jobs['sales']['steps']], ['Missing values', 'Remove duplicates'])
+
+        engine = create_engine(f'sqlite:///{self.db_name}.db')
+        self.assertEqual(pd.read_sql('SELECT * FROM returns_clean', engine)['a'].tolist(), [4.0, 4.0])
+        engine.dispose()
+
+    def test_report_larger_than_pipe_buffer(self):
+        # One date step per column makes the job report (steps and plan) larger than a pipe buffer
+        columns = [f'd{i}' for i in range(1000)]
+        engine = create_engine(f'sqlite:///{self.db_name}.db')
+        pd.DataFrame({column: ['2024-01-01', '2024-01-02'] for column in columns}).to_sql('wide', engine, index=False)
+        engine.dispose()
+        spec = dict(self.spec, tables=['wide'], pipeline={'date_columns': ','.join(columns)}, timeout=60)
+        with open(self.spec_path, 'w') as file:
+            json.dump(spec, file)
+        report_path = os.path.join(self.tmp_dir.name, 'report.json')
+        self.assertEqual(main([self.spec_path, '--report', report_path]), 0)
+        with open(report_path) as file:
+            job = json.load(file)['jobs'][0]
+        self.assertEqual(job['status'], 'ok', "A large report should be read before the job is joined")
+        self.assertGreater(len(pickle.dumps(job)), 1 << 17)
+
+if __name__ == '__main__':
+    unittest.main()
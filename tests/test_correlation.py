@@ -0,0 +1,54 @@
+import unittest
+from unittest.mock import patch
+import numpy as np
+import pandas as pd
+from gui.correlation import CorrelationAccumulator, CorrelationService
+
+class TestCorrelation(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        base = rng.normal(size=20000)
+        self.df = pd.DataFrame({
+            'a': base,
+            'b': 2 * base + rng.normal(scale=0.5, size=len(base)),
+            'c': 1e6 + rng.normal(size=len(base)),
+            'd': -base,
+        })
+        self.df.loc[::7, 'b'] = np.nan
+        self.columns = ['a', 'b', 'c', 'd']
+
+    def test_matches_pandas(self):
+        accumulator = CorrelationAccumulator(self.columns)
+        for start in range(0, len(self.df), 3000):
+            accumulator.partial_fit(self.df.iloc[start:start + 3000])
+        np.testing.assert_allclose(accumulator.correlation().to_numpy(), self.df[self.columns].corr().to_numpy(),
+                                   atol=1e-4, err_msg="Chunked float32 correlation should match pandas")
+
+    def test_cache_and_append(self):
+        service = CorrelationService(chunk_size=5000)
+        head = self.df.iloc[:12000]
+        service.correlation(head, self.columns)
+        with patch.object(CorrelationAccumulator, 'partial_fit', autospec=True,
+                          side_effect=CorrelationAccumulator.partial_fit) as partial_fit:
+            service.correlation(head, self.columns)
+            self.assertEqual(partial_fit.call_count, 0, "Unchanged data should be served from the cache")
+            appended = service.correlation(self.df, self.columns)
+            self.assertEqual(sum(len(call.args[1]) for call in partial_fit.call_args_list), len(self.df) - len(head),
+                             "Only the appended rows should be processed")
+        np.testing.assert_allclose(appended.to_numpy(), self.df[self.columns].corr().to_numpy(), atol=1e-4)
+
+        changed = self.df.copy()
+        changed.loc[0, 'a'] = 100.0
+        np.testing.assert_allclose(service.correlation(changed, self.columns).to_numpy(),
+                                   changed[self.columns].corr().to_numpy(), atol=1e-4,
+                                   err_msg="Edited data should not reuse the cached matrix")
+
+    def test_constant_column(self):
+        df = pd.DataFrame({'a': [1.0, 2.0, 3.0], 'b': [5.0, 5.0, 5.0]})
+        corr = CorrelationAccumulator(['a', 'b']).partial_fit(df).correlation()
+        self.assertEqual(corr.loc['a', 'a'], 1.0)
+        self.assertTrue(np.isnan(corr.loc['a', 'b']), "A constant column has no correlation")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import numpy as np
+from data_cleaning.custom_model_runner import run_custom_model, validate_custom_model, CustomModelError
+
+MODEL_CODE = '''
+import numpy as np
+
+class CustomModel:
+    def set_params(self, **params):
+        self.quantile = params.get('quantile', 0.9)
+
+    def fit(self, X, y=None):
+        self.threshold_ = np.quantile(X[:, 0], self.quantile)
+
+    def predict(self, X):
+        return (X[:, 0] > self.threshold_).astype(int)
+'''
+
+SLOW_MODEL_CODE = '''
+import time
+
+class CustomModel:
+    def set_params(self, **params):
+        pass
+
+    def fit(self, X, y=None):
+        pass
+
+    def predict(self, X):
+        time.sleep(60)
+'''
+
+MIXED_DTYPE_MODEL_CODE = '''
+import numpy as np
+
+class CustomModel:
+    def set_params(self, **params):
+        pass
+
+    def fit(self, X, y=None):
+        pass
+
+    def predict(self, X):
+        # Integer scores for the first batch, fractional ones afterwards
+        return X[:, 0].astype(int) if X[0, 0] == 0 else X[:, 0] + 0.5
+'''
+
+class TestCustomModelRunner(unittest.TestCase):
+
+    def test_batched_predictions_match_in_process(self):
+        X = np.arange(1000, dtype=np.float64).reshape(-1, 1)
+        progress = []
+        predictions = run_custom_model(MODEL_CODE, {'quantile': 0.9}, X, batch_size=128, n_workers=2,
+                                       progress_callback=lambda done, total: progress.append(done))
+        expected = (X[:, 0] > np.quantile(X[:, 0], 0.9)).astype(int)
+        np.testing.assert_array_equal(predictions, expected)
+        self.assertEqual(progress[-1], len(X), "Progress should reach the number of rows")
+
+    def test_timeout(self):
+        X = np.zeros((10, 1))
+        with self.assertRaises(CustomModelError):
+            run_custom_model(SLOW_MODEL_CODE, {}, X, n_workers=1, timeout=2)
+
+    def test_mixed_batch_dtypes_are_not_truncated(self):
+        X = np.arange(20, dtype=np.float64).reshape(-1, 1)
+        predictions = run_custom_model(MIXED_DTYPE_MODEL_CODE, {}, X, batch_size=10, n_workers=1)
+        self.assertEqual(predictions.dtype, np.float64, "Predictions should hold the widest batch dtype")
+        np.testing.assert_array_equal(predictions[10:], X[10:, 0] + 0.5)
+
+    def test_rejects_non_positive_batch_size_and_timeout(self):
+        X = np.zeros((10, 1))
+        for kwargs in ({'batch_size': 0}, {'batch_size': -5}, {'timeout': 0}):
+            with self.subTest(**kwargs), self.assertRaises(CustomModelError):
+                run_custom_model(MODEL_CODE, {}, X, **kwargs)
+
+    def test_validate_rejects_missing_set_params(self):
+        code = 'class CustomModel:\n    def fit(self, X):\n        pass\n    def predict(self, X):\n        pass\n'
+        with self.assertRaisesRegex(CustomModelError, 'set_params'):
+            validate_custom_model(code, {'a': 1})
+
+    def test_validate_rejects_missing_class(self):
+        with self.assertRaises(CustomModelError):
+            validate_custom_model('class OtherModel:\n    pass\n', {})
+
+if __name__ == '__main__':
+    unittest.main()
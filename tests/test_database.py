@@ -1,5 +1,9 @@
 import unittest
+from unittest.mock import patch
+import pandas as pd
+from sqlalchemy import create_engine
 from database.connection import get_engine, test_connection
+from database.fetch_data import fetch_data_chunks
 
 class TestDatabase(unittest.TestCase):
 
@@ -44,5 +48,23 @@ class TestDatabase(unittest.TestCase):
         """
         self.assertTrue(test_connection(self.oracle_engine), "Oracle database connection failed")
 
+class TestFetchData(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine('sqlite://')
+
+    def tearDown(self):
+        self.engine.dispose()
+
+    def test_stream_errors_propagate(self):
+        def failing_read_sql(*args, **kwargs):
+            yield pd.DataFrame({'id': [1]})
+            raise ConnectionError('connection lost')
+        chunks = fetch_data_chunks(self.engine, 'events', chunksize=100)
+        with patch('database.fetch_data.pd.read_sql', failing_read_sql):
+            self.assertEqual(len(next(chunks)), 1)
+            with self.assertRaises(ConnectionError, msg="A failed stream should not look like the end of the table"):
+                next(chunks)
+
 if __name__ == '__main__':
     unittest.main()
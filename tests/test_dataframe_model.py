@@ -0,0 +1,96 @@
+import unittest
+import numpy as np
+import pandas as pd
+from unittest.mock import patch
+from PySide6.QtCore import Qt
+from gui.dataframe_model import DataFrameModel
+from gui.sort_worker import sort_permutation
+
+def run_now(worker):
+    # Stands in for QThreadPool.start: the worker's signals are then delivered directly
+    worker.run()
+
+class TestDataFrameModel(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({'A': [3.0, np.nan, 1.0, 2.0] * 5, 'B': list('wxyz') * 5})
+        self.model = DataFrameModel(self.df, page_size=8)
+
+    def text(self, row, column):
+        return self.model.data(self.model.index(row, column))
+
+    def test_fetch_more(self):
+        self.assertEqual(self.model.rowCount(), 8, "Only the first page should be exposed")
+        while self.model.canFetchMore():
+            self.model.fetchMore()
+        self.assertEqual(self.model.rowCount(), len(self.df), "Fetching should expose every row")
+
+    @patch('gui.dataframe_model.QThreadPool.globalInstance')
+    def test_sort_with_cached_index(self, mock_pool):
+        mock_pool.return_value.start.side_effect = run_now
+        self.model.sort(0, Qt.AscendingOrder)
+        self.assertEqual([self.text(row, 0) for row in range(3)], ['1', '1', '1'], "Smallest values should come first")
+        self.assertIn((0, True), self.model._sort_cache, "Sort index should be cached")
+        self.model.sort(0, Qt.DescendingOrder)
+        self.assertEqual(self.text(0, 0), '3', "Largest value should come first")
+        self.model.sort(0, Qt.AscendingOrder)
+        self.assertEqual(mock_pool.return_value.start.call_count, 2, "A cached sort should not be recomputed")
+        self.model.sort(-1)
+        self.assertEqual(self.text(1, 0), '', "Missing values should be shown as empty cells")
+        self.assertIs(self.model.dataframe(), self.df, "The model should not copy the dataframe")
+
+    @patch('gui.dataframe_model.QThreadPool.globalInstance')
+    def test_sort_is_applied_when_ready(self, mock_pool):
+        self.model.sort(0, Qt.AscendingOrder)
+        worker = mock_pool.return_value.start.call_args[0][0]
+        self.assertEqual(self.text(0, 0), '3', "The view should keep its order until the sort is ready")
+        worker.run()
+        self.assertEqual(self.text(0, 0), '1', "The finished sort should be applied")
+
+        self.model.sort(1, Qt.AscendingOrder)
+        stale = mock_pool.return_value.start.call_args[0][0]
+        self.model.append_dataframe(self.df)
+        stale.run()
+        self.assertNotIn((1, True), self.model._sort_cache, "A sort of replaced rows should be dropped")
+
+    def test_sort_permutation(self):
+        values = np.array([2.0, np.nan, 1.0, 2.0, 1.0])
+        np.testing.assert_array_equal(sort_permutation([values]), [2, 4, 0, 3, 1])
+        np.testing.assert_array_equal(sort_permutation([values[:2], values[2:]], ascending=False), [0, 3, 2, 4, 1],
+                                      "Descending sorts should keep ties in order and missing values last")
+        strings = pd.array(['b', None, 'a', 'b'], dtype='string')
+        np.testing.assert_array_equal(sort_permutation([strings]), [2, 0, 3, 1])
+        dates = pd.to_datetime(pd.Series(['2021-01-02', None, '2021-01-01'])).array
+        np.testing.assert_array_equal(sort_permutation([dates], ascending=False), [0, 2, 1])
+
+    def test_summary_header(self):
+        header = self.model.headerData(0, Qt.Horizontal)
+        self.assertIn('5 null', header, "Header should report missing values")
+        self.assertIn('1 .. 3', header, "Header should report the numeric range")
+        self.assertIn('4 distinct', self.model.headerData(1, Qt.Horizontal), "Header should report distinct values")
+
+    @patch('gui.dataframe_model.QThreadPool.globalInstance')
+    def test_append_pages_without_joining(self, mock_pool):
+        mock_pool.return_value.start.side_effect = run_now
+        model = DataFrameModel(page_size=8)
+        pages = [pd.DataFrame({'A': np.arange(start, start + 5), 'B': list('vwxyz')}) for start in range(0, 50, 5)]
+        pages[3] = pages[3].assign(A=[15.5, np.nan, 17.0, 18.0, 19.0])
+        with patch('gui.dataframe_model.pd.concat', wraps=pd.concat) as concat:
+            for page in pages:
+                model.append_dataframe(page)
+            while model.canFetchMore():
+                model.fetchMore()
+            self.assertEqual(concat.call_count, 0, "Appending a page should not copy the rows loaded so far")
+            self.assertEqual(model.rowCount(), 50)
+            self.assertEqual([model.data(model.index(row, 0)) for row in (4, 15, 16, 49)], ['4', '15.5', '', '49'])
+            header = model.headerData(0, Qt.Horizontal)
+            self.assertIn('float64 | 1 null | 0 .. 49', header, "The summary should cover every page")
+            model.sort(0, Qt.DescendingOrder)
+            self.assertEqual(model.data(model.index(0, 0)), '49', "Sorting should span every page")
+            joined = model.dataframe()
+            self.assertIs(model.dataframe(), joined, "Pages should be joined only once")
+        pd.testing.assert_frame_equal(joined, pd.concat(pages, ignore_index=True))
+        self.assertEqual(model.data(model.index(0, 0)), '49', "The view should keep working on the joined frame")
+
+if __name__ == '__main__':
+    unittest.main()
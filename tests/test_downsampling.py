@@ -0,0 +1,56 @@
+import unittest
+import numpy as np
+import pandas as pd
+from gui.downsampling import lttb_indices, min_max_indices, downsample_line, density_grid, scatter_plan
+
+class TestDownsampling(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.x = np.arange(100000, dtype=np.float64)
+        self.y = np.sin(self.x / 5000) + rng.normal(scale=0.01, size=len(self.x))
+        self.y[54321] = 10.0
+
+    def test_lttb_keeps_endpoints_and_spike(self):
+        kept = lttb_indices(self.x, self.y, 500)
+        self.assertEqual(len(kept), 500, "LTTB should return the requested number of points")
+        self.assertEqual((kept[0], kept[-1]), (0, len(self.x) - 1), "Endpoints should be kept")
+        self.assertIn(54321, kept, "A spike should survive downsampling")
+
+    def test_min_max_keeps_extremes(self):
+        kept = min_max_indices(self.y, 200)
+        self.assertLessEqual(len(kept), 800, "At most four points per bucket should be kept")
+        self.assertIn(int(np.argmax(self.y)), kept, "The global maximum should be kept")
+        self.assertIn(int(np.argmin(self.y)), kept, "The global minimum should be kept")
+
+    def test_downsample_line_zoom_and_datetimes(self):
+        x = pd.Series(pd.date_range('2020-01-01', periods=len(self.x), freq='s'))
+        rows = downsample_line(x, self.y, width=100)
+        self.assertEqual(len(rows), 200, "Point count should be bounded by the width")
+        zoomed = downsample_line(self.x, self.y, width=100, x_range=(1000, 2000))
+        self.assertTrue(((self.x[zoomed] >= 1000) & (self.x[zoomed] <= 2000)).all(), "Only the zoomed window should be used")
+
+    def test_datetime_zoom_uses_timestamps(self):
+        x = pd.Series(pd.date_range('2020-01-01', periods=len(self.x), freq='s'))
+        start, end = pd.Timestamp('2020-01-01 00:10'), pd.Timestamp('2020-01-01 00:20')
+        rows = downsample_line(x, self.y, 100, 'lttb', (start, end))
+        self.assertGreater(len(rows), 0, "The zoomed window should not be empty")
+        self.assertTrue(((x.iloc[rows] >= start) & (x.iloc[rows] <= end)).all(), "Only the zoomed window should be used")
+        counts, _, _ = density_grid(x, self.y, width=10, height=10, x_range=(start, end))
+        self.assertEqual(counts.sum(), 601, "Only points inside the Timestamp window should be counted")
+
+    def test_density_grid_without_visible_points(self):
+        counts, x_edges, y_edges = density_grid(np.full(10, np.nan), np.full(10, np.nan), width=40, height=30)
+        self.assertEqual(counts.shape, (30, 40), "An empty grid should keep its shape")
+        self.assertEqual(counts.sum(), 0, "No point should be counted")
+        self.assertEqual((len(x_edges), len(y_edges)), (41, 31), "Edges should match the grid")
+
+    def test_density_grid(self):
+        counts, x_edges, y_edges = density_grid(self.x, self.y, width=40, height=30)
+        self.assertEqual(counts.shape, (30, 40), "Grid should have one cell per bin")
+        self.assertEqual(counts.sum(), len(self.x), "Every point should be counted")
+        self.assertEqual(scatter_plan(10 ** 7), 'density', "Large scatters should be binned")
+        self.assertEqual(scatter_plan(1000), 'points', "Small scatters should be drawn as markers")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from utils.file_operations import (save_csv, load_csv, iter_csv, save_parquet, load_parquet, iter_parquet,
+                                   save_feather, load_feather, load_file, load_excel, iter_excel)
+
+class TestFileOperations(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.df = pd.DataFrame({
+            'id': np.arange(1000),
+            'value': np.linspace(0, 1, 1000),
+            'kind': ['a', 'b', 'c', 'd'] * 250,
+        })
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir.name, name)
+
+    def test_compressed_csv_in_chunks(self):
+        filename = self.path('data.csv.gz')
+        save_csv(self.df, filename)
+        loaded = load_csv(filename, columns=['id', 'kind'])
+        self.assertEqual(list(loaded.columns), ['id', 'kind'], "Only the selected columns should be loaded")
+        chunks = list(iter_csv(filename, chunksize=300, block_size=4096))
+        self.assertEqual([len(chunk) for chunk in chunks], [300, 300, 300, 100], "Chunks should be cut to chunksize rows")
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), self.df.astype({'id': float}))
+
+    def test_csv_stream_types_change_after_first_block(self):
+        filename = self.path('late.csv')
+        with open(filename, 'w') as file:
+            file.write('id,amount,day\n')
+            file.writelines(f'{i},{i},2024-01-01\n' for i in range(2000))
+            file.write('2000,N/A,unknown\n2001,2.5,2024-01-02\n')
+        chunks = list(iter_csv(filename, chunksize=500, block_size=4096))
+        df = pd.concat(chunks, ignore_index=True)
+        self.assertEqual(len(df), 2002, "Values that do not fit the first block's types should not stop the stream")
+        self.assertTrue(np.isnan(df['amount'].iloc[2000]))
+        self.assertEqual(df['amount'].iloc[2001], 2.5)
+        self.assertEqual(df['day'].iloc[2000], 'unknown')
+
+    def test_parquet_columns_and_filters(self):
+        filename = self.path('data.parquet')
+        save_parquet(self.df, filename, row_group_size=100)
+        loaded = load_parquet(filename, columns=['id', 'value'], filters=[('id', '>=', 950)])
+        self.assertEqual(loaded['id'].tolist(), list(range(950, 1000)), "Filters should select matching rows")
+        self.assertEqual(list(loaded.columns), ['id', 'value'])
+        self.assertEqual(sum(len(chunk) for chunk in iter_parquet(filename, chunksize=250)), 1000)
+
+    def test_feather_memory_map(self):
+        filename = self.path('data.feather')
+        save_feather(self.df, filename)
+        pd.testing.assert_frame_equal(load_file(filename), self.df)
+        zero_copy = load_feather(filename, columns=['value'], filters=[('kind', '==', 'a')], zero_copy=True)
+        self.assertIsInstance(zero_copy['value'].dtype, pd.ArrowDtype, "Zero-copy loads should keep Arrow-backed columns")
+        self.assertEqual(len(zero_copy), 250)
+
+    def test_streaming_excel(self):
+        filename = self.path('data.xlsx')
+        with pd.ExcelWriter(filename) as writer:
+            self.df.to_excel(writer, sheet_name='first', index=False)
+            self.df.head(10).to_excel(writer, sheet_name='second', index=False)
+        chunks = list(iter_excel(filename, columns=['id', 'kind'], chunksize=400, engine='openpyxl'))
+        self.assertEqual([(name, len(chunk)) for name, chunk in chunks],
+                         [('first', 400), ('first', 400), ('first', 200), ('second', 10)], "Chunks should be yielded per sheet")
+        self.assertTrue(all(chunk['id'].dtype == np.int64 for _, chunk in chunks), "Chunks should be typed")
+        pd.testing.assert_frame_equal(load_excel(filename), self.df)
+
+    def test_excel_chunks_keep_values_when_types_change(self):
+        filename = self.path('mixed.xlsx')
+        df = pd.DataFrame({'amount': [1, 2, 3, 4, 2.5, 7.75, 9, None], 'flag': [True, False, True, False, 5, True, 0, 1]})
+        df.to_excel(filename, index=False)
+        chunks = [chunk for _, chunk in iter_excel(filename, chunksize=4, engine='openpyxl')]
+        self.assertEqual(chunks[0]['amount'].dtype, np.int64)
+        self.assertEqual(chunks[1]['amount'].tolist()[:2], [2.5, 7.75], "Later chunks should not be truncated to the first chunk's dtype")
+        self.assertEqual(chunks[1]['flag'].tolist()[0], 5, "Values outside the first chunk's dtype should be kept")
+        loaded = load_excel(filename)
+        self.assertEqual(loaded['amount'].tolist()[:7], [1, 2, 3, 4, 2.5, 7.75, 9])
+        self.assertTrue(np.isnan(loaded['amount'].iloc[7]))
+        self.assertEqual(loaded['flag'].tolist(), [1, 0, 1, 0, 5, 1, 0, 1])
+
+    def test_calamine_blank_cells_match_read_excel(self):
+        filename = self.path('blanks.xlsx')
+        df = pd.DataFrame({'id': [1, 2, 3, 4, 5, 6], 'amount': [1.5, None, 3, None, 5.25, 6],
+                           'kind': ['a', None, 'c', 'd', None, 'f']})
+        df.to_excel(filename, index=False)
+        for engine in ('calamine', 'openpyxl'):
+            with self.subTest(engine=engine):
+                chunks = [chunk for _, chunk in iter_excel(filename, chunksize=3, engine=engine)]
+                self.assertEqual([len(chunk) for chunk in chunks], [3, 3])
+                self.assertTrue(all(chunk['amount'].dtype == np.float64 for chunk in chunks),
+                                "Blank cells in a numeric column should be NaN, not ''")
+                self.assertEqual(chunks[0]['id'].dtype, np.int64, "Whole numbers should stay integers")
+                loaded = pd.concat(chunks, ignore_index=True)
+                pd.testing.assert_frame_equal(loaded, pd.read_excel(filename, engine=engine), check_dtype=False)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -47,5 +47,65 @@ class TestGUI(unittest.TestCase):
         self.assertTrue(self.window.visualize_button.isEnabled(), "Visualize button should be enabled after successful DB connection")
         self.assertTrue(self.window.sql_button.isEnabled(), "SQL button should be enabled after successful DB connection")
 
+    @patch('gui.data_cleaning.QMessageBox.information')
+    def test_cleaned_data_only_replaces_the_original_frame(self, mock_information):
+        import pandas as pd
+        from gui.data_cleaning import DataCleaningDialog
+        original = pd.DataFrame({'A': [1, 2]})
+        self.window.df = original
+        dialog = DataCleaningDialog(self.window, df=original)
+        dialog.source_df = original
+        cleaned = pd.DataFrame({'A': [1]})
+        dialog.on_finished(cleaned)
+        self.assertIs(self.window.df, cleaned, "The cleaned frame should replace the one the run started from")
+
+        dialog = DataCleaningDialog(self.window, df=cleaned)
+        dialog.source_df = cleaned
+        reloaded = pd.DataFrame({'B': [3]})
+        self.window.df = reloaded
+        dialog.on_finished(pd.DataFrame({'A': []}))
+        self.assertIs(self.window.df, reloaded, "A stale result should not overwrite newly loaded data")
+
+    @patch('gui.data_cleaning.QMessageBox.information')
+    @patch('gui.data_cleaning.QThreadPool.globalInstance')
+    def test_cleaning_shares_the_frame_without_changing_it(self, mock_pool, mock_information):
+        import numpy as np
+        import pandas as pd
+        from gui.data_cleaning import DataCleaningDialog
+        original = pd.DataFrame({'A': [1.0, np.nan, 3.0], 'B': [4.0, 5.0, 6.0]})
+        self.window.df = original
+        dialog = DataCleaningDialog(self.window, df=original)
+        dialog.columns_input.setText('A')
+        dialog.clean_data()
+        worker = mock_pool.return_value.start.call_args[0][0]
+        self.assertIsNot(worker.df, original)
+        self.assertFalse(np.shares_memory(worker.df['A'].to_numpy(), original['A'].to_numpy()),
+                         "Columns the steps write should be copied")
+        self.assertTrue(np.shares_memory(worker.df['B'].to_numpy(), original['B'].to_numpy()),
+                        "Other columns should not be copied")
+        worker.run()
+        self.assertTrue(original['A'].isna().iloc[1], "Cleaning should not write into the main window's frame")
+        self.assertFalse(self.window.df['A'].isna().any(), "The cleaned frame should be handed back")
+
+    @patch('gui.advanced_settings.QThreadPool.globalInstance')
+    @patch('gui.advanced_settings.QMessageBox.critical')
+    def test_advanced_settings_reject_non_positive_batch_size(self, mock_critical, mock_pool):
+        from gui.advanced_settings import AdvancedSettingsDialog
+        dialog = AdvancedSettingsDialog(self.window)
+        dialog.model_input.setPlainText('class CustomModel:\n    pass\n')
+        dialog.param_input.setText('{}')
+        dialog.batch_size_input.setText('0')
+        dialog.save_settings()
+        mock_critical.assert_called_once()
+        mock_pool.return_value.start.assert_not_called()
+
+        mock_critical.reset_mock()
+        dialog.batch_size_input.setText('1000')
+        dialog.save_settings()
+        mock_critical.assert_not_called()
+        worker = mock_pool.return_value.start.call_args[0][0]
+        self.assertEqual(worker.code, 'class CustomModel:\n    pass\n', "Validation should run on the thread pool")
+        self.assertFalse(dialog.save_button.isEnabled(), "Saving should wait for the validation")
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+from data_cleaning.pipeline import PipelineStep
+from data_cleaning.memory_governor import (MB, profile_dataframe, estimate_step, profile_table, plan_pipeline, plan_fits,
+                                           format_plan, run_planned)
+
+class TestMemoryGovernor(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'amount': np.arange(20000, dtype=float),
+            'code': [f'id-{i}' for i in range(20000)],
+            'memo': [' note '] * 20000,
+        })
+        self.df.loc[::10, 'amount'] = np.nan
+
+    def test_profile_dataframe(self):
+        profile = profile_dataframe(self.df, sample_rows=5000)
+        self.assertEqual(profile.rows, 20000, "Row count should be the full frame, not the sample")
+        self.assertAlmostEqual(profile.column_bytes['amount'], 8, msg="Float columns take 8 bytes per row")
+        self.assertEqual(profile.cardinality['code'], 20000, "Mostly distinct columns should be extrapolated")
+        self.assertEqual(profile.cardinality['memo'], 1, "Low-cardinality columns should not be extrapolated")
+        self.assertAlmostEqual(profile.missing_fraction['amount'], 0.1, delta=0.02)
+
+    def test_profile_table(self):
+        engine = create_engine('sqlite://')
+        self.df.to_sql('ledger', engine, index=False)
+        profile = profile_table(engine, 'ledger', sample_rows=1000)
+        self.assertEqual(profile.rows, 20000, "Row count should cover the whole table")
+        self.assertEqual(profile.source, 'count', "SQLite has no planner row estimate, so COUNT(*) is used")
+        self.assertGreater(profile.bytes_per_row, 8)
+
+    def test_plan_in_memory_when_it_fits(self):
+        profile = profile_dataframe(self.df)
+        steps = [PipelineStep('Impute', lambda df: df, False, 'impute', ['amount'])]
+        plan = plan_pipeline(steps, profile, {'strategy': 'mean'}, budget_bytes=512 * MB)
+        self.assertEqual(plan.steps[0].mode, 'in_memory')
+        self.assertTrue(plan_fits(plan))
+
+    def test_one_hot_expansion_is_over_budget(self):
+        profile = profile_dataframe(self.df)
+        steps = [PipelineStep('Encode', lambda df: df, False, 'encode', ['code'])]
+        plan = plan_pipeline(steps, profile, budget_bytes=64 * MB)
+        self.assertFalse(plan.steps[0].fits, "20,000 one-hot columns should not fit in 64 MB")
+        self.assertFalse(plan_fits(plan))
+        self.assertIn('OVER BUDGET', format_plan(plan), "The report should flag steps over budget")
+
+    def test_whole_frame_step_over_budget_is_flagged(self):
+        profile = profile_dataframe(self.df)
+        steps = [PipelineStep('Dedup', lambda df: df, False, 'dedup')]
+        plan = plan_pipeline(steps, profile, budget_bytes=int(profile.rows * profile.bytes_per_row))
+        self.assertEqual(plan.steps[0].mode, 'in_memory', "Steps without an out-of-core variant should stay in memory")
+        self.assertFalse(plan.steps[0].fits)
+
+    def test_impute_and_scale_run_in_two_passes(self):
+        from sklearn.impute import SimpleImputer
+        from sklearn.preprocessing import RobustScaler
+        rng = np.random.default_rng(0)
+        columns = ['a', 'b', 'c', 'd']
+        df = pd.DataFrame(rng.normal(size=(20000, 4)), columns=columns)
+        df['d'] = rng.integers(0, 5, 20000)
+        df.loc[::7, ['a', 'b']] = np.nan
+        for settings, kind, reference in [({'strategy': 'median'}, 'impute', SimpleImputer(strategy='median')),
+                                          ({'strategy': 'most_frequent'}, 'impute',
+                                           SimpleImputer(strategy='most_frequent')),
+                                          ({'scale_method': 'robust'}, 'scale', RobustScaler())]:
+            steps = [PipelineStep(kind, lambda df: df, False, kind, columns)]
+            profile = profile_dataframe(df)
+            working, _, _ = estimate_step(steps[0], profile, settings)
+            budget = int(profile.rows * profile.bytes_per_row + working / 2)
+            plan = plan_pipeline(steps, profile, settings, budget_bytes=budget)
+            self.assertEqual(plan.steps[0].mode, 'two_pass', "An impute or scale step over budget should run in two passes")
+            self.assertTrue(plan_fits(plan))
+            self.assertLessEqual(plan.steps[0].peak_bytes, budget)
+            result, _ = run_planned(df.copy(), steps, plan)
+            expected = reference.fit_transform(df[columns])
+            np.testing.assert_allclose(result[columns].to_numpy(), expected, err_msg=f'{settings} should match scikit-learn')
+
+    def test_near_duplicates_estimate_covers_signatures(self):
+        from data_cleaning.text_cleaning import MINHASH_NUM_PERM
+        profile = profile_dataframe(self.df)
+        working, added, reason = estimate_step(PipelineStep('Near duplicates', None, False, 'near_duplicates', ['memo']),
+                                               profile)
+        self.assertGreaterEqual(working, profile.rows * MINHASH_NUM_PERM * 4, "Every row holds a uint32 signature")
+        self.assertEqual(added, profile.rows * 8, "The step adds one int64 cluster column")
+        self.assertIn('MinHash', reason)
+
+    def test_row_wise_step_is_chunked(self):
+        profile = profile_dataframe(self.df)
+        steps = [PipelineStep('Strip', lambda df: df, True, 'text', ['memo'])]
+        working, added, _ = estimate_step(steps[0], profile)
+        budget = int(profile.rows * profile.bytes_per_row + added + working / 4)
+        plan = plan_pipeline(steps, profile, budget_bytes=budget)
+        self.assertEqual(plan.steps[0].mode, 'chunked', "A row-wise step over budget should be chunked")
+        self.assertLess(plan.steps[0].chunk_rows, profile.rows)
+        self.assertLessEqual(plan.steps[0].peak_bytes, budget)
+
+    def test_run_planned(self):
+        def strip_text(df):
+            df['memo'] = df['memo'].str.strip()
+            return df
+        steps = [PipelineStep('Strip', strip_text, True, 'text', ['memo']),
+                 PipelineStep('Fill', lambda df: df.fillna({'amount': 0}), False, 'impute', ['amount'])]
+        profile = profile_dataframe(self.df)
+        working, added, _ = estimate_step(steps[0], profile)
+        plan = plan_pipeline(steps, profile, budget_bytes=int(profile.rows * profile.bytes_per_row + added + working / 4))
+        self.assertEqual(plan.steps[0].mode, 'chunked')
+        seen = []
+        df, timings = run_planned(self.df.copy(), steps, plan, progress_callback=lambda *args: seen.append(args))
+        self.assertTrue((df['memo'] == 'note').all(), "The chunked step should cover every row")
+        self.assertEqual(df['amount'].isna().sum(), 0)
+        self.assertEqual([name for name, _ in timings], ['Strip', 'Fill'])
+        self.assertEqual({args[2] for args in seen}, {2}, "Progress should count the whole pipeline")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import IsolationForest
+from data_cleaning.model_registry import ModelRegistry
+
+class TestModelRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.registry = ModelRegistry(self.tmp_dir.name, max_versions=2)
+        self.df = pd.DataFrame(np.random.default_rng(0).normal(size=(100, 2)), columns=['A', 'B'])
+        self.params = {'contamination': 0.1}
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def save_model(self, df):
+        model = IsolationForest(**self.params).fit(df)
+        fingerprint = self.registry.fingerprint(df, ['A', 'B'])
+        return self.registry.save('isolation_forest', ['A', 'B'], self.params, model, fingerprint)
+
+    def test_save_and_load(self):
+        self.save_model(self.df)
+        fingerprint = self.registry.fingerprint(self.df, ['A', 'B'])
+        model, meta = self.registry.load('isolation_forest', ['A', 'B'], self.params, fingerprint=fingerprint)
+        self.assertIsNotNone(model, "Stored model should be loaded")
+        self.assertEqual(len(model.predict(self.df)), len(self.df), "Loaded model should score new data")
+
+    def test_fingerprint_mismatch(self):
+        self.save_model(self.df)
+        fingerprint = self.registry.fingerprint(self.df.iloc[:50], ['A', 'B'])
+        model, meta = self.registry.load('isolation_forest', ['A', 'B'], self.params, fingerprint=fingerprint)
+        self.assertIsNone(model, "Model fitted on other data should not match the fingerprint")
+
+    def test_versioning_and_eviction(self):
+        self.assertEqual(self.save_model(self.df), 1, "First save should be version 1")
+        self.assertEqual(self.save_model(self.df.iloc[:50]), 2, "Second save should be version 2")
+        self.save_model(self.df.iloc[:25])
+        versions = [meta['version'] for meta in self.registry.versions('isolation_forest', ['A', 'B'], self.params)]
+        self.assertEqual(versions, [2, 3], "Least recently used version should be evicted")
+
+if __name__ == '__main__':
+    unittest.main()
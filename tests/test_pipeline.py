@@ -0,0 +1,59 @@
+import threading
+import unittest
+import pandas as pd
+from data_cleaning.pipeline import PipelineStep, PipelineCancelled, build_pipeline, run_pipeline, run_pipeline_chunks
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({'A': range(10), 'B': [' x '] * 10})
+
+    def test_run_pipeline_in_chunks(self):
+        def strip_text(df):
+            df['B'] = df['B'].str.strip()
+            return df
+        steps = [PipelineStep('Double', lambda df: df.assign(A=df['A'] * 2), False),
+                 PipelineStep('Strip', strip_text, True)]
+        progress = []
+        df, timings = run_pipeline(self.df, steps, progress_callback=lambda *args: progress.append(args), chunk_size=3)
+        self.assertEqual(df['A'].tolist(), [2 * i for i in range(10)], "Steps should run in order")
+        self.assertTrue((df['B'] == 'x').all(), "Row-wise step should cover every chunk")
+        self.assertEqual(df.index.tolist(), list(range(10)), "Chunked step should keep the row order")
+        self.assertEqual([name for name, _ in timings], ['Double', 'Strip'], "Every step should be timed")
+        self.assertEqual(progress[-1][3], 1.0, "Progress should finish at 1.0")
+
+    def test_cancel_between_chunks(self):
+        cancel_event = threading.Event()
+        calls = []
+        def cancel_after_first_chunk(df):
+            calls.append(len(df))
+            cancel_event.set()
+            return df
+        steps = [PipelineStep('Cancel', cancel_after_first_chunk, True), PipelineStep('Never', lambda df: 1 / 0, False)]
+        with self.assertRaises(PipelineCancelled):
+            run_pipeline(self.df, steps, cancel_event=cancel_event, chunk_size=3)
+        self.assertEqual(calls, [3], "Pipeline should stop at the next chunk boundary")
+
+    def test_run_pipeline_on_streamed_chunks(self):
+        seen = []
+        def strip_text(df):
+            seen.append(len(df))
+            return df.assign(B=df['B'].str.strip())
+        steps = [PipelineStep('Strip', strip_text, True),
+                 PipelineStep('Total', lambda df: df.assign(total=df['A'].sum()), False)]
+        chunks = (self.df.iloc[start:start + 4] for start in range(0, len(self.df), 4))
+        df, timings = run_pipeline_chunks(chunks, steps)
+        self.assertEqual(seen, [4, 4, 2], "Leading row-wise steps should run on each chunk as it arrives")
+        self.assertTrue((df['B'] == 'x').all())
+        self.assertEqual(df['total'].iloc[0], 45, "Whole-frame steps should see every row")
+        self.assertEqual([name for name, _ in timings], ['Strip', 'Total'], "Every step should be timed")
+
+    def test_near_duplicates_are_opt_in(self):
+        kinds = [step.kind for step in build_pipeline({'text_columns': 'B'})]
+        self.assertNotIn('near_duplicates', kinds, "Text cleaning alone should not look for near duplicates")
+        steps = build_pipeline({'text_columns': 'B', 'near_duplicate_columns': 'B'})
+        self.assertEqual([step.name for step in steps if step.kind == 'near_duplicates'], ['Near duplicates: B'])
+        self.assertEqual(steps[-1].kind, 'near_duplicates', "Near duplicates should be found on the cleaned text")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import ProgrammingError
+from database.query_builder import (compile_query, QueryResultCache, reflect_table, clear_reflection_cache,
+                                    retry_on_stale_table)
+
+class TestQueryBuilder(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp_dir.name, 'test.db')}")
+        with self.engine.begin() as connection:
+            connection.execute(text('CREATE TABLE items (id INTEGER, name TEXT, price REAL)'))
+            connection.execute(text('INSERT INTO items VALUES (:id, :name, :price)'),
+                               [{'id': i, 'name': f'item{i}', 'price': i * 1.5} for i in range(20)])
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmp_dir.cleanup()
+
+    def test_reflection_is_refreshed(self):
+        table = reflect_table(self.engine, 'items')
+        self.assertIs(reflect_table(self.engine, 'items'), table, "The reflection should be reused")
+        with self.engine.begin() as connection:
+            connection.execute(text('ALTER TABLE items ADD COLUMN stock INTEGER'))
+        statement, params, rows = self.run_query({'select': ['stock'], 'from': 'items', 'where': []})
+        self.assertEqual(len(rows), 20, "A column added after the reflection should be found")
+        clear_reflection_cache(self.engine)
+        self.assertIsNot(reflect_table(self.engine, 'items'), table, "Clearing should reflect the table again")
+
+    def test_retry_on_stale_table(self):
+        reflect_table(self.engine, 'items')
+        calls = []
+
+        def run():
+            calls.append(reflect_table(self.engine, 'items'))
+            if len(calls) == 1:
+                raise ProgrammingError('SELECT', {}, Exception('column items.price does not exist'))
+            return 'done'
+
+        self.assertEqual(retry_on_stale_table(self.engine, 'items', run), 'done')
+        self.assertIsNot(calls[0], calls[1], "The retry should use a fresh reflection")
+        calls.clear()
+        with self.assertRaises(KeyError):
+            retry_on_stale_table(self.engine, 'items', lambda: calls.append(1) or reflect_table(self.engine, 'items').c['x'])
+        self.assertEqual(len(calls), 2, "A stale reflection should be retried once")
+        calls.clear()
+        clear_reflection_cache(self.engine, 'items')
+        with self.assertRaises(KeyError):
+            retry_on_stale_table(self.engine, 'items', lambda: calls.append(1) or reflect_table(self.engine, 'items').c['x'])
+        self.assertEqual(len(calls), 1, "A fresh reflection should not be retried")
+
+    def run_query(self, query):
+        statement, params = compile_query(self.engine, query)
+        with self.engine.connect() as connection:
+            return statement, params, connection.execute(statement, params).fetchall()
+
+    def test_typed_parameters(self):
+        query = {'select': ['id', 'name'], 'from': 'items',
+                 'where': [{'field': 'id', 'operator': '>=', 'value': '9'}]}
+        statement, params, rows = self.run_query(query)
+        self.assertEqual(params, {'p0': 9}, "Values should be bound with the column type")
+        self.assertEqual(len(rows), 11, "Numeric comparison should not compare strings")
+        self.assertNotIn('9', str(statement), "Values should not be inlined in the SQL")
+
+    def test_like_binds_the_raw_pattern(self):
+        query = {'select': ['id'], 'from': 'items', 'where': [{'field': 'id', 'operator': 'LIKE', 'value': '%5%'}]}
+        _, params, rows = self.run_query(query)
+        self.assertEqual(params, {'p0': '%5%'}, "LIKE patterns should not be coerced to the column type")
+        self.assertEqual(sorted(row[0] for row in rows), [5, 15])
+
+    def test_in_list_and_statement_cache(self):
+        query = {'select': ['*'], 'from': 'items', 'where': [{'field': 'id', 'operator': 'IN', 'value': '1, 2, 3'}]}
+        statement, _, rows = self.run_query(query)
+        self.assertEqual(sorted(row[0] for row in rows), [1, 2, 3], "IN should match every listed value")
+        query['where'][0]['value'] = '4,5'
+        cached_statement, params, rows = self.run_query(query)
+        self.assertIs(cached_statement, statement, "Queries of the same shape should reuse the statement")
+        self.assertEqual(len(rows), 2, "The cached statement should use the new values")
+
+    def test_unknown_column(self):
+        with self.assertRaises(ValueError):
+            compile_query(self.engine, {'select': ['missing'], 'from': 'items', 'where': []})
+
+    def test_result_cache(self):
+        cache = QueryResultCache(max_entries=1, ttl=60)
+        statement, params = compile_query(self.engine, {'select': ['id'], 'from': 'items', 'where': []})
+        key = cache.make_key(self.engine, statement, params)
+        result = pd.DataFrame({'id': [1]})
+        cache.put(key, result)
+        self.assertIs(cache.get(key), result, "Cached result should be returned")
+        cache.put(cache.make_key(self.engine, 'SELECT 1'), result)
+        self.assertIsNone(cache.get(key), "Least recently used entry should be evicted")
+        cache.ttl = 0
+        self.assertIsNone(cache.get(cache.make_key(self.engine, 'SELECT  1')), "Expired entries should be dropped")
+
+if __name__ == '__main__':
+    unittest.main()
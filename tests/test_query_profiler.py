@@ -0,0 +1,100 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+from sqlalchemy import create_engine, text
+from database.query_profiler import (explain_query, check_query_cost, QueryCostExceeded, QueryHistory, get_query_history,
+                                     _explain_mssql)
+from config import config
+from database.query_runner import QueryRunner
+
+SHOWPLAN_XML = '''<ShowPlanXML xmlns="http://schemas.microsoft.com/sqlserver/2004/07/showplan" Version="1.5" Build="15.0.2000.5">
+  <BatchSequence><Batch><Statements>
+    <StmtSimple StatementText="SELECT * FROM orders o JOIN customers c ON c.id = o.customer_id"
+                StatementType="SELECT" StatementSubTreeCost="12.5" StatementEstRows="40000">
+      <QueryPlan>
+        <RelOp NodeId="0" PhysicalOp="Hash Match" LogicalOp="Inner Join" EstimateRows="40000">
+          <Hash>
+            <RelOp NodeId="1" PhysicalOp="Clustered Index Scan" LogicalOp="Clustered Index Scan" EstimateRows="500">
+              <IndexScan Ordered="0">
+                <Object Database="[shop]" Schema="[dbo]" Table="[customers]" Index="[PK_customers]" />
+              </IndexScan>
+            </RelOp>
+            <RelOp NodeId="2" PhysicalOp="Table Scan" LogicalOp="Table Scan" EstimateRows="40000">
+              <TableScan Ordered="0">
+                <Object Database="[shop]" Schema="[dbo]" Table="[orders]" />
+              </TableScan>
+            </RelOp>
+          </Hash>
+        </RelOp>
+      </QueryPlan>
+    </StmtSimple>
+  </Statements></Batch></BatchSequence>
+</ShowPlanXML>'''
+
+class TestQueryProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp_dir.name, 'test.db')}")
+        with self.engine.begin() as connection:
+            connection.execute(text('CREATE TABLE events (id INTEGER PRIMARY KEY, kind TEXT)'))
+            connection.execute(text('CREATE INDEX idx_kind ON events (kind)'))
+            connection.execute(text('INSERT INTO events (kind) VALUES (:kind)'), [{'kind': f'k{i % 7}'} for i in range(500)])
+            connection.execute(text('ANALYZE'))
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmp_dir.cleanup()
+
+    def test_explain_detects_full_scan(self):
+        estimate = explain_query(self.engine, 'SELECT * FROM events')
+        self.assertEqual(estimate['full_scans'], ['events'], "Unfiltered select should scan the table")
+        self.assertEqual(estimate['estimated_rows'], 500, "Row estimate should come from ANALYZE statistics")
+        indexed = explain_query(self.engine, 'SELECT * FROM events WHERE kind = :kind', {'kind': 'k1'})
+        self.assertEqual(indexed['full_scans'], [], "Indexed lookup should not be a full scan")
+        index_scan = explain_query(self.engine, 'SELECT kind FROM events ORDER BY kind')
+        self.assertIn('USING COVERING INDEX', index_scan['plan'])
+        self.assertEqual(index_scan['full_scans'], [], "A scan of an index should not be reported as a full table scan")
+        self.assertIsNone(check_query_cost(self.engine, 'SELECT kind FROM events ORDER BY kind', max_rows=100,
+                                           action='block')['estimated_rows'])
+
+    def test_mssql_full_scans_name_tables(self):
+        connection = MagicMock()
+        connection.exec_driver_sql.return_value.scalar.return_value = SHOWPLAN_XML
+        rows, cost, full_scans, _ = _explain_mssql(connection, 'SELECT * FROM orders', ())
+        self.assertEqual((rows, cost), (40000.0, 12.5))
+        self.assertEqual(full_scans, ['customers', 'orders'], "Full scans should name the scanned tables")
+
+    def test_threshold(self):
+        with self.assertRaises(QueryCostExceeded):
+            check_query_cost(self.engine, 'SELECT * FROM events', max_rows=100, action='block')
+        estimate = check_query_cost(self.engine, 'SELECT * FROM events', max_rows=100, action='warn')
+        self.assertTrue(estimate['exceeded'], "Warning mode should flag the query and return the estimate")
+        self.assertIsNone(check_query_cost(self.engine, 'SELECT * FROM events'), "No threshold means no preview")
+
+    def test_history(self):
+        history = QueryHistory(os.path.join(self.tmp_dir.name, 'history.db'))
+        runner = QueryRunner(self.engine, 'SELECT * FROM events', page_size=200, history=history)
+        list(runner.pages())
+        connections, connect = [], sqlite3.connect
+        with patch('database.query_profiler.sqlite3.connect',
+                   side_effect=lambda *args: connections.append(connect(*args)) or connections[-1]):
+            rows = history.query('SELECT status, rows_fetched, bytes_decoded FROM query_history')
+        with self.assertRaises(sqlite3.ProgrammingError, msg="The history connection should be closed"):
+            connections[0].execute('SELECT 1')
+        self.assertEqual(rows['status'].tolist(), ['ok'], "Execution should be recorded")
+        self.assertEqual(int(rows['rows_fetched'][0]), 500, "Fetched rows should be recorded")
+        self.assertGreater(int(rows['bytes_decoded'][0]), 0, "Decoded bytes should be recorded")
+
+    def test_default_history_is_in_the_user_data_directory(self):
+        with patch.dict(os.environ, {'XDG_DATA_HOME': self.tmp_dir.name}), patch('sys.platform', 'linux'), \
+                patch.dict(config, clear=True):
+            history = get_query_history()
+            self.assertEqual(history.path, os.path.join(self.tmp_dir.name, 'data_cleaning_app', 'query_history.db'))
+            config['query_history_path'] = None
+            self.assertIsNone(get_query_history(), "Setting the path to None should disable the history")
+
+if __name__ == '__main__':
+    unittest.main()
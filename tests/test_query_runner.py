@@ -0,0 +1,36 @@
+import os
+import tempfile
+import threading
+import unittest
+from sqlalchemy import create_engine, text
+from database.query_runner import QueryRunner, QueryCancelled
+
+class TestQueryRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp_dir.name, 'test.db')}")
+        with self.engine.begin() as connection:
+            connection.execute(text('CREATE TABLE numbers (n INTEGER)'))
+            connection.execute(text('INSERT INTO numbers VALUES (:n)'), [{'n': n} for n in range(250)])
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmp_dir.cleanup()
+
+    def test_pages(self):
+        runner = QueryRunner(self.engine, 'SELECT n FROM numbers WHERE n >= :low', {'low': 50}, page_size=100)
+        sizes = [len(page) for page in runner.pages()]
+        self.assertEqual(sizes, [100, 100], "Result should be returned in pages")
+        self.assertEqual(runner.rows_fetched, 200, "Fetched rows should be counted")
+        self.assertIsNotNone(runner.first_page_seconds, "Time to the first page should be recorded")
+
+    def test_cancel_running_query(self):
+        runner = QueryRunner(self.engine, 'WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) '
+                                          'SELECT count(*) FROM c')
+        threading.Timer(0.2, runner.cancel).start()
+        with self.assertRaises(QueryCancelled):
+            list(runner.pages())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import os
+import sys
+import json
+import subprocess
+import unittest
+from app import prewarm, import_report
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def loaded_after(statement, modules):
+    """
+    Run an import statement in a fresh interpreter and return which of the given modules it loaded.
+    """
+    code = f"import sys, json\n{statement}\nprint(json.dumps([m for m in {modules!r} if m in sys.modules]))"
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen')
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+class TestStartup(unittest.TestCase):
+
+    def test_main_window_import_is_light(self):
+        heavy = ['sqlalchemy', 'pandas', 'tensorflow', 'keras', 'pycaret', 'spacy', 'nltk', 'plotly', 'bokeh']
+        self.assertEqual(loaded_after('import gui.main_window', heavy), [], "The main window should not load heavy backends")
+
+    def test_backends_load_on_first_use(self):
+        heavy = ['tensorflow', 'keras', 'pycaret', 'pyod', 'spacy', 'nltk', 'featuretools', 'imblearn']
+        statement = 'import data_cleaning.text_cleaning, data_cleaning.anomaly_detection, data_cleaning.cleaning_functions'
+        self.assertEqual(loaded_after(statement, heavy), [], "Optional backends should be imported lazily")
+
+    def test_prewarm_records_timings(self):
+        timings = {}
+        for thread in prewarm([['json', 'missing_module_for_prewarm_test'], ['csv']], timings):
+            thread.join()
+        self.assertEqual(set(timings), {'json', 'missing_module_for_prewarm_test', 'csv'}, "Every module should be timed, even failures")
+        self.assertEqual(len(import_report(timings).splitlines()), 3, "The report should have one line per module")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+import numpy as np
+import pandas as pd
+from data_cleaning.streaming_anomaly import HalfSpaceTrees, RobustZScoreDetector, detect_anomalies_stream
+
+class TestStreamingAnomaly(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame(rng.normal(size=(5000, 2)), columns=['A', 'B'])
+        self.df.iloc[4000:4010] = 10
+
+    def chunks(self):
+        return (self.df.iloc[start:start + 1000].copy() for start in range(0, len(self.df), 1000))
+
+    def test_robust_zscore_stream(self):
+        result = pd.concat(detect_anomalies_stream(self.chunks(), ['A', 'B'], RobustZScoreDetector(random_state=0),
+                                                   quantile=0.99, random_state=0))
+        self.assertEqual(len(result), len(self.df), "Every row should be scored")
+        self.assertTrue(result['anomaly'].iloc[4000:4010].all(), "Extreme rows should be flagged")
+
+    def test_half_space_trees_stream(self):
+        detector = HalfSpaceTrees(n_trees=10, depth=8, window_size=250, random_state=0)
+        result = pd.concat(detect_anomalies_stream(self.chunks(), ['A', 'B'], detector, quantile=0.99, random_state=0))
+        self.assertTrue(result['anomaly'].iloc[4000:4010].all(), "Extreme rows should be flagged")
+        self.assertLess(result['anomaly'].mean(), 0.05, "Most rows should be normal")
+
+    def test_half_space_trees_windows(self):
+        detector = HalfSpaceTrees(n_trees=2, depth=3, window_size=100, random_state=0)
+        detector.partial_fit(self.df.iloc[:250].to_numpy())
+        self.assertEqual(detector.windows_completed, 2, "Two full windows should have completed")
+        self.assertEqual(detector.window_count, 50, "The partial window should hold the remaining rows")
+        self.assertEqual(detector.reference_mass[0, 0], 100, "The root mass should equal the window size")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from data_cleaning.text_cleaning import (sentiment_scores, load_sentiment_cache, tfidf_vectorization,
+                                         streaming_tfidf_vectorization, StreamingTextVectorizer,
+                                         near_duplicate_clusters)
+
+class TestTextCleaning(unittest.TestCase):
+
+    def setUp(self):
+        self.df = pd.DataFrame({
+            'text': ['I love this product', 'This is terrible', None, 'I love this product']
+        })
+
+    def test_sentiment_scores(self):
+        result = sentiment_scores(self.df, 'text', n_jobs=1)
+        for field in ['neg', 'neu', 'pos', 'compound']:
+            self.assertEqual(result[f'text_{field}'].dtype, np.float32, "Sentiment columns should be float32")
+        self.assertEqual(result['text_compound'].iloc[0], result['text_compound'].iloc[3], "Duplicate texts should share scores")
+        self.assertGreater(result['text_compound'].iloc[0], 0, "Positive text should have a positive compound score")
+
+    def test_sentiment_cache(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_path = os.path.join(tmp_dir, 'sentiment.pkl')
+            sentiment_scores(self.df, 'text', cache_path=cache_path, n_jobs=1)
+            self.assertEqual(len(load_sentiment_cache(cache_path)), 3, "Cache should hold one entry per unique text")
+
+    def test_streaming_tfidf_matches_in_memory(self):
+        docs = pd.DataFrame({'text': ['the cat sat', 'the dog sat down', 'a cat and a dog', 'cats are great']})
+        make_chunks = lambda: (docs.iloc[i:i + 2] for i in range(0, len(docs), 2))
+        chunks, vectorizer = streaming_tfidf_vectorization(make_chunks, 'text', mode='vocabulary')
+        chunks = list(chunks)
+        expected, _ = tfidf_vectorization(docs, 'text')
+        self.assertEqual(chunks[0].dtype, np.float32, "Streaming chunks should be float32")
+        self.assertAlmostEqual(abs(chunks[0] - expected[:2]).max(), 0.0, places=6, msg="Streaming TF-IDF mismatch")
+
+    def test_streaming_vectorizer_reuse(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'vectorizer.pkl')
+            vectorizer = StreamingTextVectorizer(n_features=2 ** 10).fit([['the cat sat', 'the dog sat']])
+            vectorizer.save(path)
+            reloaded = StreamingTextVectorizer.load(path)
+            self.assertEqual((reloaded.transform(['a new cat']) != vectorizer.transform(['a new cat'])).nnz, 0,
+                             "Reloaded vectorizer should reuse the fitted IDF")
+
+    def test_near_duplicate_clusters(self):
+        df = pd.DataFrame({'name': ['ACME Corp.', 'Acme Corp', 'Globex Corporation', 'Initech']})
+        result = near_duplicate_clusters(df, 'name')
+        clusters = result['name_dup_cluster']
+        self.assertEqual(clusters.iloc[0], clusters.iloc[1], "Near duplicates should share a cluster")
+        self.assertEqual(clusters.nunique(), 3, "Distinct texts should get their own clusters")
+
+    def test_near_duplicate_clusters_short_and_empty_texts(self):
+        df = pd.DataFrame({'code': ['AB', 'XY', 'Q', '', None, 'ab', 'Acme Corp']})
+        clusters = near_duplicate_clusters(df, 'code')['code_dup_cluster']
+        self.assertEqual(clusters.iloc[0], clusters.iloc[5], "Equal short texts should share a cluster")
+        self.assertEqual(clusters.nunique(), 6, "Short and empty texts should not be clustered together")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,170 @@
+import os
+import numpy as np
 import pandas as pd
 
-def save_csv(df, filename):
-    df.to_csv(filename, index=False)
+# Compression codecs recognised from the file extension, e.g. data.csv.gz
+CSV_COMPRESSION = {'.gz': 'gzip', '.bz2': 'bz2', '.zst': 'zstd', '.xz': 'xz', '.zip': 'zip'}
+
+def _filter_expression(filters):
+    """
+    Turn DNF filters such as [('year', '>=', 2020), ('country', 'in', ['DE', 'FR'])] into a
+    pyarrow expression. Expressions are passed through unchanged.
+    """
+    import pyarrow.parquet as pq
+    if filters is None or not isinstance(filters, (list, tuple)):
+        return filters
+    return pq.filters_to_expression(filters)
+
+def save_csv(df, filename, compression='infer'):
+    # The codec is taken from the extension (.gz, .bz2, .zst, .xz, .zip) unless given
+    df.to_csv(filename, index=False, compression=compression)
+    print(f"Data saved to {filename}")
+
+def load_csv(filename, columns=None, chunksize=None, engine='c'):
+    """
+    Load a CSV file, optionally compressed.
+
+    Parameters:
+    - filename (str): The file; compression is detected from the extension.
+    - columns (list, optional): Only parse these columns.
+    - chunksize (int, optional): Return an iterator of dataframes of about this many rows instead.
+    - engine (str): pandas parser. 'pyarrow' parses with several threads and is much faster on large
+      files, but infers types differently, e.g. it parses timestamps.
+
+    Returns:
+    - pd.DataFrame, or an iterator of pd.DataFrame when chunksize is given.
+    """
+    if chunksize:
+        return iter_csv(filename, columns=columns, chunksize=chunksize)
+    df = pd.read_csv(filename, engine=engine, usecols=columns)
+    print(f"Data loaded from {filename}")
+    return df
+
+def _streaming_column_types(filename, read_options, columns):
+    """
+    Column types for streaming a CSV. pyarrow infers types from the first block only, so a column
+    that is integral there but has decimals further down would fail mid-stream. Integer columns are
+    read as float64, and dates, booleans and columns empty in the first block as strings, as pandas'
+    default parser reads them.
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pv
+    with pa.input_stream(filename, compression='detect') as stream:
+        schema = pv.open_csv(stream, read_options=read_options,
+                             convert_options=pv.ConvertOptions(include_columns=columns)).schema
+    column_types = {}
+    for field in schema:
+        if pa.types.is_integer(field.type):
+            column_types[field.name] = pa.float64()
+        elif not (pa.types.is_floating(field.type) or pa.types.is_string(field.type)):
+            column_types[field.name] = pa.string()
+    return column_types
+
+def iter_csv(filename, columns=None, chunksize=100000, block_size=16 << 20):
+    """
+    Stream a CSV file, optionally compressed, as dataframes without loading the whole file.
+    Blocks are decoded by pyarrow's streaming reader and re-cut to chunksize rows. Types are fixed
+    from the first block and widened (see _streaming_column_types), so integer columns come back as float64.
+
+    Parameters:
+    - filename (str): The file; compression is detected from the extension.
+    - columns (list, optional): Only parse these columns.
+    - chunksize (int): Rows per yielded dataframe.
+    - block_size (int): Bytes read and parsed per block.
+
+    Yields:
+    - pd.DataFrame: The next chunk.
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pv
+    read_options = pv.ReadOptions(use_threads=True, block_size=block_size)
+    column_types = _streaming_column_types(filename, read_options, columns)
+    stream = pa.input_stream(filename, compression='detect')
+    reader = pv.open_csv(stream, read_options=read_options,
+                         convert_options=pv.ConvertOptions(include_columns=columns, column_types=column_types))
+    pending = []
+    pending_rows = 0
+    for batch in reader:
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        while pending_rows >= chunksize:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, chunksize).to_pandas()
+            rest = table.slice(chunksize)
+            pending, pending_rows = rest.to_batches(), rest.num_rows
+    if pending_rows:
+        yield pa.Table.from_batches(pending).to_pandas()
+
+def save_parquet(df, filename, compression='zstd', row_group_size=100000):
+    """
+    Save a dataframe to Parquet. Each row group stores min/max statistics, so smaller row
+    groups let filtered loads skip more of the file.
+    """
+    df.to_parquet(filename, index=False, compression=compression, row_group_size=row_group_size)
+    print(f"Data saved to {filename}")
+
+def load_parquet(filename, columns=None, filters=None, memory_map=True):
+    """
+    Load a Parquet file, reading only the requested columns and the row groups whose statistics
+    can match the filters.
+
+    Parameters:
+    - filename (str): The file.
+    - columns (list, optional): Only read these columns.
+    - filters (list or pyarrow.compute.Expression, optional): Row filter, e.g. [('year', '>=', 2020)].
+    - memory_map (bool): Map the file instead of reading it into a buffer.
+
+    Returns:
+    - pd.DataFrame: The loaded data.
+    """
+    import pyarrow.parquet as pq
+    table = pq.read_table(filename, columns=columns, filters=_filter_expression(filters), memory_map=memory_map)
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    print(f"Data loaded from {filename}")
+    return df
+
+def iter_parquet(filename, columns=None, chunksize=100000):
+    """
+    Stream a Parquet file as dataframes of at most chunksize rows.
+    """
+    import pyarrow.parquet as pq
+    parquet_file = pq.ParquetFile(filename, memory_map=True)
+    for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+        yield batch.to_pandas()
+
+def save_feather(df, filename, compression='uncompressed'):
+    """
+    Save a dataframe to Feather (Arrow IPC). Uncompressed files can be memory-mapped and read
+    without copying; pass 'lz4' or 'zstd' to trade that for a smaller file.
+    """
+    import pyarrow.feather as feather
+    feather.write_feather(df.reset_index(drop=True), filename, compression=compression)
     print(f"Data saved to {filename}")
 
-def load_csv(filename):
-    df = pd.read_csv(filename)
+def load_feather(filename, columns=None, filters=None, memory_map=True, zero_copy=False):
+    """
+    Load a Feather (Arrow IPC) file.
+
+    Parameters:
+    - filename (str): The file.
+    - columns (list, optional): Only read these columns.
+    - filters (list or pyarrow.compute.Expression, optional): Row filter, e.g. [('year', '>=', 2020)].
+    - memory_map (bool): Map the file instead of reading it into a buffer.
+    - zero_copy (bool): Keep the columns as Arrow-backed pandas dtypes that point into the
+      memory-mapped file instead of converting them to NumPy.
+
+    Returns:
+    - pd.DataFrame: The loaded data.
+    """
+    import pyarrow.feather as feather
+    if filters is None:
+        table = feather.read_table(filename, columns=columns, memory_map=memory_map)
+    else:
+        # Filter columns need not be among the selected ones; mapped columns are not copied until used
+        table = feather.read_table(filename, memory_map=memory_map).filter(_filter_expression(filters))
+        if columns is not None:
+            table = table.select(columns)
+    df = table.to_pandas(types_mapper=pd.ArrowDtype) if zero_copy else table.to_pandas(split_blocks=True)
     print(f"Data loaded from {filename}")
     return df
 
@@ -13,7 +172,144 @@ def save_excel(df, filename):
     df.to_excel(filename, index=False)
     print(f"Data saved to {filename}")
 
-def load_excel(filename):
-    df = pd.read_excel(filename)
+def load_excel(filename, sheet_name=0, columns=None):
+    """
+    Load one sheet of a workbook. Rows are streamed with iter_excel, so the workbook's cell
+    object model is never built in memory.
+    """
+    chunks = [chunk for _, chunk in iter_excel(filename, sheets=[sheet_name], columns=columns)]
+    if chunks:
+        # Dtypes only widen from chunk to chunk, so the last chunk's dtypes hold every value
+        df = pd.concat([chunk.astype(chunks[-1].dtypes.to_dict()) for chunk in chunks], ignore_index=True)
+    else:
+        df = pd.DataFrame(columns=columns)
     print(f"Data loaded from {filename}")
     return df
+
+def _excel_engine(engine):
+    if engine is not None:
+        return engine
+    try:
+        import python_calamine  # Rust reader, much faster than openpyxl when installed
+        return 'calamine'
+    except ImportError:
+        return 'openpyxl'
+
+def _calamine_cell(value):
+    # calamine returns '' for empty cells and every number as a float; convert like pd.read_excel does
+    if value == '':
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def _sheet_rows(filename, sheets, engine):
+    """
+    Yield (sheet name, row iterator) for the selected sheets. Sheets may be given by name or position.
+    """
+    if engine == 'calamine':
+        from python_calamine import CalamineWorkbook
+        workbook = CalamineWorkbook.from_path(filename)
+        names = workbook.sheet_names
+        for sheet in sheets if sheets is not None else names:
+            name = names[sheet] if isinstance(sheet, int) else sheet
+            rows = workbook.get_sheet_by_name(name).iter_rows()
+            yield name, ([_calamine_cell(value) for value in row] for row in rows)
+    elif engine == 'openpyxl':
+        from openpyxl import load_workbook
+        # read_only parses the sheet XML lazily, row by row; data_only returns cached formula results
+        workbook = load_workbook(filename, read_only=True, data_only=True)
+        try:
+            names = workbook.sheetnames
+            for sheet in sheets if sheets is not None else names:
+                name = names[sheet] if isinstance(sheet, int) else sheet
+                yield name, workbook[name].iter_rows(values_only=True)
+        finally:
+            workbook.close()
+    else:
+        raise ValueError(f"Unsupported Excel engine: {engine}")
+
+def _common_dtype(first, second):
+    if first.kind in 'biuf' and second.kind in 'biuf':
+        return np.result_type(first, second)
+    return np.dtype(object)
+
+def _typed_chunk(rows, header, dtypes):
+    """
+    Build a dataframe from raw cell values. A column is cast to the dtype of earlier chunks when the
+    cast is lossless; otherwise the dtype is widened (e.g. int to float) and dtypes is updated in
+    place, so later chunks follow and all chunks of a sheet concatenate without losing values.
+    """
+    df = pd.DataFrame.from_records(rows, columns=header).infer_objects()
+    for column, dtype in dtypes.items():
+        current = df[column].dtype
+        if current == dtype:
+            continue
+        try:
+            cast = df[column].astype(dtype)
+            lossless = cast.astype(current).equals(df[column])
+        except (ValueError, TypeError, OverflowError):
+            lossless = False
+        if lossless:
+            df[column] = cast
+        else:
+            dtypes[column] = _common_dtype(dtype, current)
+            df[column] = df[column].astype(dtypes[column])
+    return df
+
+def iter_excel(filename, sheets=None, columns=None, chunksize=50000, engine=None):
+    """
+    Stream workbook sheets as typed dataframe chunks. The first row of each sheet is the header.
+
+    Parameters:
+    - filename (str): The workbook.
+    - sheets (list, optional): Sheet names or positions. Defaults to every sheet.
+    - columns (list, optional): Only keep these header names.
+    - chunksize (int): Rows per yielded dataframe.
+    - engine (str, optional): 'calamine' or 'openpyxl' (read-only mode). Defaults to calamine when installed.
+
+    Yields:
+    - tuple: (sheet name, pd.DataFrame).
+    """
+    for name, rows in _sheet_rows(filename, sheets, _excel_engine(engine)):
+        header = next(rows, None)
+        if header is None:
+            continue
+        header = [str(value) if value is not None else f'column_{i}' for i, value in enumerate(header)]
+        positions = list(range(len(header))) if columns is None else [header.index(column) for column in columns]
+        header = [header[i] for i in positions]
+        buffer, dtypes = [], {}
+        for row in rows:
+            values = [row[i] if i < len(row) else None for i in positions]
+            if all(value is None for value in values):
+                continue
+            buffer.append(values)
+            if len(buffer) >= chunksize:
+                chunk = _typed_chunk(buffer, header, dtypes)
+                dtypes = dtypes or chunk.dtypes.to_dict()
+                buffer = []
+                yield name, chunk
+        if buffer:
+            yield name, _typed_chunk(buffer, header, dtypes)
+
+# Loaders by file extension, used by load_file
+LOADERS = {
+    '.csv': load_csv,
+    '.parquet': load_parquet,
+    '.feather': load_feather,
+    '.arrow': load_feather,
+    '.xlsx': load_excel,
+    '.xls': load_excel,
+}
+
+def load_file(filename, **kwargs):
+    """
+    Load a file with the loader matching its extension; compressed CSVs such as data.csv.gz are
+    recognised by the extension before the codec.
+    """
+    root, extension = os.path.splitext(filename.lower())
+    if extension in CSV_COMPRESSION:
+        extension = os.path.splitext(root)[1]
+    if extension not in LOADERS:
+        raise ValueError(f"Unsupported file type: {filename}")
+    return LOADERS[extension](filename, **kwargs)